@@ -1,5 +1,6 @@
 from rest_framework.exceptions import NotAuthenticated
 
+from jobserver.backends import cache_backend, get_cached_backend
 from jobserver.models import Backend
 
 
@@ -19,6 +20,8 @@ def get_backend_from_token(token):
 
         Authorization: 401f7ac837da42b97f613d789819ff93537bee6a
 
+    Successful lookups are cached for a short time since job-runner polls the
+    API constantly, so fields which change, like the sync cursor, may be stale.
     """
 
     if token is None:
@@ -27,7 +30,14 @@ def get_backend_from_token(token):
     if token == "":
         raise NotAuthenticated("Authorization header is empty")
 
+    if backend := get_cached_backend(token):
+        return backend
+
     try:
-        return Backend.objects.get(auth_token=token)
+        backend = Backend.objects.get(auth_token=token)
     except Backend.DoesNotExist:
         raise NotAuthenticated("Invalid token")
+
+    cache_backend(token, backend)
+
+    return backend
@@ -1,10 +1,13 @@
-import itertools
-import operator
+import hashlib
+from collections import defaultdict
 
 import sentry_sdk
 import structlog
+from django.db import transaction
 from django.http import Http404
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags, quote_etag
 from first import first
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
@@ -13,19 +16,70 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from jobserver.api import get_backend_from_token
-from jobserver.emails import send_finished_notification
-from jobserver.models import JobRequest, Stats, User, Workspace
+from jobserver.models import (
+    Backend,
+    Job,
+    JobRequest,
+    OutboxMessage,
+    Stats,
+    User,
+    Workspace,
+)
 
 
 logger = structlog.get_logger(__name__)
 
 
+def changed_since(job_data, cursor):
+    """
+    Has the given raw Job payload changed since the given sync cursor?
+
+    This runs before validation so anything we can't parse is treated as
+    changed and left for the serializer to reject.  Jobs updated at the
+    cursor itself count as changed since another update can share the
+    cursor's timestamp after the last sync read it, and applying an update
+    twice is harmless.
+    """
+    try:
+        updated_at = parse_datetime(job_data["updated_at"])
+    except (KeyError, TypeError, ValueError):
+        return True
+
+    if updated_at is None or timezone.is_naive(updated_at):
+        return True
+
+    return updated_at >= cursor
+
+
+# only write a Backend's last seen time for a URL when the stored value is at
+# least this many seconds old.  Backend warnings are shown after 5 minutes so
+# this is well within what we need.
+STATS_WRITE_INTERVAL = 30
+
+# per-process record of when we last wrote Stats for each (backend, url)
+_stats_last_written = {}
+
+
 def update_stats(backend, url):
+    """
+    Record a Backend's use of the given API URL
+
+    job-runner polls the API constantly so rather than writing to the same row
+    on every request we skip writes while the last one we made is still fresh.
+    """
+    now = timezone.now()
+    key = (backend.pk, url)
+
+    last_written = _stats_last_written.get(key)
+    if last_written and (now - last_written).total_seconds() < STATS_WRITE_INTERVAL:
+        return
+
     Stats.objects.update_or_create(
         backend=backend,
         url=url,
-        defaults={"api_last_seen": timezone.now()},
+        defaults={"api_last_seen": now},
     )
+    _stats_last_written[key] = now
 
 
 class JobAPIUpdate(APIView):
@@ -52,125 +106,208 @@ class JobAPIUpdate(APIView):
     def post(self, request, *args, **kwargs):
         log = logger.new()
 
-        serializer = self.serializer_class(data=request.data, many=True)
+        data = request.data
+
+        # authenticated Backends are cached so look up the current cursor
+        current_cursor = Backend.objects.values_list("jobs_sync_cursor", flat=True).get(
+            pk=self.backend.pk
+        )
+
+        # job-runner can opt into sending only the Jobs which have changed
+        # since the last sync by echoing back the cursor we gave it.  A cursor
+        # which doesn't match ours means one of us has lost track, so we ask
+        # for a full update instead.
+        cursor = request.headers.get("Sync-Cursor")
+        is_delta = cursor is not None
+        if is_delta:
+            try:
+                cursor = parse_datetime(cursor)
+            except ValueError:
+                cursor = None
+
+            if cursor is None or cursor != current_cursor:
+                return Response(
+                    {
+                        "detail": "Unknown sync cursor, send a full update",
+                        "sync_cursor": current_cursor,
+                    },
+                    status=409,
+                )
+
+            # skip rows which haven't changed before we validate anything
+            if isinstance(data, list):
+                data = [j for j in data if changed_since(j, cursor)]
+
+        serializer = self.serializer_class(data=data, many=True)
         serializer.is_valid(raise_exception=True)
 
-        incoming_job_request_ids = {j["job_request_id"] for j in serializer.data}
+        # use the validated data so datetimes are real datetimes we can
+        # compare against the database values when looking for changes
+        jobs_data = serializer.validated_data
 
-        # error if we find JobRequest IDs in the payload which aren't in the database.
-        job_request_ids = set(JobRequest.objects.values_list("identifier", flat=True))
-        missing_ids = incoming_job_request_ids - job_request_ids
-        if missing_ids:
-            raise ValidationError(f"Unknown JobRequest IDs: {', '.join(missing_ids)}")
+        incoming_job_request_ids = {j["job_request_id"] for j in jobs_data}
 
         # get JobRequest instances based on the identifiers in the payload
         job_requests = JobRequest.objects.filter(
             identifier__in=incoming_job_request_ids
-        )
+        ).prefetch_related(None)
         job_request_lut = {jr.identifier: jr for jr in job_requests}
 
-        # sort the incoming data by JobRequest identifier to ensure the
-        # subsequent groupby call works correctly.
-        job_requests = sorted(
-            serializer.data, key=operator.itemgetter("job_request_id")
-        )
-        # group Jobs by their JobRequest ID
-        jobs_by_request = itertools.groupby(
-            serializer.data, key=operator.itemgetter("job_request_id")
-        )
-        for jr_identifier, jobs in jobs_by_request:
-            jobs = list(jobs)
+        # error if we find JobRequest IDs in the payload which aren't in the
+        # database.  We only look at the identifiers job-runner has sent us so
+        # this check is bounded by the payload, not the size of the table.
+        missing_ids = incoming_job_request_ids - job_request_lut.keys()
+        if missing_ids:
+            raise ValidationError(
+                f"Unknown JobRequest IDs: {', '.join(sorted(missing_ids))}"
+            )
 
-            # get the JobRequest for this identifier
-            job_request = job_request_lut[jr_identifier]
+        # get the current Jobs for every JobRequest in the payload, keyed on
+        # their identifier, in one query
+        existing_jobs = {
+            j.identifier: j
+            for j in Job.objects.filter(job_request__in=job_request_lut.values())
+        }
 
-            # bind the job request ID to further logs so looking them up in the UI is easier
-            log = log.bind(job_request=job_request.id)
+        # delete local jobs not in the payload, a delta payload only contains
+        # changed Jobs so we can't tell what's been removed from it
+        identifiers_to_delete = set()
+        if not is_delta:
+            payload_identifiers = {j["identifier"] for j in jobs_data}
+            identifiers_to_delete = set(existing_jobs.keys()) - payload_identifiers
+
+        completed = ["failed", "succeeded"]
+
+        jobs_to_create = []
+        jobs_to_update = []
+        fields_to_update = set()
+        messages = []
+        latest_updates = []
+        for job_data in jobs_data:
+            latest_updates.append(job_data["updated_at"])
+
+            # remove this value from the data, it's going to be set by
+            # assigning the JobRequest instance to each Job
+            job_request = job_request_lut[job_data.pop("job_request_id")]
+
+            job = existing_jobs.get(job_data["identifier"])
+            if job is None:
+                job = Job(job_request=job_request, **job_data)
+                jobs_to_create.append(job)
+
+                # For newly created jobs we can't check if they've just
+                # transition to "completed" so we knowingly skip potential
+                # notifications here to avoid creating false positives.
+                should_notify = False
+            else:
+                # check to see if the Job is about to transition to completed
+                # (failed or succeeded) so we can notify after the update
+                should_notify = (
+                    job.status not in completed and job_data["status"] in completed
+                )
 
-            database_jobs = job_request.jobs.all()
+                # only write the fields which have actually changed
+                changed = {k for k, v in job_data.items() if getattr(job, k) != v}
+                for key in changed:
+                    setattr(job, key, job_data[key])
+
+                if changed:
+                    jobs_to_update.append(job)
+                    fields_to_update |= changed
+
+            if "internal error" in job.status_message.lower():
+                # bubble internal errors encountered with a job up to
+                # sentry so we can get notifications they've happened
+                messages.append(
+                    OutboxMessage(
+                        job=job,
+                        kind=OutboxMessage.Kinds.INTERNAL_ERROR,
+                        key=job.status_message,
+                    )
+                )
 
-            # get the current Jobs for the JobRequest, keyed on their identifier
-            jobs_by_identifier = {j.identifier: j for j in database_jobs}
+            if job_request.will_notify and should_notify:
+                messages.append(
+                    OutboxMessage(
+                        job=job,
+                        kind=OutboxMessage.Kinds.FINISHED_NOTIFICATION,
+                        key=job.status,
+                    )
+                )
 
-            payload_identifiers = {j["identifier"] for j in jobs}
+        # recompute the state each JobRequest derives from its Jobs now we
+        # know what they will look like after this update
+        jobs_by_job_request = defaultdict(list)
+        for job in [*existing_jobs.values(), *jobs_to_create]:
+            if job.identifier not in identifiers_to_delete:
+                jobs_by_job_request[job.job_request_id].append(job)
 
-            # delete local jobs not in the payload
-            identifiers_to_delete = set(jobs_by_identifier.keys()) - payload_identifiers
-            if identifiers_to_delete:
-                job_request.jobs.filter(identifier__in=identifiers_to_delete).delete()
-
-            # grab Job IDs instead of logging for every Job in the payload (which gets very noisy)
-            created_job_ids = []
-            updated_job_ids = []
-            for job_data in jobs:
-                # remove this value from the data, it's going to be set by
-                # creating/updating Job instances via the JobRequest instances
-                # related Jobs manager (ie job_request.jobs)
-                job_data.pop("job_request_id")
-
-                job, created = job_request.jobs.get_or_create(
-                    identifier=job_data["identifier"],
-                    defaults={**job_data},
-                )
+        job_requests_to_update = []
+        queues_changed = set()
+        for job_request in job_request_lut.values():
+            was_active = job_request.is_active
 
-                if not created:
-                    updated_job_ids.append(str(job.id))
-                    # check to see if the Job is about to transition to completed
-                    # (failed or succeeded) so we can notify after the update
-                    completed = ["failed", "succeeded"]
-                    should_notify = (
-                        job.status not in completed and job_data["status"] in completed
-                    )
-                    # update Job "manually" so we can make the check above for
-                    # status transition
-                    for key, value in job_data.items():
-                        setattr(job, key, value)
-                    job.save()
-                    job.refresh_from_db()
-                else:
-                    created_job_ids.append(str(job.id))
-                    # For newly created jobs we can't check if they've just
-                    # transition to "completed" so we knowingly skip potential
-                    # notifications here to avoid creating false positives.
-                    should_notify = False
-
-                if "internal error" in job.status_message.lower():
-                    # bubble internal errors encountered with a job up to
-                    # sentry so we can get notifications they've happened
-                    with sentry_sdk.push_scope() as scope:
-                        scope.set_tag("backend", job_request.backend.slug)
-                        scope.set_tag(
-                            "job", request.build_absolute_uri(job.get_absolute_url())
-                        )
-                        sentry_sdk.capture_message("Job encountered an internal error")
-
-                if not job_request.will_notify:
-                    continue
-
-                if not should_notify:
-                    # Job didn't move into the completed state (it might have
-                    # already been there though)
-                    continue
-
-                send_finished_notification(
-                    job_request.created_by.notifications_email,
-                    job,
+            if job_request.update_from_jobs(jobs_by_job_request[job_request.pk]):
+                job_requests_to_update.append(job_request)
+
+            if job_request.is_active != was_active:
+                queues_changed.add(job_request.backend_id)
+
+        # move the cursor on to the most recent update we've been sent
+        sync_cursor = max(
+            filter(None, [current_cursor, *latest_updates]),
+            default=None,
+        )
+
+        with transaction.atomic():
+            if sync_cursor != current_cursor:
+                Backend.objects.filter(pk=self.backend.pk).update(
+                    jobs_sync_cursor=sync_cursor
                 )
-                log.info(
-                    "Notified requesting user of completed job",
-                    user_id=job_request.created_by_id,
+
+            if identifiers_to_delete:
+                Job.objects.filter(identifier__in=identifiers_to_delete).delete()
+
+            if jobs_to_create:
+                Job.objects.bulk_create(jobs_to_create)
+
+            if jobs_to_update:
+                Job.objects.bulk_update(jobs_to_update, sorted(fields_to_update))
+
+            if job_requests_to_update:
+                JobRequest.objects.bulk_update(
+                    job_requests_to_update, JobRequest.denormalised_fields
                 )
 
+            # JobRequests drop out of job-runner's queue once all their Jobs
+            # have completed, so let it know when that has changed
+            if queues_changed:
+                Backend.bump_job_requests_version(queues_changed)
+
+            # queue up notifications and error reports to be sent outside of
+            # this request, ignoring any we've already queued for this state
+            # of a Job
+            if messages:
+                OutboxMessage.objects.bulk_create(messages, ignore_conflicts=True)
+
+        # the latest status of actions in these Workspaces might have changed
+        if identifiers_to_delete or jobs_to_create or jobs_to_update:
+            Workspace.clear_action_status_cache(
+                {jr.workspace_id for jr in job_request_lut.values()},
+                [self.backend.slug],
+            )
+
+        # grab Job IDs instead of logging for every Job in the payload (which gets very noisy)
         log.info(
             "Created or updated Jobs",
-            created_job_ids=",".join(created_job_ids),
-            updated_job_ids=",".join(updated_job_ids),
+            created_job_ids=",".join(str(j.id) for j in jobs_to_create),
+            updated_job_ids=",".join(str(j.id) for j in jobs_to_update),
         )
 
         # record use of the API
         update_stats(self.backend, request.path)
 
-        return Response({"status": "success"}, status=200)
+        return Response({"status": "success", "sync_cursor": sync_cursor}, status=200)
 
 
 class WorkspaceSerializer(serializers.ModelSerializer):
@@ -218,24 +355,27 @@ class JobRequestAPIList(ListAPIView):
         return super().initial(request, *args, **kwargs)
 
     def get(self, request, *args, **kwargs):
-        response = super().get(request, *args, **kwargs)
-
-        # only gather stats when authenticated and response is 2xx
-        if self.backend and response.status_code >= 200 and response.status_code < 300:
+        self.backend_slug = self.get_backend_slug()
+
+        etag = self.get_etag()
+        if etag and etag in parse_etags(request.headers.get("If-None-Match", "")):
+            # nothing has changed in this Backend's queue since the client last
+            # asked so we can skip building the list
+            response = Response(status=304)
+        else:
+            response = super().get(request, *args, **kwargs)
+
+        if etag:
+            response["ETag"] = etag
+
+        # only gather stats when authenticated and response is 2xx or 304
+        successful = response.status_code >= 200 and response.status_code < 300
+        if self.backend and (successful or response.status_code == 304):
             update_stats(self.backend, request.path)
 
         return response
 
-    def get_queryset(self):
-        qs = (
-            JobRequest.objects.filter(
-                jobs__completed_at__isnull=True,
-            )
-            .select_related("created_by", "workspace", "workspace__created_by")
-            .order_by("-created_at")
-            .distinct()
-        )
-
+    def get_backend_slug(self):
         # filter JobRequests by Backend name
         # Prioritise GET arg then self.backend (from authenticated requests)
         query_arg_backend = self.request.GET.get("backend", None)
@@ -258,8 +398,55 @@ class JobRequestAPIList(ListAPIView):
             )
             sentry_sdk.capture_message("Backend mismatch between query arg and token")
 
-        if backend_slug := first([query_arg_backend, db_backend]):
-            qs = qs.filter(backend__slug=backend_slug)
+        return first([query_arg_backend, db_backend])
+
+    def get_etag(self):
+        """
+        Build an ETag from the Backend's JobRequests version
+
+        The version is bumped whenever the Backend's queue changes so we can
+        compare it without running the query for the queue itself.
+        """
+        if not self.backend_slug:
+            return
+
+        version = (
+            Backend.objects.filter(slug=self.backend_slug)
+            .values_list("job_requests_version", flat=True)
+            .first()
+        )
+        if version is None:
+            return
+
+        # the same queue can be paginated or filtered so the query string is
+        # part of the tag
+        key = f"{self.backend_slug}:{version}:{self.request.GET.urlencode()}"
+        return quote_etag(hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    def get_queryset(self):
+        qs = (
+            JobRequest.objects.active()
+            .select_related("created_by", "workspace", "workspace__created_by")
+            .order_by("-created_at")
+        )
+
+        if self.backend_slug:
+            qs = qs.filter(backend__slug=self.backend_slug)
+
+        # let job-runner ask for only the JobRequests which have been created
+        # or changed since it last looked, including any changed in the same
+        # instant it last looked since those may have been changed after it
+        # did
+        if since := self.request.GET.get("since"):
+            try:
+                since = parse_datetime(since)
+            except ValueError:
+                since = None
+
+            if since is None:
+                raise ValidationError({"since": "Expected an ISO 8601 datetime"})
+
+            qs = qs.filter(updated_at__gte=since)
 
         return qs
 
@@ -297,5 +484,10 @@ class WorkspaceStatusesAPI(APIView):
 
         backend = request.GET.get("backend", None)
 
-        actions_with_status = workspace.get_action_status_lut(backend)
+        # the backend filter is part of the cache key so don't let arbitrary
+        # values fill up the cache, no Jobs can match an unknown backend
+        if backend and not Backend.objects.filter(slug=backend).exists():
+            return Response({}, status=200)
+
+        actions_with_status = workspace.get_action_status_lut(backend, cached=True)
         return Response(actions_with_status, status=200)
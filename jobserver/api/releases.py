@@ -1,10 +1,22 @@
 import cgi
+import mimetypes
+import re
+from pathlib import PurePosixPath
 
 import structlog
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
-from django.http import FileResponse
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.http import parse_etags
 from rest_framework import serializers
 from rest_framework.exceptions import (
     NotAuthenticated,
@@ -13,21 +25,40 @@ from rest_framework.exceptions import (
     ValidationError,
 )
 from rest_framework.generics import CreateAPIView, RetrieveAPIView
-from rest_framework.parsers import FileUploadParser, JSONParser
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from slack_sdk.errors import SlackApiError
 
-from jobserver import releases
+from jobserver import previews, releases
 from jobserver.api import get_backend_from_token
 from jobserver.authorization import has_permission
-from jobserver.models import Release, ReleaseFile, Snapshot, User, Workspace
+from jobserver.models import (
+    Release,
+    ReleaseFile,
+    ReleaseFileUpload,
+    Snapshot,
+    User,
+    Workspace,
+)
+from jobserver.models.outputs import absolute_file_path
 from jobserver.utils import set_from_qs
 from services.slack import client as slack_client
 
 
 logger = structlog.get_logger(__name__)
 
+# the Content-Range header for a chunk of a resumable upload, eg bytes 0-99/100
+CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+# the Range header for a single range of a download, eg bytes=0-99, bytes=100-
+# or bytes=-100
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# a ReleaseFile's contents never change, but access to it is checked on every
+# request so it can only be cached by the user's own browser
+RELEASE_FILE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
 
 class ReleaseNotificationAPICreate(CreateAPIView):
     class serializer_class(serializers.Serializer):
@@ -92,6 +123,33 @@ def validate_upload_access(request, workspace):
     return backend, user
 
 
+def validate_release_file(release, backend, filename):
+    """Validate the given file can be uploaded to this Release by backend."""
+    if filename not in release.requested_files:
+        raise ValidationError(
+            {"detail": f"File {filename} not requested in release {release.id}"}
+        )
+
+    # ensure this is being released from the same backend as the Release
+    # was created from
+    if release.backend != backend:
+        raise ValidationError(
+            {
+                "detail": f"Release is from backend {release.backend.slug} not {backend.slug}"
+            }
+        )
+
+
+def get_content_length(request):
+    """Get the request's Content-Length, rejecting values which aren't a size"""
+    value = request.headers.get("Content-Length", "0")
+
+    if not (value.isascii() and value.isdigit()):
+        raise ValidationError({"detail": f"Invalid Content-Length: {value!r}"})
+
+    return int(value)
+
+
 def validate_release_access(request, workspace):
     """Validate this request can access releases for this workspace.
 
@@ -123,33 +181,57 @@ def validate_snapshot_access(request, snapshot):
         raise NotAuthenticated(f"Invalid user or token for snapshot pk={snapshot.pk}")
 
 
-def generate_index(files):
-    """Generate a JSON list of files as expected by the SPA."""
+def file_too_large():
+    max_size = settings.RELEASE_MAX_FILE_SIZE
+    return Response(
+        {"detail": f"File is larger than the maximum of {max_size} bytes"},
+        status=413,
+    )
 
-    def get_size(rfile):
-        try:
-            return rfile.absolute_path().stat().st_size
-        except FileNotFoundError:  # pragma: no cover
-            return None
 
+def generate_index(files):
+    """
+    Generate a JSON list of files as expected by the SPA.
+
+    Everything is read from the ReleaseFiles' fields so the caller should
+    select_related their backend and created_by.
+    """
     return dict(
         files=[
             dict(
                 name=name,
                 id=rfile.pk,
                 url=rfile.get_api_url(),
+                preview_url=(
+                    rfile.get_preview_url()
+                    if previews.get_preview_kind(rfile.name)
+                    else None
+                ),
                 user=rfile.created_by.username,
                 date=rfile.created_at.isoformat(),
                 sha256=rfile.filehash,
-                size=get_size(rfile),
-                is_deleted=rfile.deleted_at or not rfile.absolute_path().exists(),
-                backend=rfile.release.backend.name,
+                size=rfile.size,
+                is_deleted=rfile.deleted_at is not None,
+                backend=rfile.backend.name,
             )
             for name, rfile in files.items()
         ],
     )
 
 
+def get_index(obj, get_files):
+    """
+    Get the file index for a Release, Snapshot or Workspace from the cache
+
+    get_files is only called, to build the index, when it isn't cached.
+    """
+    return cache.get_or_set(
+        releases.get_index_cache_key(obj),
+        lambda: generate_index(get_files()),
+        releases.INDEX_CACHE_TTL,
+    )
+
+
 class ReleaseWorkspaceAPI(APIView):
     """Listing current files and creating new Releases for a workspace."""
 
@@ -182,13 +264,14 @@ class ReleaseWorkspaceAPI(APIView):
         """List the most recent versions of files for the Workspace."""
         workspace = get_object_or_404(Workspace, name=workspace_name)
         validate_release_access(request, workspace)
-        files = releases.workspace_files(workspace)
-        return Response(generate_index(files))
+        index = get_index(workspace, lambda: releases.workspace_files(workspace))
+        return Response(index)
 
 
 class ReleaseAPI(APIView):
-    # DRF file upload does not use multipart, is just a simple byte stream
-    parser_classes = [FileUploadParser]
+    # uploads are a simple byte stream which we read straight from
+    # request.stream, rather than letting a parser spool it to disk first
+    parser_classes = []
 
     def post(self, request, release_id):
         """Upload a file for this Release.
@@ -198,37 +281,37 @@ class ReleaseAPI(APIView):
         release = get_object_or_404(Release, id=release_id)
         backend, user = validate_upload_access(request, release.workspace)
 
-        try:
-            upload = request.data["file"]
-        except KeyError:
-            raise ValidationError({"detail": "No data uploaded"})
-
-        # DRF validates and parses the Content-Disposition header, but sadly
-        # strips any directory paths from the filename. We need those paths, so
-        # we need to reparse the header to get them.
-        _, params = cgi.parse_header(request.headers["Content-Disposition"])
-        filename = params["filename"]
+        # reject uploads we know are too big before the body is read
+        content_length = get_content_length(request)
+        if content_length > settings.RELEASE_MAX_FILE_SIZE:
+            return file_too_large()
 
-        if filename not in release.requested_files:
-            raise ValidationError(
-                {"detail": f"File {filename} not requested in release {release.id}"}
-            )
+        # DRF only gives us a stream when there's a body to read
+        upload = request.stream
+        if upload is None:
+            raise ValidationError({"detail": "No data uploaded"})
 
-        # ensure this is being released from the same backend as the Release
-        # was created from
-        if release.backend != backend:
+        # the filename can include directory paths, which we need to keep
+        _, params = cgi.parse_header(request.headers.get("Content-Disposition", ""))
+        filename = params.get("filename")
+        if not filename:
             raise ValidationError(
                 {
-                    "detail": f"Release is from backend {release.backend.slug} not {backend.slug}"
+                    "detail": "Missing filename, send a Content-Disposition header "
+                    "with a filename parameter"
                 }
             )
 
+        validate_release_file(release, backend, filename)
+
         try:
             rfile = releases.handle_file_upload(
                 release, backend, user, upload, filename
             )
         except releases.ReleaseFileAlreadyExists as exc:
             raise ValidationError({"detail": str(exc)})
+        except releases.ReleaseFileTooLarge:
+            return file_too_large()
 
         response = Response(status=201)
         response.headers["File-Id"] = rfile.id
@@ -239,8 +322,118 @@ class ReleaseAPI(APIView):
         """A list of files for this Release."""
         release = get_object_or_404(Release, id=release_id)
         validate_release_access(request, release.workspace)
-        files = {f.name: f for f in release.files.all()}
-        return Response(generate_index(files))
+
+        def get_files():
+            files = release.files.select_related("backend", "created_by")
+            return {f.name: f for f in files}
+
+        return Response(get_index(release, get_files))
+
+
+class ReleaseUploadCreateAPI(APIView):
+    """Start a resumable, chunked upload of a file for a Release."""
+
+    parser_classes = [JSONParser]
+
+    class serializer_class(serializers.Serializer):
+        name = serializers.CharField()
+        size = serializers.IntegerField(min_value=1)
+
+    def post(self, request, release_id):
+        release = get_object_or_404(Release, id=release_id)
+        backend, user = validate_upload_access(request, release.workspace)
+
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        filename = serializer.validated_data["name"]
+        size = serializer.validated_data["size"]
+
+        validate_release_file(release, backend, filename)
+
+        try:
+            upload = releases.start_file_upload(release, backend, user, filename, size)
+        except releases.ReleaseFileAlreadyExists as exc:
+            raise ValidationError({"detail": str(exc)})
+        except releases.ReleaseFileTooLarge:
+            return file_too_large()
+
+        response = Response({"offset": upload.offset, "size": upload.size}, status=201)
+        response.headers["Upload-Id"] = upload.id
+        response.headers["Location"] = request.build_absolute_uri(upload.get_api_url())
+        return response
+
+
+class ReleaseUploadAPI(APIView):
+    """
+    Send chunks of, and check the progress of, a resumable upload.
+
+    Each chunk is PUT with a Content-Range header giving its position in the
+    file and a Chunk-SHA256 header with the hash of its contents.  Chunks can
+    be sent in any order, and in parallel, while the offset reported back is
+    how much of the file, from the start, has been received.
+    """
+
+    def get(self, request, upload_id):
+        upload = get_object_or_404(ReleaseFileUpload, id=upload_id)
+        validate_upload_access(request, upload.release.workspace)
+
+        return Response({"offset": upload.offset, "size": upload.size})
+
+    def put(self, request, upload_id):
+        upload = get_object_or_404(ReleaseFileUpload, id=upload_id)
+        backend, _ = validate_upload_access(request, upload.release.workspace)
+
+        validate_release_file(upload.release, backend, upload.name)
+
+        match = CONTENT_RANGE.match(request.headers.get("Content-Range", ""))
+        if not match:
+            raise ValidationError(
+                {"detail": "Content-Range header must be in the form bytes 0-99/100"}
+            )
+
+        start, last, total = (int(v) for v in match.groups())
+        if get_content_length(request) != last + 1 - start:
+            raise ValidationError(
+                {"detail": "Content-Length does not match the Content-Range"}
+            )
+
+        if total != upload.size:
+            raise ValidationError(
+                {"detail": f"Upload {upload.id} is {upload.size} bytes not {total}"}
+            )
+
+        chunk_hash = request.headers.get("Chunk-SHA256")
+        if not chunk_hash:
+            raise ValidationError({"detail": "Missing Chunk-SHA256 header"})
+
+        try:
+            upload = releases.write_upload_chunk(
+                upload, start, last + 1, chunk_hash, request.stream
+            )
+        except releases.ReleaseUploadError as exc:
+            raise ValidationError({"detail": str(exc)})
+
+        return Response({"offset": upload.offset, "size": upload.size})
+
+
+class ReleaseUploadCompleteAPI(APIView):
+    """Finish a resumable upload once all of its chunks have been sent."""
+
+    def post(self, request, upload_id):
+        upload = get_object_or_404(ReleaseFileUpload, id=upload_id)
+        backend, _ = validate_upload_access(request, upload.release.workspace)
+
+        validate_release_file(upload.release, backend, upload.name)
+
+        try:
+            rfile = releases.complete_file_upload(upload, backend)
+        except (releases.ReleaseFileAlreadyExists, releases.ReleaseUploadError) as exc:
+            raise ValidationError({"detail": str(exc)})
+
+        response = Response(status=201)
+        response.headers["File-Id"] = rfile.id
+        response.headers["Location"] = request.build_absolute_uri(rfile.get_api_url())
+        return response
 
 
 class ReleaseFileAPI(APIView):
@@ -251,6 +444,30 @@ class ReleaseFileAPI(APIView):
         return serve_file(request, rfile)
 
 
+class ReleaseFilePreviewAPI(APIView):
+    def get(self, request, file_id):
+        """Return a small preview of a specific ReleaseFile"""
+        rfile = get_object_or_404(ReleaseFile, id=file_id)
+        validate_release_access(request, rfile.workspace)
+
+        if rfile.is_deleted:
+            raise NotFound
+
+        path = previews.get_preview(rfile)
+        if path is None:
+            raise NotFound("No preview is available for this file")
+
+        # CSVs we can't parse have a text preview
+        kind = path.suffix.lstrip(".")
+        return serve_stored_file(
+            request,
+            path,
+            filename=PurePosixPath(rfile.name).name,
+            content_type=previews.CONTENT_TYPES[kind],
+            etag=f'"{rfile.filehash}-preview"',
+        )
+
+
 class SnapshotAPI(APIView):
     def get(self, request, *args, **kwargs):
         """A list of files for this Snapshot."""
@@ -261,9 +478,12 @@ class SnapshotAPI(APIView):
         )
 
         validate_snapshot_access(request, snapshot)
-        files = {f.name: f for f in snapshot.files.all()}
 
-        return Response(generate_index(files))
+        def get_files():
+            files = snapshot.files.select_related("backend", "created_by")
+            return {f.name: f for f in files}
+
+        return Response(get_index(snapshot, get_files))
 
 
 class SnapshotCreateAPI(APIView):
@@ -340,26 +560,134 @@ class WorkspaceStatusAPI(RetrieveAPIView):
         )
 
 
+def parse_range(header, size):
+    """
+    Parse the byte range a Range header asks for from a file of the given size
+
+    Returns the inclusive start and end positions of the range, or None when
+    the header is missing, malformed or asks for several ranges, in which case
+    the whole file should be served.  Raises ValueError if the range can't be
+    satisfied.
+    """
+    match = RANGE.match(header or "")
+    if not match or match.groups() == ("", ""):
+        return None
+
+    # an empty file has no bytes for any range to select
+    if size == 0:
+        raise ValueError("File is empty")
+
+    start, end = match.groups()
+
+    if not start:
+        # a suffix range, the last N bytes of the file
+        length = int(end)
+        if not length:
+            raise ValueError("Range is empty")
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end:
+        raise ValueError("Range is outside of the file")
+
+    return start, end
+
+
+def read_range(path, start, end):
+    """Stream the inclusive byte range start-end of a file in chunks"""
+    remaining = end - start + 1
+    with path.open("rb") as f:
+        f.seek(start)
+        while remaining > 0:
+            chunk = f.read(min(remaining, releases.UPLOAD_CHUNK_SIZE))
+            if not chunk:  # pragma: no cover
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
 def serve_file(request, rfile):
-    """Serve a ReleaseFile as the response.
+    """Serve a ReleaseFile as the response."""
+    # check the file hasn't been deleted and actually exists on disk
+    if rfile.is_deleted:
+        raise NotFound
+
+    # files are stored under their hash so we can't rely on the path on disk
+    # to tell nginx, or FileResponse, what type of file they're serving
+    filename = PurePosixPath(rfile.name).name
+    content_type, _ = mimetypes.guess_type(filename)
+    content_type = content_type or "application/octet-stream"
+
+    return serve_stored_file(
+        request, rfile.path, filename, content_type, etag=f'"{rfile.filehash}"'
+    )
+
+
+def serve_stored_file(request, relative_path, filename, content_type, etag):
+    """Serve a file from RELEASE_STORAGE as the response.
 
     If Releases-Redirect header is set, use nginx's X-Accel-Redirect to serve
-    response. Else just serve the bytes directly (for dev).
+    response. Else just serve the bytes directly (for dev), handling single
+    byte Range requests ourselves.
+
+    Stored files never change so etag, which should be derived from a hash of
+    the file, is used as a strong ETag.  Clients can revalidate with
+    If-None-Match, or with If-Range when resuming a download.
     """
-    path = rfile.absolute_path()
-    # check the file actually exists on disk
-    if not path.exists():
-        raise NotFound
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
 
     internal_redirect = request.headers.get("Releases-Redirect")
-    if internal_redirect:
+    if etag in if_none_match or "*" in if_none_match:
+        response = HttpResponseNotModified()
+    elif internal_redirect:
         # we're behind nginx, so use X-Accel-Redirect to serve the file
-        # from nginx, relative to RELEASES_STORAGE.
-        response = Response()
-        response.headers["X-Accel-Redirect"] = f"{internal_redirect}/{rfile.path}"
+        # from nginx, relative to RELEASES_STORAGE.  nginx passes our
+        # Content-Type through, which DRF would drop from an empty Response.
+        # nginx handles Range requests itself.
+        response = HttpResponse(content_type=content_type)
+        response.headers["X-Accel-Redirect"] = f"{internal_redirect}/{relative_path}"
     else:
-        # serve directly from django in dev use regular django response to
-        # bypass DRFs renderer framework and just serve bytes
-        response = FileResponse(path.open("rb"))
+        path = absolute_file_path(relative_path)
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            raise Http404
+
+        # only honour a Range request if the client's partial copy is still
+        # the current version of the file
+        range_header = request.headers.get("Range")
+        if request.headers.get("If-Range", etag) != etag:
+            range_header = None
+
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response.headers["Content-Range"] = f"bytes */{size}"
+            return response
+
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                read_range(path, start, end),
+                status=206,
+                content_type=content_type,
+            )
+            response.headers["Content-Length"] = end - start + 1
+            response.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        else:
+            # serve directly from django in dev use regular django response to
+            # bypass DRFs renderer framework and just serve bytes
+            response = FileResponse(
+                path.open("rb"),
+                content_type=content_type,
+                filename=filename,
+            )
+
+        response.headers["Accept-Ranges"] = "bytes"
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = RELEASE_FILE_CACHE_CONTROL
 
     return response
@@ -1,5 +1,7 @@
 from django.utils.module_loading import import_string
 
+from .registry import ROLES
+
 
 def _ensure_role_paths(paths):
     """
@@ -20,7 +22,13 @@ def _ensure_role_paths(paths):
 
 def parse_roles(paths):
     """Convert Role dotted paths to Role objects"""
+    try:
+        return [ROLES[p] for p in paths]
+    except KeyError:
+        pass
 
+    # at least one path isn't one of our Roles, fall back to importing them so
+    # we raise the same errors as we always have
     _ensure_role_paths(paths)
 
     return [import_string(p) for p in paths]
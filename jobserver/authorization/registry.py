@@ -0,0 +1,56 @@
+"""
+Lookup tables for our Roles and Permissions, built once at import time
+
+Roles are stored as dotted paths and checked for their Permissions on almost
+every request, so rather than importing each path and walking each Role's
+permissions list every time we map paths straight to Role classes and turn
+each Role's permissions into a bitmask.  Checking a Permission is then a
+bitwise AND against the combined mask of a User's Roles.
+"""
+import inspect
+
+from ..utils import dotted_path
+from . import permissions, roles
+
+
+def _build_permission_bits():
+    names = sorted(
+        value
+        for name, value in inspect.getmembers(permissions)
+        if not name.startswith("_") and isinstance(value, str)
+    )
+    return {name: 1 << i for i, name in enumerate(names)}
+
+
+# map each Permission to its own bit
+PERMISSION_BITS = _build_permission_bits()
+
+# map each Role's dotted path to its class
+ROLES = {
+    dotted_path(cls): cls
+    for name, cls in inspect.getmembers(roles, inspect.isclass)
+    if cls.__module__ == roles.__name__
+}
+
+
+def build_mask(permission_names):
+    """Combine the bits of the given Permissions into one mask"""
+    mask = 0
+    for permission in permission_names:
+        mask |= PERMISSION_BITS.get(permission, 0)
+    return mask
+
+
+# map each Role to the mask of its Permissions
+ROLE_MASKS = {role: build_mask(role.permissions) for role in ROLES.values()}
+
+
+def get_permission_mask(user_roles):
+    """Get the combined Permissions mask of the given Roles"""
+    mask = 0
+    for role in user_roles:
+        try:
+            mask |= ROLE_MASKS[role]
+        except KeyError:
+            mask |= build_mask(role.permissions)
+    return mask
@@ -1,9 +1,9 @@
 import inspect
-import itertools
 
 from ..utils import dotted_path
 from . import roles
 from .mappers import get_org_roles_for_user, get_project_roles_for_user
+from .registry import PERMISSION_BITS, get_permission_mask
 
 
 def _validate_context(allowed_keys, context):
@@ -66,56 +66,99 @@ def _validate_context(allowed_keys, context):
     raise ValueError(msg)
 
 
-def _get_roles(user, **context):
+# map mappers to keys
+MAPPERS = {
+    "org": get_org_roles_for_user,
+    "project": get_project_roles_for_user,
+}
+
+
+class RoleResolver:
     """
-    Build up a set of Roles from the User and context
+    Resolve, and memoise, the Roles and Permissions of a User
+
+    Checking a User's permissions can happen several times while handling a
+    single request, often against the same Org or Project.  Each local
+    membership is only looked up once per context object, and the combined
+    Permissions mask for each combination of Roles is kept too.
 
-    A User's Roles can come from various locations, and be local or global,
-    this function gathers them from those locations using the passed context,
-    combining them into the returned set.
+    A resolver is attached to the User instance it resolves for, which lives
+    as long as the request it was loaded for.  Global Roles are read from the
+    User each time so changes to them are always seen.
     """
 
-    # map mappers to keys
-    mappers_lut = {
-        "org": get_org_roles_for_user,
-        "project": get_project_roles_for_user,
-    }
+    def __init__(self, user):
+        self.user = user
+        self._local_roles = {}
+        self._permissions = {}
 
-    # validate the context's keys and values
-    _validate_context(mappers_lut.keys(), context)
+    def _get_local_roles(self, key, obj):
+        # unsaved objects can't have any memberships we could memoise
+        if obj.pk is None:
+            return frozenset(MAPPERS[key](obj, self.user))
 
-    # build up an initial set of roles based solely on the User
-    roles = set(user.roles)
+        cache_key = (key, obj.pk)
+        if cache_key not in self._local_roles:
+            self._local_roles[cache_key] = frozenset(MAPPERS[key](obj, self.user))
 
-    # update the set with any Roles tied to the objects in the context
-    for key, value in context.items():
-        mapper = mappers_lut.get(key)
-        roles |= set(mapper(value, user))
+        return self._local_roles[cache_key]
+
+    def get_roles(self, **context):
+        """
+        Build up a set of Roles from the User and context
+
+        A User's Roles can come from various locations, and be local or
+        global, this gathers them from those locations using the passed
+        context, combining them into the returned set.
+        """
+        # validate the context's keys and values
+        _validate_context(MAPPERS.keys(), context)
+
+        # build up an initial set of roles based solely on the User
+        roles = set(self.user.roles)
+
+        # update the set with any Roles tied to the objects in the context
+        for key, value in context.items():
+            roles |= self._get_local_roles(key, value)
 
-    return roles
+        return roles
+
+    def get_permission_mask(self, **context):
+        """Get the mask of Permissions the User has in the given context"""
+        roles = frozenset(self.get_roles(**context))
+
+        if roles not in self._permissions:
+            self._permissions[roles] = get_permission_mask(roles)
+
+        return self._permissions[roles]
+
+
+def get_role_resolver(user):
+    """Get the RoleResolver for a User, creating it on first use"""
+    resolver = getattr(user, "_role_resolver", None)
+    if resolver is None:
+        resolver = RoleResolver(user)
+        user._role_resolver = resolver
+
+    return resolver
 
 
 def has_permission(user, permission, **context):
     if not user.is_authenticated:
         return False
 
-    roles = _get_roles(user, **context)
-
-    # Flatten each Roles permissions list into a single iterable
-    permissions = itertools.chain.from_iterable(r.permissions for r in roles)
-
-    # convert the itertools.chain generator into a set so we can check membership
-    permissions = set(permissions)
+    bit = PERMISSION_BITS.get(permission)
+    if bit is None:
+        return False
 
-    # return a boolean for whether the requested permission is in that set
-    return permission in permissions
+    return bool(get_role_resolver(user).get_permission_mask(**context) & bit)
 
 
 def has_role(user, role, **context):
     if not user.is_authenticated:
         return False
 
-    return role in _get_roles(user, **context)
+    return role in get_role_resolver(user).get_roles(**context)
 
 
 def roles_for(model):
@@ -1,11 +1,17 @@
+import hashlib
 from datetime import timedelta
 
+from django.core.cache import caches
 from django.utils import timezone
 from environs import Env
 
 
 env = Env()
 
+# how long, in seconds, an authenticated Backend is cached for, which bounds
+# how long a rotated token keeps working in other processes
+TOKEN_CACHE_TTL = 60
+
 
 backends = [
     {
@@ -66,6 +72,34 @@ def backends_to_choices(backends):
     return [(b.slug, b.name) for b in backends]
 
 
+def get_token_cache_key(token):
+    # never put tokens themselves in the cache
+    return "backend-token:" + hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def cache_backend(token, backend):
+    """
+    Cache the Backend an auth token belongs to
+
+    This uses an in-process cache so a hit doesn't cost a round trip to
+    anything.  Backend.save() drops a rotated token from the cache of the
+    process which rotated it, other processes drop it within TOKEN_CACHE_TTL.
+    """
+    caches["backend-tokens"].set(get_token_cache_key(token), backend, TOKEN_CACHE_TTL)
+
+
+def clear_cached_backend(*tokens):
+    """Drop the cached Backends of the given auth tokens"""
+    caches["backend-tokens"].delete_many(
+        [get_token_cache_key(token) for token in tokens]
+    )
+
+
+def get_cached_backend(token):
+    """Get the Backend cached for the given auth token, if any"""
+    return caches["backend-tokens"].get(get_token_cache_key(token))
+
+
 def ensure_backends():
     """
     Ensure the configured backends are present in the database
@@ -1,14 +1,22 @@
+import hashlib
 import json
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
 
 import requests
+import structlog
+from django.core.cache import cache
 from environs import Env
 from furl import furl
+from requests.adapters import HTTPAdapter
 from social_core.backends.github import GithubOAuth2
 from social_core.exceptions import AuthFailed
 
 
 env = Env()
+logger = structlog.get_logger(__name__)
 
 
 AUTHORIZATION_ORGS = env.list("AUTHORIZATION_ORGS")
@@ -16,6 +24,165 @@ BASE_URL = "https://api.github.com"
 GITHUB_TOKEN = env.str("GITHUB_TOKEN")
 USER_AGENT = "OpenSAFELY Jobs"
 
+# how long, in seconds, to wait to connect to, and then hear back from, GitHub
+TIMEOUT = (3.05, 10)
+
+# how long a cached response is used for before we check with GitHub that it
+# is still current, and how long we keep it around to check with
+CACHE_TTL = env.int("GITHUB_CACHE_TTL", default=60)
+CACHE_ETAG_TTL = 24 * 60 * 60
+
+# how many requests each client makes between logging its metrics
+METRICS_LOG_INTERVAL = 1000
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    text: str
+    etag: str = None
+    fetched_at: float = 0
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class GitHubClient:
+    """
+    A client for GitHub's REST API
+
+    Requests share a pooled session and are given strict timeouts so a slow
+    GitHub can't hold up our page views for long.
+
+    Successful and 404 responses are cached.  Within CACHE_TTL seconds of
+    fetching a response we reuse it without asking GitHub, unless the caller
+    asks for it to be revalidated, after that we revalidate it with its ETag.
+    GitHub answers revalidations with a 304 when nothing has changed, which
+    doesn't count against our rate limit.
+    """
+
+    def __init__(self, token, cache_ttl=CACHE_TTL):
+        self.cache_ttl = cache_ttl
+
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=20))
+        self.session.headers.update(
+            {
+                "Authorization": f"token {token}",
+                "User-Agent": USER_AGENT,
+            }
+        )
+
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0, "revalidated": 0}
+        self.rate_limit = {}
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+            total = sum(self.counts.values())
+
+        if total % METRICS_LOG_INTERVAL == 0:
+            logger.info("GitHub client metrics", **self.get_metrics())
+
+    def _record_rate_limit(self, response):
+        headers = response.headers
+        if "X-RateLimit-Remaining" not in headers:
+            return
+
+        self.rate_limit = {
+            "limit": int(headers["X-RateLimit-Limit"]),
+            "remaining": int(headers["X-RateLimit-Remaining"]),
+            "reset": int(headers["X-RateLimit-Reset"]),
+        }
+
+        if self.rate_limit["remaining"] < self.rate_limit["limit"] / 10:
+            logger.warning("GitHub rate limit running low", **self.rate_limit)
+
+    def get(self, url, accept, use_cache=True, revalidate=False):
+        """
+        GET the given URL, returning a CachedResponse
+
+        Pass revalidate=True to always check a cached response with GitHub,
+        for lookups which must be current, such as what a JobRequest runs.
+        Unchanged responses are still cheap since GitHub answers them with a
+        304.
+
+        Any response other than a success, redirect or 404 raises an
+        HTTPError, and failing to hear back from GitHub within TIMEOUT raises
+        a Timeout or ConnectionError, so callers should catch
+        RequestException.
+        """
+        key = "github:" + hashlib.sha256(f"{accept} {url}".encode()).hexdigest()
+        cached = cache.get(key) if use_cache else None
+
+        now = time.time()
+        is_fresh = cached and now - cached.fetched_at < self.cache_ttl
+        if is_fresh and not revalidate:
+            self._count("hits")
+            return cached
+
+        headers = {"Accept": accept}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+
+        r = self.session.get(url, headers=headers, timeout=TIMEOUT)
+        self._record_rate_limit(r)
+
+        if cached and r.status_code == 304:
+            self._count("revalidated")
+            cached.fetched_at = now
+            cache.set(key, cached, CACHE_ETAG_TTL)
+            return cached
+
+        self._count("misses")
+
+        if r.status_code != 404:
+            r.raise_for_status()
+
+        response = CachedResponse(
+            status_code=r.status_code,
+            text=r.text,
+            etag=r.headers.get("ETag"),
+            fetched_at=now,
+        )
+        if use_cache:
+            cache.set(key, response, CACHE_ETAG_TTL)
+
+        return response
+
+    def get_metrics(self):
+        """
+        Report how well the cache is working and how much rate limit is left
+
+        Revalidated responses count as hits since they don't use up any of
+        our rate limit.  Each client logs these every METRICS_LOG_INTERVAL
+        requests.
+        """
+        with self._lock:
+            counts = dict(self.counts)
+
+        total = sum(counts.values())
+        hits = counts["hits"] + counts["revalidated"]
+
+        return {
+            **counts,
+            "hit_rate": hits / total if total else None,
+            "rate_limit": dict(self.rate_limit),
+        }
+
+
+_client = None
+
+
+def get_client():
+    """Get the shared GitHubClient, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = GitHubClient(GITHUB_TOKEN)
+
+    return _client
+
 
 def _get_query_page(*, query, session, cursor, **kwargs):
     """
@@ -32,7 +199,12 @@ def _get_query_page(*, query, session, cursor, **kwargs):
     variables = {"cursor": cursor, **kwargs}
     payload = {"query": query, "variables": variables}
 
-    r = session.post("https://api.github.com/graphql", json=payload)
+    r = session.post(
+        "https://api.github.com/graphql",
+        json=payload,
+        headers={"Authorization": f"bearer {GITHUB_TOKEN}"},
+        timeout=TIMEOUT,
+    )
     r.raise_for_status()
     results = r.json()
 
@@ -62,11 +234,7 @@ def _iter_query_results(query, **kwargs):
     wraps the actual API calls done in _get_query_page and tracks the cursor.
     one.
     """
-    session = requests.Session()
-    session.headers = {
-        "Authorization": f"bearer {GITHUB_TOKEN}",
-        "User-Agent": USER_AGENT,
-    }
+    session = get_client().session
 
     cursor = ""
     while True:
@@ -96,18 +264,14 @@ def get_branch(org, repo, branch):
         branch,
     ]
 
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "Authorization": f"token {GITHUB_TOKEN}",
-        "User-Agent": USER_AGENT,
-    }
-    r = requests.get(f.url, headers=headers)
+    # branches are looked up to dispatch JobRequests so they must be current
+    r = get_client().get(
+        f.url, accept="application/vnd.github.v3+json", revalidate=True
+    )
 
     if r.status_code == 404:
         return
 
-    r.raise_for_status()
-
     return r.json()
 
 
@@ -131,18 +295,13 @@ def get_file(org, repo, branch):
     ]
     f.args["ref"] = branch
 
-    headers = {
-        "Accept": "application/vnd.github.3.raw",
-        "Authorization": f"token {GITHUB_TOKEN}",
-        "User-Agent": USER_AGENT,
-    }
-    r = requests.get(f.url, headers=headers)
+    # project.yaml is stored with the JobRequests it's used to create so it
+    # must be current
+    r = get_client().get(f.url, accept="application/vnd.github.3.raw", revalidate=True)
 
     if r.status_code == 404:
         return
 
-    r.raise_for_status()
-
     return r.text
 
 
@@ -154,18 +313,11 @@ def get_repo(org, repo):
         repo,
     ]
 
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "Authorization": f"token {GITHUB_TOKEN}",
-        "User-Agent": USER_AGENT,
-    }
-    r = requests.get(f.url, headers=headers)
+    r = get_client().get(f.url, accept="application/vnd.github.v3+json")
 
     if r.status_code == 404:
         return
 
-    r.raise_for_status()
-
     return r.json()
 
 
@@ -197,6 +349,8 @@ def get_repos_with_branches(org):
             nodes {
               name
               url
+              isPrivate
+              createdAt
               refs(refPrefix: "refs/heads/", first: 100) {
                 nodes {
                   name
@@ -215,37 +369,6 @@ def get_repos_with_branches(org):
     results = list(_iter_query_results(query, org_name=org))
     for repo in results:
         branches = [b["name"] for b in repo["refs"]["nodes"]]
-
-        yield {
-            "name": repo["name"],
-            "url": repo["url"],
-            "branches": branches,
-        }
-
-
-def get_repos_with_dates():
-    query = """
-    query reposAndBranches($cursor: String) {
-      organization(login: "opensafely") {
-        team(slug: "researchers") {
-          repositories(first: 100, after: $cursor) {
-            nodes {
-              name
-              url
-              isPrivate
-              createdAt
-            }
-            pageInfo {
-                endCursor
-                hasNextPage
-            }
-          }
-        }
-      }
-    }
-    """
-    results = list(_iter_query_results(query))
-    for repo in results:
         created_at = datetime.strptime(repo["createdAt"], "%Y-%m-%dT%H:%M:%SZ").replace(
             tzinfo=timezone.utc
         )
@@ -255,6 +378,7 @@ def get_repos_with_dates():
             "url": repo["url"],
             "is_private": repo["isPrivate"],
             "created_at": created_at,
+            "branches": branches,
         }
 
 
@@ -268,13 +392,10 @@ def is_member_of_org(org, username):
         username,
     ]
 
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "Authorization": f"token {GITHUB_TOKEN}",
-        "User-Agent": USER_AGENT,
-    }
-
-    r = requests.get(f.url, headers=headers)
+    # membership decides who can log in so always ask GitHub
+    r = get_client().get(
+        f.url, accept="application/vnd.github.v3+json", use_cache=False
+    )
 
     if r.status_code == 204:
         return True
@@ -282,8 +403,6 @@ def is_member_of_org(org, username):
     if r.status_code in (302, 404):
         return False
 
-    r.raise_for_status()
-
 
 class GithubOrganizationOAuth2(GithubOAuth2):
     """Github OAuth2 authentication backend for organizations"""
@@ -318,7 +437,7 @@ class GithubOrganizationOAuth2(GithubOAuth2):
             for org in AUTHORIZATION_ORGS:
                 if is_member_of_org(org, username):
                     return user_data  # succeed on the first valid org
-        except requests.HTTPError:
+        except requests.RequestException:
             msg = "We were unable to reach GitHub, please try again."
             raise AuthFailed(self, msg)
 
@@ -0,0 +1,16 @@
+import sys
+
+from django_extensions.management.jobs import DailyJob
+
+from jobserver.outbox import prune_outbox
+
+
+class Job(DailyJob):
+    help = "Delete sent and failed outbox messages past their retention period"  # noqa: A003
+
+    def execute(self):
+        try:
+            prune_outbox()
+        except Exception as e:
+            print(str(e), file=sys.stderr)
+            sys.exit(1)
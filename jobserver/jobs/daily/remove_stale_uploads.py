@@ -0,0 +1,16 @@
+import sys
+
+from django_extensions.management.jobs import DailyJob
+
+from jobserver.releases import remove_stale_uploads
+
+
+class Job(DailyJob):
+    help = "Remove release file uploads which weren't completed in time"  # noqa: A003
+
+    def execute(self):
+        try:
+            remove_stale_uploads()
+        except Exception as e:
+            print(str(e), file=sys.stderr)
+            sys.exit(1)
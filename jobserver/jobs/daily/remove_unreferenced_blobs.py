@@ -0,0 +1,16 @@
+import sys
+
+from django_extensions.management.jobs import DailyJob
+
+from jobserver.releases import remove_unreferenced_blobs
+
+
+class Job(DailyJob):
+    help = "Remove stored release files no undeleted ReleaseFile uses"  # noqa: A003
+
+    def execute(self):
+        try:
+            remove_unreferenced_blobs()
+        except Exception as e:
+            print(str(e), file=sys.stderr)
+            sys.exit(1)
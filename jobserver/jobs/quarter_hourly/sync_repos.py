@@ -0,0 +1,16 @@
+import sys
+
+from django_extensions.management.jobs import QuarterHourlyJob
+
+from jobserver.repos import sync_all_repos
+
+
+class Job(QuarterHourlyJob):
+    help = "Sync our mirror of researcher repos and branches from GitHub"  # noqa: A003
+
+    def execute(self):
+        try:
+            sync_all_repos()
+        except Exception as e:
+            print(str(e), file=sys.stderr)
+            sys.exit(1)
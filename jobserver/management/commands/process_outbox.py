@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobserver.outbox import process_outbox
+
+
+class Command(BaseCommand):
+    help = "Send notifications waiting in the outbox"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait between checks of an empty outbox",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Send one batch and exit",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_outbox(batch_size=options["batch_size"])
+
+            if options["once"]:
+                return
+
+            # keep going while there's a backlog, otherwise wait for more
+            if processed < options["batch_size"]:
+                time.sleep(options["interval"])
@@ -1,12 +1,15 @@
-import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connection
 from furl import furl
 
 from jobserver import releases
 from jobserver.models import Backend, Org, Project, User, Workspace
+from jobserver.models.outputs import absolute_file_path
 
 
 def get_or_maybe_create(create, model, lookup, **kwargs):
@@ -20,6 +23,30 @@ def get_or_maybe_create(create, model, lookup, **kwargs):
         return model.objects.create(**lookup)
 
 
+def write_file(path):
+    """
+    Copy a local file into the blob store the same way the release API does
+
+    The file is hashed as it's streamed in, so it's only read once.
+    """
+    directory = absolute_file_path(releases.BLOB_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    with path.open("rb") as f:
+        return releases.write_upload_to_tmp(f, directory)
+
+
+def save_file(release, backend, user, filename, tmp_path, filehash):
+    try:
+        return releases.save_release_file(
+            release, backend, user, filename, tmp_path, filehash
+        )
+    finally:
+        # each upload thread gets its own connection, close it rather than
+        # leaving it open once the thread is finished with
+        connection.close()
+
+
 class Command(BaseCommand):
     help = "Release a directory of files to a workspace"  # noqa: A003
 
@@ -54,6 +81,12 @@ class Command(BaseCommand):
             action="store_true",
             help="create test workspace/backend/user if they do not exist",
         )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="number of files to hash, and upload, at once",
+        )
 
     def handle(
         self,
@@ -62,19 +95,14 @@ class Command(BaseCommand):
         backend_name,
         username,
         create,
+        concurrency,
         *args,
-        **options
+        **options,
     ):
 
         assert directory.exists()
 
-        files = {}
-
-        for filename in directory.glob("**/*"):
-            if filename.is_dir():
-                continue
-            relative = filename.relative_to(directory)
-            files[str(relative)] = hashlib.sha256(filename.read_bytes()).hexdigest()
+        paths = sorted(p for p in directory.glob("**/*") if not p.is_dir())
 
         try:
             workspace = Workspace.objects.get(name=workspace_name)
@@ -101,10 +129,51 @@ class Command(BaseCommand):
         backend = get_or_maybe_create(create, Backend, {"slug": backend_name})
         user = get_or_maybe_create(create, User, {"username": username})
 
-        release = releases.create_release(workspace, backend, user, files)
-        for filename in files:
-            handle = (directory / filename).open("rb")
-            releases.handle_file_upload(release, backend, user, handle, filename)
+        start = time.monotonic()
+        total_bytes = 0
+
+        # the Release needs every file's hash so copy them all into the blob
+        # store first, hashing them as they're copied.  hashlib releases the
+        # GIL while hashing so threads can do this concurrently.
+        written = {}
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                for path, result in zip(paths, executor.map(write_file, paths)):
+                    written[str(path.relative_to(directory))] = result
+
+            files = {filename: filehash for filename, (_, filehash) in written.items()}
+            release = releases.create_release(workspace, backend, user, files)
+
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = [
+                    executor.submit(
+                        save_file,
+                        release,
+                        backend,
+                        user,
+                        filename,
+                        tmp_path,
+                        filehash,
+                    )
+                    for filename, (tmp_path, filehash) in written.items()
+                ]
+
+                for i, future in enumerate(as_completed(futures), start=1):
+                    rfile = future.result()
+                    total_bytes += rfile.size
+                    print(f"[{i}/{len(files)}] {rfile.name} ({rfile.size} bytes)")
+        finally:
+            # saving moves each file into place, anything left is from a failure
+            for tmp_path, _ in written.values():
+                tmp_path.unlink(missing_ok=True)
+
+        # guard against dividing by zero when there was nothing to upload
+        elapsed = max(time.monotonic() - start, 0.001)
+        megabytes = total_bytes / 1024 / 1024
+        print(
+            f"Uploaded {len(files)} files ({megabytes:.1f} MB) in {elapsed:.2f}s: "
+            f"{len(files) / elapsed:.1f} files/sec, {megabytes / elapsed:.1f} MB/sec"
+        )
 
         print("Release created:")
         f = furl(settings.BASE_URL)
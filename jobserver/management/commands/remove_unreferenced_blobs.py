@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from jobserver.releases import remove_unreferenced_blobs
+
+
+class Command(BaseCommand):
+    help = "Remove stored release files no undeleted ReleaseFile uses"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-period",
+            type=int,
+            default=60,
+            help="Minutes a blob must be unmodified for before it can be removed",
+        )
+
+    def handle(self, *args, **options):
+        grace_period = timedelta(minutes=options["grace_period"])
+
+        removed = remove_unreferenced_blobs(grace_period=grace_period)
+
+        for path in removed:
+            self.stdout.write(f"Removed {path}")
+
+        self.stdout.write(f"Removed {len(removed)} unreferenced blobs")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from jobserver.models import JobRequest
+
+
+class Command(BaseCommand):
+    help = "Recompute the fields JobRequests denormalise from their Jobs"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        last_pk = 0
+        updated = 0
+        while True:
+            # the default manager prefetches Jobs so each batch costs two
+            # queries to read
+            job_requests = list(
+                JobRequest.objects.filter(pk__gt=last_pk).order_by("pk")[:batch_size]
+            )
+            if not job_requests:
+                break
+
+            to_update = [
+                jr for jr in job_requests if jr.update_from_jobs(jr.jobs.all())
+            ]
+            JobRequest.objects.bulk_update(to_update, JobRequest.denormalised_fields)
+
+            updated += len(to_update)
+            last_pk = job_requests[-1].pk
+
+        self.stdout.write(f"Updated {updated} JobRequests")
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.5 on 2026-10-18 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobserver", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="backend",
+            name="jobs_sync_cursor",
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 3.2.5 on 2026-10-18 17:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobserver", "0002_add_backend_jobs_sync_cursor"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxMessage",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.TextField(
+                        choices=[
+                            ("finished_notification", "Finished notification"),
+                            ("internal_error", "Internal error"),
+                        ]
+                    ),
+                ),
+                ("key", models.TextField()),
+                ("attempts", models.IntegerField(default=0)),
+                ("last_error", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("sent_at", models.DateTimeField(null=True)),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="outbox_messages",
+                        to="jobserver.job",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="outboxmessage",
+            index=models.Index(
+                condition=models.Q(("sent_at__isnull", True)),
+                fields=["created_at"],
+                name="jobserver_outbox_unsent_idx",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="outboxmessage",
+            unique_together={("job", "kind", "key")},
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.5 on 2026-10-18 17:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobserver", "0003_add_outboxmessage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="backend",
+            name="job_requests_version",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="jobrequest",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.5 on 2026-10-18 17:27
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def set_is_active(apps, schema_editor):
+    Job = apps.get_model("jobserver", "Job")
+    JobRequest = apps.get_model("jobserver", "JobRequest")
+
+    # JobRequests with Jobs, none of which are still to complete
+    incomplete_jobs = Job.objects.filter(
+        job_request=OuterRef("pk"), completed_at__isnull=True
+    )
+    JobRequest.objects.filter(jobs__isnull=False).exclude(
+        Exists(incomplete_jobs)
+    ).update(is_active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobserver", "0004_add_job_request_queue_versioning"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobrequest",
+            name="is_active",
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddIndex(
+            model_name="jobrequest",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["backend", "-created_at"],
+                name="jobserver_jr_active_queue_idx",
+            ),
+        ),
+        migrations.RunPython(set_is_active, migrations.RunPython.noop),
+    ]
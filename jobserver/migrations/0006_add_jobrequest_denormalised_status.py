@@ -0,0 +1,28 @@
+# Generated by Django 3.2.5 on 2026-10-18 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobserver", "0005_add_jobrequest_is_active"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobrequest",
+            name="completed_at",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name="jobrequest",
+            name="num_completed",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="jobrequest",
+            name="status",
+            field=models.TextField(default="unknown"),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 3.2.5 on 2026-10-18 17:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+import jobserver.models.common
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobserver", "0006_add_jobrequest_denormalised_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReleaseFileUpload",
+            fields=[
+                (
+                    "id",
+                    models.CharField(
+                        default=jobserver.models.common.new_ulid_str,
+                        editable=False,
+                        max_length=26,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("name", models.TextField()),
+                ("size", models.BigIntegerField()),
+                ("received", models.JSONField(default=list)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("completed_at", models.DateTimeField(null=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="release_file_uploads",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "release",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="uploads",
+                        to="jobserver.release",
+                    ),
+                ),
+                (
+                    "release_file",
+                    models.OneToOneField(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="upload",
+                        to="jobserver.releasefile",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 3.2.5 on 2026-10-18 18:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def set_backend_and_size(apps, schema_editor):
+    Release = apps.get_model("jobserver", "Release")
+    ReleaseFile = apps.get_model("jobserver", "ReleaseFile")
+
+    backends = Release.objects.filter(pk=OuterRef("release_id")).values("backend_id")
+    ReleaseFile.objects.update(backend_id=Subquery(backends[:1]))
+
+    to_update = []
+    for rfile in ReleaseFile.objects.only("pk", "path").iterator():
+        try:
+            rfile.size = (settings.RELEASE_STORAGE / rfile.path).stat().st_size
+        except FileNotFoundError:
+            continue
+        to_update.append(rfile)
+
+    ReleaseFile.objects.bulk_update(to_update, ["size"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobserver", "0007_add_releasefileupload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="releasefile",
+            name="backend",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="release_files",
+                to="jobserver.backend",
+            ),
+        ),
+        migrations.AddField(
+            model_name="releasefile",
+            name="size",
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(set_backend_and_size, migrations.RunPython.noop),
+    ]
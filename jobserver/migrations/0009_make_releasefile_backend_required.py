@@ -0,0 +1,23 @@
+# Generated by Django 3.2.5 on 2026-10-18 18:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobserver", "0008_add_releasefile_backend_and_size"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="releasefile",
+            name="backend",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="release_files",
+                to="jobserver.backend",
+            ),
+        ),
+    ]
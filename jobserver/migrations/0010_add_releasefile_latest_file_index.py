@@ -0,0 +1,20 @@
+# Generated by Django 3.2.5 on 2026-10-18 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobserver", "0009_make_releasefile_backend_required"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="releasefile",
+            index=models.Index(
+                fields=["workspace", "backend", "name", "-created_at"],
+                name="jobserver_rf_latest_file_idx",
+            ),
+        ),
+    ]
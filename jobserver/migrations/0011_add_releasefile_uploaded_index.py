@@ -0,0 +1,19 @@
+# Generated by Django 3.2.5 on 2026-10-18 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobserver", "0010_add_releasefile_latest_file_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="releasefile",
+            index=models.Index(
+                fields=["backend", "name", "filehash"], name="jobserver_rf_uploaded_idx"
+            ),
+        ),
+    ]
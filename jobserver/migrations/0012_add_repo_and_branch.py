@@ -0,0 +1,61 @@
+# Generated by Django 3.2.5 on 2026-10-18 18:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobserver", "0011_add_releasefile_uploaded_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Repo",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("org", models.TextField()),
+                ("name", models.TextField()),
+                ("url", models.TextField(unique=True)),
+                ("is_private", models.BooleanField()),
+                ("created_at", models.DateTimeField()),
+                ("synced_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Branch",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.TextField()),
+                (
+                    "repo",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="branches",
+                        to="jobserver.repo",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("repo", "name")},
+            },
+        ),
+    ]
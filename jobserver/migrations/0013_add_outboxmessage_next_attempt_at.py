@@ -0,0 +1,31 @@
+# Generated by Django 3.2.5 on 2026-10-18 18:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobserver", "0012_add_repo_and_branch"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="outboxmessage",
+            name="jobserver_outbox_unsent_idx",
+        ),
+        migrations.AddField(
+            model_name="outboxmessage",
+            name="next_attempt_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name="outboxmessage",
+            index=models.Index(
+                condition=models.Q(("sent_at__isnull", True)),
+                fields=["next_attempt_at"],
+                name="jobserver_outbox_pending_idx",
+            ),
+        ),
+    ]
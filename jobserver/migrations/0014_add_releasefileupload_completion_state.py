@@ -0,0 +1,28 @@
+# Generated by Django 3.2.5 on 2026-10-18 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobserver", "0013_add_outboxmessage_next_attempt_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="releasefileupload",
+            name="completing_at",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name="releasefileupload",
+            name="error",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="releasefileupload",
+            name="failed_at",
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -10,22 +10,28 @@ from .core import (
     User,
     Workspace,
 )
-from .outputs import Release, ReleaseFile, Snapshot
+from .outbox import OutboxMessage
+from .outputs import Release, ReleaseFile, ReleaseFileUpload, Snapshot
+from .repos import Branch, Repo
 from .stats import Stats
 
 
 __all__ = [
     "Backend",
     "BackendMembership",
+    "Branch",
     "Job",
     "JobRequest",
     "Org",
     "OrgMembership",
+    "OutboxMessage",
     "Project",
     "ProjectInvitation",
     "ProjectMembership",
     "Release",
     "ReleaseFile",
+    "ReleaseFileUpload",
+    "Repo",
     "Snapshot",
     "Stats",
     "User",
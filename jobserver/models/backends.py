@@ -5,7 +5,7 @@ from django.db import models
 from django.urls import reverse
 from django.utils import timezone
 
-from ..backends import get_configured_backends
+from ..backends import clear_cached_backend, get_configured_backends
 
 
 def generate_token():
@@ -50,6 +50,14 @@ class Backend(models.Model):
     # track where release-hatch is serving files from
     level_4_url = models.TextField(default="")
 
+    # the most recent Job.updated_at job-runner has sent us, job-runner can
+    # use this to only send us Jobs which have changed since
+    jobs_sync_cursor = models.DateTimeField(null=True)
+
+    # bumped whenever this Backend's queue of active JobRequests changes so
+    # job-runner's polling can skip unchanged responses
+    job_requests_version = models.IntegerField(default=0)
+
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -58,6 +66,23 @@ class Backend(models.Model):
     def __str__(self):
         return self.slug
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+
+        # remember the token we loaded so save() can drop it from the auth
+        # cache if it's changed
+        instance._loaded_auth_token = instance.__dict__.get("auth_token")
+
+        return instance
+
+    @staticmethod
+    def bump_job_requests_version(pks):
+        """Mark the given Backends' queues of JobRequests as changed"""
+        Backend.objects.filter(pk__in=pks).update(
+            job_requests_version=models.F("job_requests_version") + 1
+        )
+
     def get_edit_url(self):
         return reverse("staff:backend-edit", kwargs={"pk": self.pk})
 
@@ -67,6 +92,14 @@ class Backend(models.Model):
     def get_staff_url(self):
         return reverse("staff:backend-detail", kwargs={"pk": self.pk})
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        # make sure API auth sees any change to the token
+        tokens = {self.auth_token, getattr(self, "_loaded_auth_token", None)}
+        clear_cached_backend(*filter(None, tokens))
+        self._loaded_auth_token = self.auth_token
+
     def rotate_token(self):
         self.auth_token = generate_token()
         self.save()
@@ -7,6 +7,7 @@ import structlog
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import UserManager as BaseUserManager
 from django.core import signing
+from django.core.cache import cache
 from django.core.validators import validate_slug
 from django.db import models, transaction
 from django.db.models import Min, Q
@@ -19,11 +20,17 @@ from furl import furl
 from ..authorization.fields import RolesField
 from ..authorization.utils import strings_to_roles
 from ..runtime import Runtime
+from .backends import Backend
 
 
 env = Env()
 logger = structlog.get_logger(__name__)
 
+# how long, in seconds, a Workspace's action -> status lookup table is cached
+# for.  JobAPIUpdate clears it from the shared cache, for every process, once
+# its changes to Jobs have been committed so this is only a backstop.
+ACTION_STATUS_CACHE_TTL = 60
+
 
 def default_github_orgs():
     return list(["opensafely"])
@@ -150,6 +157,14 @@ class JobRequestManager(models.Manager):
             .annotate(started_at=Min("jobs__started_at"))
         )
 
+    def active(self):
+        """
+        JobRequests which job-runner still needs to work on
+
+        The filter can be answered from the partial index on is_active.
+        """
+        return self.get_queryset().filter(is_active=True)
+
 
 class JobRequest(models.Model):
     """
@@ -182,10 +197,39 @@ class JobRequest(models.Model):
     will_notify = models.BooleanField(default=False)
     project_definition = models.TextField(default="")
 
+    # denormalised from this JobRequest's Jobs by update_from_jobs() whenever
+    # job-runner tells us about changes to them, so we can query on them
+    # without joining through to every Job.  A JobRequest is active until it
+    # has Jobs and all of them have completed.
+    is_active = models.BooleanField(default=True)
+    status = models.TextField(default="unknown")
+    num_completed = models.IntegerField(default=0)
+    completed_at = models.DateTimeField(null=True)
+
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
 
     objects = JobRequestManager()
 
+    # fields written by update_from_jobs(), including updated_at which it
+    # bumps itself since bulk_update() doesn't apply auto_now
+    denormalised_fields = [
+        "completed_at",
+        "is_active",
+        "num_completed",
+        "status",
+        "updated_at",
+    ]
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["backend", "-created_at"],
+                name="jobserver_jr_active_queue_idx",
+                condition=Q(is_active=True),
+            ),
+        ]
+
     def get_absolute_url(self):
         return reverse(
             "job-request-detail",
@@ -197,17 +241,13 @@ class JobRequest(models.Model):
             },
         )
 
-    @property
-    def completed_at(self):
-        last_job = self.jobs.order_by("completed_at").last()
-
-        if not last_job:
-            return
-
-        if self.status not in ["failed", "succeeded"]:
-            return
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
 
-        return last_job.completed_at
+        # creating or cancelling a JobRequest changes what job-runner sees
+        # when polling for the Backend's queue
+        if self.backend_id:
+            Backend.bump_job_requests_version([self.backend_id])
 
     def get_cancel_url(self):
         return reverse(
@@ -245,6 +285,67 @@ class JobRequest(models.Model):
     def is_completed(self):
         return self.status in ["failed", "succeeded"]
 
+    def update_from_jobs(self, jobs=None):
+        """
+        Recompute the fields we denormalise from this JobRequest's Jobs
+
+        Callers which already have the Jobs in hand, such as JobAPIUpdate,
+        can pass them in to avoid a query.  This doesn't save the JobRequest,
+        instead it returns whether any of the fields changed so callers can
+        write changes in bulk.  updated_at is moved on when they have, so
+        clients polling for changes see them.
+        """
+        if jobs is None:
+            jobs = Job.objects.filter(job_request=self)
+        jobs = list(jobs)
+
+        statuses = [j.status for j in jobs]
+
+        # JobRequest's status is built by "bubbling up" the status of each of
+        # its Jobs.
+        if len(set(statuses)) == 1:
+            # when they're all the same, just use that
+            status = statuses[0]
+        elif "running" in statuses:
+            # if any status is running then the JobRequest is running
+            status = "running"
+        elif "pending" in statuses:
+            # we've eliminated all statuses being the same so any pending
+            # statuses at this point mean there are other Jobs which are
+            # running/failed/succeeded so the request is still running
+            status = "running"
+        elif "failed" in statuses:
+            # now we know we have no pending or running Jobs left, that leaves
+            # us with failed or succeeded and a JobRequest is failed if any of
+            # its Jobs have failed.
+            status = "failed"
+        else:
+            status = "unknown"
+
+        completed_at = None
+        if status in ["failed", "succeeded"]:
+            completed_at = max(
+                filter(None, [j.completed_at for j in jobs]), default=None
+            )
+
+        values = {
+            "completed_at": completed_at,
+            "is_active": not jobs or any(j.completed_at is None for j in jobs),
+            "num_completed": statuses.count("succeeded"),
+            "status": status,
+        }
+
+        changed = False
+        for field, value in values.items():
+            if getattr(self, field) != value:
+                setattr(self, field, value)
+                changed = True
+
+        if changed:
+            self.updated_at = timezone.now()
+
+        return changed
+
     @property
     def is_invalid(self):
         """
@@ -259,10 +360,6 @@ class JobRequest(models.Model):
         """
         return self.jobs.filter(action="__error__").exists()
 
-    @property
-    def num_completed(self):
-        return len([j for j in self.jobs.all() if j.status == "succeeded"])
-
     @property
     def runtime(self):
         """
@@ -289,43 +386,6 @@ class JobRequest(models.Model):
 
         return Runtime(int(hours), int(minutes), int(seconds))
 
-    @property
-    def status(self):
-        prefetched_jobs = (
-            hasattr(self, "_prefetched_objects_cache")
-            and "jobs" in self._prefetched_objects_cache
-        )
-        if not prefetched_jobs:
-            # require Jobs are prefetched to get statuses since we have to
-            # query every Job for the logic below to work
-            raise Exception("JobRequest queries must prefetch jobs.")
-
-        # always make use of prefetched Jobs, so we don't execute O(N) queries
-        # each time.
-        statuses = [j.status for j in self.jobs.all()]
-
-        # when they're all the same, just use that
-        if len(set(statuses)) == 1:
-            return statuses[0]
-
-        # if any status is running then the JobRequest is running
-        if "running" in statuses:
-            return "running"
-
-        # we've eliminated all statuses being the same so any pending statuses
-        # at this point mean there are other Jobs which are
-        # running/failed/succeeded so the request is still running
-        if "pending" in statuses:
-            return "running"
-
-        # now we know we have no pending or running Jobs left, that leaves us
-        # with failed or succeeded and a JobRequest is failed if any of its
-        # Jobs have failed.
-        if "failed" in statuses:
-            return "failed"
-
-        return "unknown"
-
 
 class Org(models.Model):
     """An Organisation using the platform"""
@@ -896,28 +956,56 @@ class Workspace(models.Model):
     def get_statuses_url(self):
         return reverse("api:workspace-statuses", kwargs={"name": self.name})
 
-    def get_action_status_lut(self, backend=None):
+    def get_action_status_lut(self, backend=None, cached=False):
         """
         Build a lookup table of action -> status
 
         We need to get the latest status for each action run inside this
-        Workspace.
+        Workspace.  Pass cached=True to read the table from, and write it to,
+        the cache.
         """
+        if cached:
+            key = self.get_action_status_cache_key(self.pk, backend)
+            action_status_lut = cache.get(key)
+            if action_status_lut is None:
+                action_status_lut = self.get_action_status_lut(backend)
+                cache.set(key, action_status_lut, ACTION_STATUS_CACHE_TTL)
+
+            return action_status_lut
+
         jobs = Job.objects.filter(job_request__workspace=self)
 
         if backend:
             jobs = jobs.filter(job_request__backend__slug=backend)
 
-        # get all known actions
-        actions = set(jobs.values_list("action", flat=True))
+        # get the latest status for every action in one query
+        latest_jobs = (
+            jobs.order_by("action", "-created_at", "-pk")
+            .distinct("action")
+            .values_list("action", "status")
+        )
+
+        return dict(latest_jobs)
 
-        action_status_lut = {}
-        for action in actions:
-            # get the latest status for an action
-            job = jobs.filter(action=action).order_by("-created_at").first()
-            action_status_lut[action] = job.status
+    @staticmethod
+    def get_action_status_cache_key(workspace_pk, backend=None):
+        return f"workspace:{workspace_pk}:action-status-lut:{backend or ''}"
+
+    @classmethod
+    def clear_action_status_cache(cls, workspace_pks, backends):
+        """
+        Drop cached action status tables for the given Workspaces
 
-        return action_status_lut
+        Tables are cached per backend filter, including no filter, so all of
+        them are cleared for each Workspace.
+        """
+        cache.delete_many(
+            [
+                cls.get_action_status_cache_key(pk, backend)
+                for pk in workspace_pks
+                for backend in [None, *backends]
+            ]
+        )
 
     @property
     def repo_name(self):
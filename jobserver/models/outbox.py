@@ -0,0 +1,52 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxMessage(models.Model):
+    """
+    A side effect of a job-runner update waiting to be sent
+
+    JobAPIUpdate writes these in the same transaction as the Job changes which
+    caused them so job-runner isn't held up by slow SMTP servers or Sentry.
+    They're sent by the process_outbox management command and pruned by the
+    prune_outbox job once they're old.
+    """
+
+    class Kinds(models.TextChoices):
+        FINISHED_NOTIFICATION = "finished_notification", "Finished notification"
+        INTERNAL_ERROR = "internal_error", "Internal error"
+
+    job = models.ForeignKey(
+        "Job",
+        on_delete=models.CASCADE,
+        related_name="outbox_messages",
+    )
+
+    kind = models.TextField(choices=Kinds.choices)
+
+    # identifies the state of the Job this message is about so repeated
+    # updates from job-runner don't send the same message twice
+    key = models.TextField()
+
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(default="", blank=True)
+
+    # when the message can next be picked up, which is pushed back while it's
+    # being sent and after each failed attempt
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(sent_at__isnull=True),
+                name="jobserver_outbox_pending_idx",
+            ),
+        ]
+        unique_together = ["job", "kind", "key"]
+
+    def __str__(self):
+        return f"{self.kind} | {self.job_id} | {self.key}"
@@ -102,6 +102,13 @@ class ReleaseFile(models.Model):
         on_delete=models.PROTECT,
         related_name="files",
     )
+    # the Release's backend, copied here so listing files doesn't need to join
+    # through the Release
+    backend = models.ForeignKey(
+        "Backend",
+        on_delete=models.PROTECT,
+        related_name="release_files",
+    )
     workspace = models.ForeignKey(
         "Workspace",
         on_delete=models.PROTECT,
@@ -116,15 +123,32 @@ class ReleaseFile(models.Model):
 
     # name is path from the POV of the researcher, e.g "outputs/file1.txt"
     name = models.TextField()
-    # path is from the POV of the system e.g. "workspace/releases/RELEASE_ID/file1.txt"
+    # path is from the POV of the system, relative to RELEASE_STORAGE, e.g.
+    # "blobs/ab/abcdef..." for content stored by its hash, or
+    # "workspace/releases/RELEASE_ID/file1.txt" for older files
     path = models.TextField()
     # the sha256 hash of the file
     filehash = models.TextField()
+    # size in bytes, recorded at upload so listing files doesn't touch the
+    # disk.  Null for files which were missing when this was backfilled.
+    size = models.BigIntegerField(null=True)
 
     created_at = models.DateTimeField(default=timezone.now)
     deleted_at = models.DateTimeField(null=True)
 
     class Meta:
+        indexes = [
+            # supports finding the latest version of each file in a Workspace
+            models.Index(
+                fields=["workspace", "backend", "name", "-created_at"],
+                name="jobserver_rf_latest_file_idx",
+            ),
+            # supports checking for files which have already been uploaded
+            models.Index(
+                fields=["backend", "name", "filehash"],
+                name="jobserver_rf_uploaded_idx",
+            ),
+        ]
         constraints = [
             models.CheckConstraint(
                 name="%(app_label)s_%(class)s_deleted_fields_both_set",
@@ -160,6 +184,10 @@ class ReleaseFile(models.Model):
         """The API url that will serve up this file."""
         return reverse("api:release-file", kwargs={"file_id": self.id})
 
+    def get_preview_url(self):
+        """The API url that will serve up a preview of this file."""
+        return reverse("api:release-file-preview", kwargs={"file_id": self.id})
+
     def get_delete_url(self):
         return reverse(
             "release-file-delete",
@@ -174,8 +202,72 @@ class ReleaseFile(models.Model):
 
     @property
     def is_deleted(self):
-        """Has the file on disk been deleted?"""
-        return not self.absolute_path().exists()
+        """Has this file been deleted, or is it missing from disk?"""
+        return self.deleted_at is not None or not self.absolute_path().exists()
+
+
+class ReleaseFileUpload(models.Model):
+    """A resumable, chunked upload of a file in a Release.
+
+    Backends send byte ranges of the file, in any order, which are written
+    into place in a single file under RELEASE_STORAGE.  Once every byte has
+    arrived the upload is completed, creating a ReleaseFile from it.  Uploads
+    which fail to complete can't be retried, the Backend must start a new one.
+    """
+
+    id = models.CharField(  # noqa: A003
+        default=new_ulid_str, max_length=26, primary_key=True, editable=False
+    )
+
+    release = models.ForeignKey(
+        "Release",
+        on_delete=models.CASCADE,
+        related_name="uploads",
+    )
+    created_by = models.ForeignKey(
+        "User",
+        on_delete=models.PROTECT,
+        related_name="release_file_uploads",
+    )
+    release_file = models.OneToOneField(
+        "ReleaseFile",
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="upload",
+    )
+
+    # name is path from the POV of the researcher, e.g "outputs/file1.txt"
+    name = models.TextField()
+    # the size, in bytes, of the complete file
+    size = models.BigIntegerField()
+    # sorted, non-overlapping [start, end) byte ranges we've received so far
+    received = models.JSONField(default=list)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    # set while the complete file is being checked, so only one request does so
+    completing_at = models.DateTimeField(null=True)
+    completed_at = models.DateTimeField(null=True)
+
+    failed_at = models.DateTimeField(null=True)
+    error = models.TextField(default="", blank=True)
+
+    def absolute_path(self):
+        return absolute_file_path(self.path)
+
+    def get_api_url(self):
+        return reverse("api:release-upload", kwargs={"upload_id": self.id})
+
+    @property
+    def offset(self):
+        """The number of bytes, from the start of the file, we have received"""
+        if self.received and self.received[0][0] == 0:
+            return self.received[0][1]
+
+        return 0
+
+    @property
+    def path(self):
+        return f"uploads/{self.id}"
 
 
 class Snapshot(models.Model):
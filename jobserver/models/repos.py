@@ -0,0 +1,41 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Repo(models.Model):
+    """
+    A GitHub repo our researchers can use
+
+    These mirror the repos of each GitHub Organisation's researchers team so
+    views can list them without waiting on GitHub.  They're kept up to date
+    by the sync_repos job, and views sync them if that has fallen behind.
+    """
+
+    # the GitHub Organisation this repo lives in
+    org = models.TextField()
+    name = models.TextField()
+    url = models.TextField(unique=True)
+    is_private = models.BooleanField()
+
+    # when the repo was created on GitHub and when we last saw it there
+    created_at = models.DateTimeField()
+    synced_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.url
+
+
+class Branch(models.Model):
+    repo = models.ForeignKey(
+        "Repo",
+        on_delete=models.CASCADE,
+        related_name="branches",
+    )
+
+    name = models.TextField()
+
+    class Meta:
+        unique_together = ["repo", "name"]
+
+    def __str__(self):
+        return f"{self.repo.name} | {self.name}"
@@ -0,0 +1,164 @@
+from datetime import timedelta
+
+import sentry_sdk
+import structlog
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from furl import furl
+
+from jobserver.emails import send_finished_notification
+from jobserver.models import OutboxMessage
+
+
+logger = structlog.get_logger(__name__)
+
+# give up on a message after this many failed attempts to send it
+MAX_ATTEMPTS = 5
+
+# how long to wait before retrying a failed message, doubled after each
+# attempt
+RETRY_BACKOFF = timedelta(minutes=1)
+
+# how long a worker has to send the messages it has claimed before they can be
+# claimed by another worker
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+# how long to keep sent messages around for
+SENT_RETENTION = timedelta(days=30)
+
+# how long to keep messages we gave up on around for, so they can be looked
+# into
+FAILED_RETENTION = timedelta(days=30)
+
+
+def send_internal_error(job):
+    """Bubble a Job's internal error up to Sentry"""
+    f = furl(settings.BASE_URL)
+    f.path = job.get_absolute_url()
+
+    with sentry_sdk.push_scope() as scope:
+        scope.set_tag("backend", job.job_request.backend.slug)
+        scope.set_tag("job", f.url)
+        sentry_sdk.capture_message("Job encountered an internal error")
+
+
+def send_message(message):
+    job = message.job
+
+    if message.kind == OutboxMessage.Kinds.FINISHED_NOTIFICATION:
+        send_finished_notification(job.job_request.created_by.notifications_email, job)
+        logger.info(
+            "Notified requesting user of completed job",
+            job_request=job.job_request_id,
+            user_id=job.job_request.created_by_id,
+        )
+        return
+
+    if message.kind == OutboxMessage.Kinds.INTERNAL_ERROR:
+        send_internal_error(job)
+        return
+
+    raise ValueError(f"Unknown OutboxMessage kind: {message.kind}")
+
+
+def get_retry_delay(attempts):
+    """Get how long to wait before the next attempt at sending a message"""
+    return RETRY_BACKOFF * 2 ** (attempts - 1)
+
+
+def claim_messages(batch_size):
+    """
+    Claim a batch of pending OutboxMessages for this worker to send
+
+    Rows are only locked, skipping any which are already locked, for as long
+    as it takes to push their next_attempt_at past CLAIM_TIMEOUT.  Other
+    workers then pass over them without us holding a transaction open while
+    we talk to SMTP servers or Sentry, and a worker which dies part way
+    through a batch only delays its messages rather than losing them.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.filter(
+                sent_at=None,
+                attempts__lt=MAX_ATTEMPTS,
+                next_attempt_at__lte=now,
+            )
+            .select_related(
+                "job__job_request__backend",
+                "job__job_request__created_by",
+                "job__job_request__workspace__project__org",
+            )
+            .select_for_update(skip_locked=True, of=("self",))
+            .order_by("next_attempt_at")[:batch_size]
+        )
+
+        for message in messages:
+            message.next_attempt_at = now + CLAIM_TIMEOUT
+
+        OutboxMessage.objects.bulk_update(messages, ["next_attempt_at"])
+
+    return messages
+
+
+def process_outbox(batch_size=100):
+    """
+    Send a batch of pending OutboxMessages
+
+    A message which fails to send is retried, with an exponential backoff,
+    until it hits MAX_ATTEMPTS, at which point we log an error so it's
+    surfaced in Sentry.
+
+    Returns the number of messages processed.
+    """
+    messages = claim_messages(batch_size)
+
+    for message in messages:
+        try:
+            send_message(message)
+        except Exception as e:
+            logger.exception("Failed to send outbox message", message=message.pk)
+            message.attempts += 1
+            message.last_error = str(e)
+            message.next_attempt_at = timezone.now() + get_retry_delay(message.attempts)
+
+            if message.attempts >= MAX_ATTEMPTS:
+                logger.error(
+                    "Gave up sending outbox message",
+                    message=message.pk,
+                    kind=message.kind,
+                    attempts=message.attempts,
+                    last_error=message.last_error,
+                )
+        else:
+            message.sent_at = timezone.now()
+
+    OutboxMessage.objects.bulk_update(
+        messages, ["attempts", "last_error", "next_attempt_at", "sent_at"]
+    )
+
+    return len(messages)
+
+
+def prune_outbox(retention=SENT_RETENTION, failed_retention=FAILED_RETENTION):
+    """
+    Delete messages which are past their retention period
+
+    That is messages which were sent longer ago than retention, and messages
+    we gave up sending which were created longer ago than failed_retention.
+
+    Returns the number of messages deleted.
+    """
+    now = timezone.now()
+    sent = Q(sent_at__lt=now - retention)
+    failed = Q(
+        sent_at=None,
+        attempts__gte=MAX_ATTEMPTS,
+        created_at__lt=now - failed_retention,
+    )
+
+    deleted, _ = OutboxMessage.objects.filter(sent | failed).delete()
+    return deleted
@@ -0,0 +1,138 @@
+import csv
+import io
+import os
+import tempfile
+from pathlib import Path, PurePosixPath
+
+import structlog
+
+from .models.outputs import absolute_file_path
+
+
+logger = structlog.get_logger(__name__)
+
+PREVIEW_DIR = "previews"
+
+# how much of a file to keep in its preview
+PREVIEW_ROWS = 100
+PREVIEW_MAX_BYTES = 64 * 1024
+
+# the kinds of preview we can build, keyed by the suffix of a file's name
+PREVIEW_KINDS = {
+    ".csv": "csv",
+    ".log": "text",
+    ".md": "text",
+    ".txt": "text",
+}
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "text": "text/plain",
+}
+
+
+def get_preview_kind(name):
+    """Get the kind of preview we can build for a file, if any"""
+    return PREVIEW_KINDS.get(PurePosixPath(name).suffix.lower())
+
+
+def build_preview_path(filehash, kind):
+    """
+    Build the RELEASE_STORAGE relative path of a preview
+
+    Like the files themselves, previews are keyed by the hash of their
+    content so are only built once however many ReleaseFiles share it.
+    """
+    return Path(PREVIEW_DIR) / filehash[:2] / f"{filehash}.{kind}"
+
+
+def write_csv_preview(src, dst):
+    """Copy the first PREVIEW_ROWS rows of a CSV, up to PREVIEW_MAX_BYTES"""
+    reader = csv.reader(
+        io.TextIOWrapper(src, encoding="utf-8", errors="replace", newline="")
+    )
+
+    rows = io.StringIO()
+    writer = csv.writer(rows)
+    for i, row in enumerate(reader):
+        if i >= PREVIEW_ROWS or rows.tell() >= PREVIEW_MAX_BYTES:
+            break
+        writer.writerow(row)
+
+    dst.write(rows.getvalue().encode("utf-8"))
+
+
+def write_text_preview(src, dst):
+    """Copy the first PREVIEW_MAX_BYTES of a text file"""
+    # drop any character the limit cuts in half
+    text = src.read(PREVIEW_MAX_BYTES).decode("utf-8", errors="ignore")
+    dst.write(text.encode("utf-8"))
+
+
+WRITERS = {
+    "csv": write_csv_preview,
+    "text": write_text_preview,
+}
+
+
+def get_preview(rfile):
+    """
+    Get the RELEASE_STORAGE relative path of a ReleaseFile's preview
+
+    The preview is built, and stored for next time, if it doesn't exist yet.
+    CSVs which the csv module can't parse, eg because a field is over its
+    size limit, get a text preview instead.  The kind of preview is the
+    suffix of the path.  Returns None for files we can't preview.
+    """
+    kind = get_preview_kind(rfile.name)
+    if kind is None:
+        return None
+
+    try:
+        return store_preview(rfile, kind)
+    except csv.Error:
+        logger.info("Falling back to a text preview", release_file=rfile.pk)
+        return store_preview(rfile, "text")
+
+
+def store_preview(rfile, kind):
+    """Build and store the given kind of preview of a ReleaseFile if needed"""
+    relative_path = build_preview_path(rfile.filehash, kind)
+    path = absolute_file_path(relative_path)
+    if path.exists():
+        return relative_path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # build the preview alongside where it will live so it can be moved into
+    # place atomically
+    f = tempfile.NamedTemporaryFile(dir=path.parent, prefix=".preview-", delete=False)
+    tmp_path = Path(f.name)
+    try:
+        with f, rfile.absolute_path().open("rb") as src:
+            WRITERS[kind](src, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return relative_path
+
+
+def build_preview(rfile):
+    """
+    Build the preview of a newly uploaded ReleaseFile
+
+    Previews can always be built when they're first requested so failing to
+    build one here is logged rather than failing the upload.
+    """
+    try:
+        get_preview(rfile)
+    except Exception:
+        logger.exception("Failed to build preview", release_file=rfile.pk)
+
+
+def delete_previews(filehash):
+    """Remove every preview of the given content"""
+    directory = absolute_file_path(PREVIEW_DIR) / filehash[:2]
+    for path in directory.glob(f"{filehash}.*"):
+        path.unlink(missing_ok=True)
@@ -1,22 +1,71 @@
 import hashlib
-import io
+import itertools
+import os
+import shutil
+import tempfile
+import time
 import zipfile
 from datetime import timedelta
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 
-from django.db import transaction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from furl import furl
 
-from .models import Release, ReleaseFile
+from . import previews
+from .models import Release, ReleaseFile, ReleaseFileUpload
 from .models.outputs import absolute_file_path
 from .signing import AuthToken
 
 
+# how much of a file we read into memory at a time when uploading or zipping it
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# the RELEASE_STORAGE directory holding the content of every ReleaseFile
+BLOB_DIR = "blobs"
+BLOB_GRACE_PERIOD = timedelta(hours=1)
+# the RELEASE_STORAGE directory resumable uploads are written into, and how
+# long an upload has to be completed in before it's removed
+UPLOAD_DIR = "uploads"
+UPLOAD_EXPIRY = timedelta(days=7)
+# how long a request has to check a completed upload before another request
+# can try
+UPLOAD_COMPLETE_TIMEOUT = timedelta(hours=1)
+
+# indexes are dropped from the cache whenever their files change, but only in
+# the process which changed them, so this bounds how long other processes can
+# serve a stale index for
+INDEX_CACHE_TTL = 60
+
+# file types which gain nothing from being compressed again when zipped
+ALREADY_COMPRESSED_SUFFIXES = {
+    ".feather",
+    ".gif",
+    ".gz",
+    ".jpeg",
+    ".jpg",
+    ".parquet",
+    ".png",
+    ".svgz",
+    ".zip",
+}
+
+
 class ReleaseFileAlreadyExists(Exception):
     pass
 
 
+class ReleaseFileTooLarge(Exception):
+    pass
+
+
+class ReleaseUploadError(Exception):
+    pass
+
+
 def build_hatch_token_and_url(*, backend, workspace, user, expiry=None):
     """Build an auth token and base URL for talking to release hatch"""
     # build the base URL for which we want the auth token to authenticate,
@@ -38,19 +87,76 @@ def build_hatch_token_and_url(*, backend, workspace, user, expiry=None):
 
 
 def build_outputs_zip(release_files):
-    # create an in memory stream so we don't need to write the file to disk
-    in_memory_zf = io.BytesIO()
+    """
+    Build a zip of the given ReleaseFiles as a stream of bytes
+
+    The archive is generated as it's consumed, a chunk of a file at a time, so
+    it can be passed straight to a StreamingHttpResponse without holding the
+    whole thing in memory.  Files in formats which are already compressed are
+    stored as-is, and zip64 extensions are used when the archive needs them.
+    """
+    # look the files up now, rather than part way through streaming them
+    release_files = [rfile for rfile in release_files if not rfile.is_deleted]
 
-    # add each ReleaseFile to the zip using their name as the name in the
-    # archive
-    with zipfile.ZipFile(in_memory_zf, "w") as zip_obj:
-        for rfile in release_files:
-            zip_obj.write(rfile.absolute_path(), arcname=rfile.name)
+    def stream():
+        buffer = ZipBuffer()
 
-    # rewind the file stream to the start
-    in_memory_zf.seek(0)
+        # add each ReleaseFile to the zip using their name as the name in the
+        # archive
+        with zipfile.ZipFile(buffer, "w", allowZip64=True) as zip_obj:
+            for rfile in release_files:
+                path = rfile.absolute_path()
+
+                zinfo = zipfile.ZipInfo.from_file(path, arcname=rfile.name)
+                suffix = PurePosixPath(rfile.name).suffix.lower()
+                if suffix in ALREADY_COMPRESSED_SUFFIXES:
+                    zinfo.compress_type = zipfile.ZIP_STORED
+                else:
+                    zinfo.compress_type = zipfile.ZIP_DEFLATED
+
+                with path.open("rb") as src, zip_obj.open(zinfo, "w") as dst:
+                    for chunk in iter(lambda: src.read(UPLOAD_CHUNK_SIZE), b""):
+                        dst.write(chunk)
+                        yield buffer.pop()
+
+                yield buffer.pop()
+
+        # closing the archive writes its central directory
+        yield buffer.pop()
+
+    return stream()
+
+
+class ZipBuffer:
+    """
+    A write-only, unseekable file for ZipFile to write an archive into
+
+    ZipFile falls back to writing data descriptors after each file when it
+    can't seek, which lets us hand each piece of the archive on as soon as
+    it's written.
+    """
 
-    return in_memory_zf
+    def __init__(self):
+        self.chunks = []
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+
+def zip_response(stream, filename):
+    """Serve a zip, as built by build_outputs_zip, as a download"""
+    response = StreamingHttpResponse(stream, content_type="application/zip")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
 
 def build_spa_base_url(full_path, file_path):
@@ -69,24 +175,39 @@ def build_spa_base_url(full_path, file_path):
     return full_path.removesuffix(file_path)
 
 
-def check_not_already_uploaded(filename, filehash, backend):
-    """Check if this filename/filehash combination has been uploaded before."""
-    duplicate = ReleaseFile.objects.filter(
-        release__backend=backend,
-        name=filename,
-        filehash=filehash,
+def check_not_already_uploaded(files, backend):
+    """
+    Check if any of these filename/filehash combinations have been uploaded before.
+
+    files is a mapping of filename to filehash, all of which are checked with
+    one query so every duplicate can be reported at once.
+    """
+    candidates = ReleaseFile.objects.filter(
+        backend=backend,
+        name__in=files.keys(),
+        filehash__in=files.values(),
+    ).values_list("name", "filehash")
+
+    duplicates = sorted(
+        {name for name, filehash in candidates if files[name] == filehash}
     )
-    if duplicate.exists():
+    if not duplicates:
+        return
+
+    if len(duplicates) == 1:
         raise ReleaseFileAlreadyExists(
-            f"This version of '{filename}' has already been uploaded from backend '{backend.slug}'"
+            f"This version of '{duplicates[0]}' has already been uploaded from backend '{backend.slug}'"
         )
 
+    names = ", ".join(f"'{name}'" for name in duplicates)
+    raise ReleaseFileAlreadyExists(
+        f"These versions of {names} have already been uploaded from backend '{backend.slug}'"
+    )
+
 
 @transaction.atomic
 def create_release(workspace, backend, created_by, requested_files, **kwargs):
-
-    for filename, filehash in requested_files.items():
-        check_not_already_uploaded(filename, filehash, backend)
+    check_not_already_uploaded(requested_files, backend)
 
     release = Release.objects.create(
         workspace=workspace,
@@ -98,45 +219,436 @@ def create_release(workspace, backend, created_by, requested_files, **kwargs):
     return release
 
 
-@transaction.atomic
 def handle_file_upload(release, backend, user, upload, filename):
     """Validate and save an uploaded file to disk and database.
 
     Does basic detection of re-uploads of the same file, to avoid duplication.
     """
-    # This reads the whole file into memory, but should not be a problem.
-    # TODO: enforce a max upload size?
-    data = upload.read()
-    calculated_hash = hashlib.sha256(data).hexdigest()
-    check_not_already_uploaded(filename, calculated_hash, backend)
-
-    # We group the directory structure by workspace for 2 reasons:
-    # 1. avoid dumping everything in one big directory.
-    # 2. much easier for human operators to navigate on disk if needed.
-    relative_path = (
-        Path(release.workspace.name) / "releases" / str(release.id) / filename
+    directory = absolute_file_path(BLOB_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    # stream the upload into the blob store so we never hold more than a chunk
+    # of it in memory, and it can be moved into place atomically
+    tmp_path, calculated_hash = write_upload_to_tmp(upload, directory)
+
+    return save_release_file(
+        release, backend, user, filename, tmp_path, calculated_hash
     )
+
+
+def build_blob_path(filehash):
+    """
+    Build the RELEASE_STORAGE relative path for the given content
+
+    Files are stored once per unique content, under their SHA-256 hash.  The
+    first two characters of the hash are used as a directory to avoid dumping
+    everything into one big directory.
+    """
+    return Path(BLOB_DIR) / filehash[:2] / filehash
+
+
+def lock_blob(filehash):
+    """
+    Lock the blob for the given content until the current transaction ends
+
+    Creating and deleting ReleaseFiles which share a blob both take this lock
+    so a deletion always sees, and keeps the blob for, any ReleaseFile which
+    was created while it waited.  Row locks can't do this since a new
+    ReleaseFile has no row to lock until it's been created.
+    """
+    # Postgres advisory locks take a signed bigint so use the first 64 bits
+    # of the hash
+    key = int.from_bytes(bytes.fromhex(filehash[:16]), "big", signed=True)
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [key])
+
+
+def hash_file(path):
+    """Build the SHA-256 hash of a file without reading it all into memory"""
+    sha = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            sha.update(chunk)
+
+    return sha.hexdigest()
+
+
+@transaction.atomic
+def save_release_file(release, backend, user, filename, tmp_path, filehash):
+    """
+    Store a fully written file and record it as a ReleaseFile
+
+    If the blob store already holds this content then tmp_path is discarded
+    and the ReleaseFile shares the existing copy.  Otherwise tmp_path, which
+    must be on the same filesystem as RELEASE_STORAGE, is moved into place.
+    """
+    relative_path = build_blob_path(filehash)
     absolute_path = absolute_file_path(relative_path)
-    absolute_path.parent.mkdir(parents=True, exist_ok=True)
-    absolute_path.write_bytes(data)
+
+    try:
+        check_not_already_uploaded({filename: filehash}, backend)
+
+        # wait for any deletion of a ReleaseFile sharing this content to
+        # finish so we know whether it removed the blob
+        lock_blob(filehash)
+
+        size = tmp_path.stat().st_size
+
+        absolute_path.parent.mkdir(parents=True, exist_ok=True)
+        created = not absolute_path.exists()
+        if created:
+            os.replace(tmp_path, absolute_path)
+        else:
+            # mark the blob as in use so garbage collection leaves it alone
+            # while this ReleaseFile is being created
+            os.utime(absolute_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
 
     try:
         rfile = ReleaseFile.objects.create(
             release=release,
+            backend=release.backend,
             workspace=release.workspace,
             created_by=user,
             name=filename,
             path=str(relative_path),
-            filehash=calculated_hash,
+            filehash=filehash,
+            size=size,
         )
     except Exception:
         # something went wrong, clean up file, they will need to reupload
-        absolute_path.unlink(missing_ok=True)
+        if created:
+            absolute_path.unlink(missing_ok=True)
         raise
 
+    previews.build_preview(rfile)
+
+    transaction.on_commit(lambda: clear_index_cache(rfile))
+
     return rfile
 
 
+def delete_release_file(rfile, user):
+    """
+    Mark a ReleaseFile as deleted and remove its contents if now unused
+
+    Content is shared between every ReleaseFile with the same hash so it's
+    only removed from disk when no other ReleaseFile is using it.
+    """
+    with transaction.atomic():
+        # stop concurrent uploads of this content until we've committed, then
+        # look for sharers so we also see any upload which committed while we
+        # waited for the lock
+        lock_blob(rfile.filehash)
+
+        rfile.deleted_by = user
+        rfile.deleted_at = timezone.now()
+        rfile.save()
+
+        sharing = ReleaseFile.objects.filter(path=rfile.path, deleted_at=None)
+        if not sharing.exclude(pk=rfile.pk).exists():
+            rfile.absolute_path().unlink(missing_ok=True)
+            previews.delete_previews(rfile.filehash)
+
+        transaction.on_commit(lambda: clear_index_cache(rfile))
+
+
+def get_index_cache_key(obj):
+    """
+    Build the cache key for the file index of a Release, Snapshot or Workspace
+    """
+    return f"{obj._meta.model_name}:{obj.pk}:release-index"
+
+
+def clear_index_cache(rfile):
+    """
+    Drop every cached file index which could include the given ReleaseFile
+    """
+    objs = [rfile.release, rfile.workspace, *rfile.snapshots.all()]
+    cache.delete_many([get_index_cache_key(obj) for obj in objs])
+
+
+def remove_unreferenced_blobs(grace_period=BLOB_GRACE_PERIOD):
+    """
+    Remove blobs, and previews, which no undeleted ReleaseFile refers to
+
+    Temporary files left behind by interrupted uploads are removed too.  Files
+    modified within the grace period are left alone, since they may belong to
+    an upload which hasn't created its ReleaseFile yet.  Returns the
+    RELEASE_STORAGE relative paths of the removed files.
+    """
+    blobs = absolute_file_path(BLOB_DIR)
+    preview_files = absolute_file_path(previews.PREVIEW_DIR)
+
+    in_use = list(
+        ReleaseFile.objects.filter(deleted_at=None).values_list("path", "filehash")
+    )
+    referenced_paths = {path for path, _ in in_use}
+    referenced_hashes = {filehash for _, filehash in in_use}
+
+    def is_referenced(path):
+        if path.is_relative_to(blobs):
+            relative_path = str(path.relative_to(settings.RELEASE_STORAGE))
+            return relative_path in referenced_paths
+
+        # previews are named <hash>.<kind>
+        return path.name.partition(".")[0] in referenced_hashes
+
+    cutoff = time.time() - grace_period.total_seconds()
+
+    removed = []
+    paths = itertools.chain(
+        blobs.glob(".upload-*"), blobs.glob("*/*"), preview_files.glob("*/*")
+    )
+    for path in sorted(paths):
+        relative_path = str(path.relative_to(settings.RELEASE_STORAGE))
+        if is_referenced(path) or path.stat().st_mtime > cutoff:
+            continue
+
+        path.unlink()
+        removed.append(relative_path)
+
+    return removed
+
+
+@transaction.atomic
+def start_file_upload(release, backend, user, filename, size):
+    """
+    Start a resumable upload of one of a Release's requested files
+
+    The file is allocated at its full size up front so chunks can be written
+    into it in any order.
+    """
+    max_size = settings.RELEASE_MAX_FILE_SIZE
+    if size > max_size:
+        raise ReleaseFileTooLarge(
+            f"File is larger than the maximum of {max_size} bytes"
+        )
+
+    check_not_already_uploaded({filename: release.requested_files[filename]}, backend)
+
+    upload = ReleaseFileUpload.objects.create(
+        release=release,
+        created_by=user,
+        name=filename,
+        size=size,
+    )
+
+    path = upload.absolute_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as f:
+        f.truncate(size)
+
+    return upload
+
+
+def write_upload_chunk(upload, start, end, chunk_hash, stream):
+    """
+    Write the [start, end) byte range of a resumable upload
+
+    The chunk is streamed to a temporary file and checked against its length
+    and hash before being copied into place, so a bad chunk never overwrites
+    bytes we've already received.
+    """
+    check_upload_is_open(upload)
+
+    if not 0 <= start < end <= upload.size:
+        raise ReleaseUploadError(
+            f"Byte range {start}-{end} is outside of the file's {upload.size} bytes"
+        )
+
+    path = upload.absolute_path()
+
+    tmp_path, calculated_hash = write_upload_to_tmp(stream, path.parent)
+    try:
+        size = tmp_path.stat().st_size
+        if size != end - start:
+            raise ReleaseUploadError(
+                f"Received {size} bytes for a {end - start} byte range"
+            )
+
+        if calculated_hash != chunk_hash:
+            raise ReleaseUploadError("Chunk does not match its SHA-256 hash")
+
+        try:
+            dst = path.open("r+b")
+        except FileNotFoundError:
+            raise ReleaseUploadError(
+                f"Upload {upload.id} has expired, please start a new upload"
+            )
+
+        with tmp_path.open("rb") as src, dst:
+            dst.seek(start)
+            shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
+            dst.flush()
+            os.fsync(dst.fileno())
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    # chunks can arrive in parallel so lock the upload while we record this
+    # range, merging it with any it overlaps or touches
+    with transaction.atomic():
+        upload = ReleaseFileUpload.objects.select_for_update().get(pk=upload.pk)
+
+        ranges = []
+        for range_start, range_end in sorted([*upload.received, [start, end]]):
+            if ranges and range_start <= ranges[-1][1]:
+                ranges[-1][1] = max(ranges[-1][1], range_end)
+            else:
+                ranges.append([range_start, range_end])
+
+        upload.received = ranges
+        upload.save(update_fields=["received"])
+
+    return upload
+
+
+def check_upload_is_open(upload):
+    """Check a resumable upload can still be added to or completed"""
+    if upload.completed_at:
+        raise ReleaseUploadError(f"Upload {upload.id} has already been completed")
+
+    if upload.failed_at:
+        raise ReleaseUploadError(
+            f"Upload {upload.id} failed, please start a new upload: {upload.error}"
+        )
+
+
+def complete_file_upload(upload, backend):
+    """
+    Turn a fully received resumable upload into a ReleaseFile
+
+    The file must match the hash it was requested with when the Release was
+    created.  Hashing a large file takes a while so the upload is claimed,
+    rather than kept locked, while we do so.  If the file can't be turned into
+    a ReleaseFile the upload is marked as failed and its file removed.
+    """
+    with transaction.atomic():
+        upload = ReleaseFileUpload.objects.select_for_update().get(pk=upload.pk)
+
+        check_upload_is_open(upload)
+
+        claim_cutoff = timezone.now() - UPLOAD_COMPLETE_TIMEOUT
+        if upload.completing_at and upload.completing_at > claim_cutoff:
+            raise ReleaseUploadError(f"Upload {upload.id} is already being completed")
+
+        if upload.offset < upload.size:
+            raise ReleaseUploadError(
+                f"Upload is incomplete, received {upload.offset} of {upload.size} bytes"
+            )
+
+        upload.completing_at = timezone.now()
+        upload.save(update_fields=["completing_at"])
+
+    path = upload.absolute_path()
+    try:
+        try:
+            filehash = hash_file(path)
+        except FileNotFoundError:
+            raise ReleaseUploadError(
+                f"Upload {upload.id} has expired, please start a new upload"
+            )
+
+        if filehash != upload.release.requested_files[upload.name]:
+            raise ReleaseUploadError(
+                f"File {upload.name} does not match the hash requested in release {upload.release.id}"
+            )
+
+        with transaction.atomic():
+            rfile = save_release_file(
+                upload.release, backend, upload.created_by, upload.name, path, filehash
+            )
+
+            upload.completed_at = timezone.now()
+            upload.release_file = rfile
+            upload.save(update_fields=["completed_at", "release_file"])
+    except Exception as exc:
+        path.unlink(missing_ok=True)
+
+        upload.failed_at = timezone.now()
+        upload.error = str(exc)
+        upload.save(update_fields=["failed_at", "error"])
+
+        raise
+
+    return rfile
+
+
+def remove_stale_uploads(expiry=UPLOAD_EXPIRY, grace_period=BLOB_GRACE_PERIOD):
+    """
+    Remove resumable uploads which weren't completed in time
+
+    Their ReleaseFileUploads are deleted along with their files, as are any
+    files in the uploads directory no ReleaseFileUpload refers to, such as
+    chunks left behind by interrupted requests.  Files modified within the
+    grace period are left alone.  Returns the RELEASE_STORAGE relative paths
+    of the removed files.
+    """
+    directory = absolute_file_path(UPLOAD_DIR)
+
+    ReleaseFileUpload.objects.filter(
+        completed_at=None, created_at__lt=timezone.now() - expiry
+    ).delete()
+
+    # completed uploads have already had their file moved into the blob store
+    # so only uploads still in progress keep theirs
+    in_progress = set(
+        ReleaseFileUpload.objects.filter(completed_at=None, failed_at=None).values_list(
+            "id", flat=True
+        )
+    )
+
+    cutoff = time.time() - grace_period.total_seconds()
+
+    removed = []
+    for path in sorted(directory.glob("*")):
+        if path.name in in_progress or path.stat().st_mtime > cutoff:
+            continue
+
+        path.unlink()
+        removed.append(str(path.relative_to(settings.RELEASE_STORAGE)))
+
+    return removed
+
+
+def write_upload_to_tmp(upload, directory):
+    """
+    Stream a file-like upload to a temporary file in the given directory
+
+    The SHA-256 hash is built up as each chunk is written, and the file is
+    synced to disk before returning its path and hash.  Uploads larger than
+    RELEASE_MAX_FILE_SIZE are rejected once we've read past that size.
+    """
+    max_size = settings.RELEASE_MAX_FILE_SIZE
+
+    sha = hashlib.sha256()
+    size = 0
+
+    f = tempfile.NamedTemporaryFile(dir=directory, prefix=".upload-", delete=False)
+    tmp_path = Path(f.name)
+    try:
+        with f:
+            for chunk in iter(lambda: upload.read(UPLOAD_CHUNK_SIZE), b""):
+                size += len(chunk)
+                if size > max_size:
+                    raise ReleaseFileTooLarge(
+                        f"File is larger than the maximum of {max_size} bytes"
+                    )
+
+                sha.update(chunk)
+                f.write(chunk)
+
+            f.flush()
+            os.fsync(f.fileno())
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return tmp_path, sha.hexdigest()
+
+
 def workspace_files(workspace):
     """
     Gets the latest version of each file for each backend in this Workspace.
@@ -145,14 +657,18 @@ def workspace_files(workspace):
     backend) to its RequestFile model.
     """
 
+    # DISTINCT ON gives us only the newest version of each file, walking the
+    # jobserver_rf_latest_file_idx index, so this scales with the number of
+    # files rather than the number of versions of them
     files = (
-        workspace.files.select_related("release", "release__backend")
-        .order_by("name", "-release__created_at")
-        .distinct("name", "release__created_at")
+        workspace.files.select_related("backend", "created_by", "release")
+        .order_by("backend_id", "name", "-created_at")
+        .distinct("backend_id", "name")
     )
-    index = {}
-    for rfile in files:
-        workspace_path = f"{rfile.release.backend.slug}/{rfile.name}"
-        if workspace_path not in index:
-            index[workspace_path] = rfile
-    return index
+
+    # list files by name, with the newest version first when several backends
+    # have released the same file
+    files = sorted(files, key=lambda f: f.created_at, reverse=True)
+    files = sorted(files, key=lambda f: f.name)
+
+    return {f"{rfile.backend.slug}/{rfile.name}": rfile for rfile in files}
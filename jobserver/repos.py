@@ -0,0 +1,156 @@
+from datetime import timedelta
+
+import structlog
+from django.db import transaction
+from django.db.models import Max, Prefetch
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .github import get_repos_with_branches
+from .models import Branch, Org, Repo
+
+
+logger = structlog.get_logger(__name__)
+
+# the sync_repos job runs every 15 minutes, if an Organisation's mirror is
+# older than this the job has fallen behind so views sync it themselves
+MAX_SYNC_AGE = timedelta(minutes=20)
+
+
+def get_github_orgs():
+    """Get every GitHub Organisation one of our Orgs has access to"""
+    github_orgs = Org.objects.values_list("github_orgs", flat=True)
+    return sorted({name for names in github_orgs for name in names})
+
+
+def is_stale(org):
+    """Has a GitHub Organisation never been synced, or not been for a while?"""
+    synced_at = Repo.objects.filter(org=org).aggregate(Max("synced_at"))
+    synced_at = synced_at["synced_at__max"]
+
+    return synced_at is None or synced_at < timezone.now() - MAX_SYNC_AGE
+
+
+def sync_stale_repos():
+    """Sync every GitHub Organisation we use whose mirror is stale"""
+    for org in get_github_orgs():
+        if is_stale(org):
+            sync_repos(org)
+
+
+def get_repos_with_branches_from_mirror(org, refresh=False):
+    """
+    Get the mirrored Repos of a GitHub Organisation, with their branches
+
+    This returns the same shape as github.get_repos_with_branches, ordered
+    by name, so views can use our mirror in its place.  If the Organisation's
+    mirror is stale, or refresh is True, it's synced first.
+    """
+    if refresh or is_stale(org):
+        sync_repos(org)
+
+    repos = (
+        Repo.objects.filter(org=org)
+        .prefetch_related(
+            Prefetch("branches", queryset=Branch.objects.order_by("name"))
+        )
+        .order_by(Lower("name"))
+    )
+
+    return [
+        {
+            "name": repo.name,
+            "url": repo.url,
+            "branches": [b.name for b in repo.branches.all()],
+        }
+        for repo in repos
+    ]
+
+
+def sync_repos(org):
+    """
+    Bring our mirror of a GitHub Organisation's researcher repos up to date
+
+    We fetch everything in one paginated query but only write what has
+    changed since the last sync: new repos and branches are created, changed
+    repos are updated, and anything GitHub no longer has is removed.
+
+    Views can sync an Organisation while the sync_repos job does too, so new
+    rows are inserted ignoring conflicts on their unique keys and every other
+    write is safe to repeat.
+    """
+    # talk to GitHub before opening a transaction so it's not held open for
+    # the length of the query
+    data = list(get_repos_with_branches(org))
+    now = timezone.now()
+
+    counts = {"created": 0, "updated": 0, "deleted": 0}
+
+    with transaction.atomic():
+        existing = {
+            repo.url: repo
+            for repo in Repo.objects.filter(org=org).prefetch_related("branches")
+        }
+
+        def get_fields(item):
+            return {
+                "name": item["name"],
+                "is_private": item["is_private"],
+                "created_at": item["created_at"],
+            }
+
+        if new := [item for item in data if item["url"] not in existing]:
+            Repo.objects.bulk_create(
+                [Repo(org=org, url=item["url"], **get_fields(item)) for item in new],
+                ignore_conflicts=True,
+            )
+            counts["created"] = len(new)
+
+            # reload them since ignoring conflicts means we don't get their
+            # PKs back, and a concurrent sync may have created them instead
+            created = Repo.objects.filter(url__in=[item["url"] for item in new])
+            created = {repo.url: repo for repo in created}
+        else:
+            created = {}
+
+        for item in data:
+            repo = existing.pop(item["url"], None)
+            fields = get_fields(item)
+
+            if repo is None:
+                repo = created[item["url"]]
+                current = set()
+            else:
+                changed = [k for k, v in fields.items() if getattr(repo, k) != v]
+                if changed:
+                    for k in changed:
+                        setattr(repo, k, fields[k])
+                    repo.save(update_fields=changed)
+                    counts["updated"] += 1
+
+                current = {b.name for b in repo.branches.all()}
+
+            wanted = set(item["branches"])
+            if stale := current - wanted:
+                repo.branches.filter(name__in=stale).delete()
+            if new_branches := wanted - current:
+                Branch.objects.bulk_create(
+                    [Branch(repo=repo, name=name) for name in sorted(new_branches)],
+                    ignore_conflicts=True,
+                )
+
+        # anything left has been deleted or removed from the team
+        if existing:
+            Repo.objects.filter(pk__in=[r.pk for r in existing.values()]).delete()
+            counts["deleted"] = len(existing)
+
+        Repo.objects.filter(org=org).update(synced_at=now)
+
+    logger.info("Synced repos", org=org, **counts)
+    return counts
+
+
+def sync_all_repos():
+    """Sync the repos of every GitHub Organisation we use"""
+    for org in get_github_orgs():
+        sync_repos(org)
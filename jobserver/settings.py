@@ -105,6 +105,27 @@ DATABASES = {
     "default": env.dj_db_url("DATABASE_URL", default="postgres://localhost/jobserver")
 }
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# By default each process has its own bounded in-memory cache, so values
+# dropped when their data changes are only dropped in the process which made
+# the change and anything cached that way must also have a short TTL.  Point
+# CACHE_URL at a memcached or redis server, with explicit max_entries and
+# timeout parameters, to share one cache between processes.
+CACHES = {
+    "default": env.dj_cache_url(
+        "CACHE_URL", default="locmem://jobserver?max_entries=10000&timeout=300"
+    ),
+    # job-runner authenticates every API call so Backends are cached in each
+    # process, where a hit costs nothing, whatever the default cache is
+    "backend-tokens": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "backend-tokens",
+        "TIMEOUT": 60,
+        "OPTIONS": {"MAX_ENTRIES": 100},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
@@ -289,3 +310,6 @@ initialise_sentry()
 # Note: we deliberately don't use MEDIA_ROOT/MEDIA_URL here, to avoid any
 # surprises with django's default uploads implementation.
 RELEASE_STORAGE = Path(env.str("RELEASE_STORAGE", default="releases"))
+
+# Largest release file, in bytes, we accept an upload of
+RELEASE_MAX_FILE_SIZE = env.int("RELEASE_MAX_FILE_SIZE", default=4 * 1024 ** 3)
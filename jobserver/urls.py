@@ -16,7 +16,11 @@ from jobserver.api.jobs import (
 from jobserver.api.releases import (
     ReleaseAPI,
     ReleaseFileAPI,
+    ReleaseFilePreviewAPI,
     ReleaseNotificationAPICreate,
+    ReleaseUploadAPI,
+    ReleaseUploadCompleteAPI,
+    ReleaseUploadCreateAPI,
     ReleaseWorkspaceAPI,
     SnapshotAPI,
     SnapshotCreateAPI,
@@ -111,11 +115,31 @@ api_urls = [
         ReleaseAPI.as_view(),
         name="release",
     ),
+    path(
+        "releases/release/<str:release_id>/uploads",
+        ReleaseUploadCreateAPI.as_view(),
+        name="release-upload-create",
+    ),
+    path(
+        "releases/upload/<str:upload_id>",
+        ReleaseUploadAPI.as_view(),
+        name="release-upload",
+    ),
+    path(
+        "releases/upload/<str:upload_id>/complete",
+        ReleaseUploadCompleteAPI.as_view(),
+        name="release-upload-complete",
+    ),
     path(
         "releases/file/<file_id>",
         ReleaseFileAPI.as_view(),
         name="release-file",
     ),
+    path(
+        "releases/file/<file_id>/preview",
+        ReleaseFilePreviewAPI.as_view(),
+        name="release-file-preview",
+    ),
 ]
 
 files_urls = [
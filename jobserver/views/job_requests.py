@@ -18,11 +18,10 @@ from ..utils import raise_if_not_int
 
 def filter_by_status(job_requests, status):
     """
-    Filter JobRequests by status property
+    Filter JobRequests by status
 
-    JobRequest.status is built by "bubbling up" the status of each related Job.
-    However, the construction of that property isn't easily converted to a
-    QuerySet, hence this function.
+    JobRequest.status is built by "bubbling up" the status of each related Job
+    when job-runner updates them, so we can filter on it in the database.
     """
     if status not in ["failed", "running", "pending", "succeeded"]:
         # status is taken from a GET query arg so we need to treat it as user
@@ -30,7 +29,7 @@ def filter_by_status(job_requests, status):
         # value.
         return job_requests
 
-    return [r for r in job_requests.all() if r.status.lower() == status]
+    return job_requests.filter(status=status)
 
 
 class JobRequestCancel(View):
@@ -51,7 +50,10 @@ class JobRequestCancel(View):
 
         actions = list(set(job_request.jobs.values_list("action", flat=True)))
         job_request.cancelled_actions = actions
-        job_request.save()
+
+        # only write what we've changed so we don't overwrite the fields
+        # JobAPIUpdate maintains with values we loaded before it ran
+        job_request.save(update_fields=["cancelled_actions", "updated_at"])
 
         return redirect(job_request)
 
@@ -87,7 +89,7 @@ class JobRequestCreate(CreateView):
         if not request.user.backends.exists():
             raise Http404
 
-        action_status_lut = self.workspace.get_action_status_lut()
+        action_status_lut = self.workspace.get_action_status_lut(cached=True)
 
         # build actions as list or render the exception to the page
         gh_org = self.request.user.orgs.first().github_orgs[0]
@@ -198,11 +200,7 @@ class JobRequestList(FormMixin, ListView):
 
         workspaces = Workspace.objects.filter(is_archived=False).order_by("name")
 
-        # filter object list based on status arg
-        filtered_object_list = filter_by_status(
-            self.object_list, self.request.GET.get("status")
-        )
-        context = super().get_context_data(object_list=filtered_object_list, **kwargs)
+        context = super().get_context_data(**kwargs)
 
         context["backends"] = Backend.objects.order_by("slug")
         context["is_core_dev"] = has_role(self.request.user, CoreDeveloper)
@@ -240,7 +238,7 @@ class JobRequestList(FormMixin, ListView):
             raise_if_not_int(workspace)
             qs = qs.filter(workspace_id=workspace)
 
-        return qs
+        return filter_by_status(qs, self.request.GET.get("status"))
 
     def form_valid(self, form):
         identifier = form.cleaned_data["identifier"]
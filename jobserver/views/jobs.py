@@ -22,7 +22,10 @@ class JobCancel(View):
             return redirect(job)
 
         job.job_request.cancelled_actions.append(job.action)
-        job.job_request.save()
+
+        # only write what we've changed so we don't overwrite the fields
+        # JobAPIUpdate maintains with values we loaded before it ran
+        job.job_request.save(update_fields=["cancelled_actions", "updated_at"])
         return redirect(job)
 
 
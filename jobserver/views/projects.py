@@ -1,8 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core import signing
-from django.db import transaction
+from django.core.cache import cache
+from django.db import connection, transaction
 from django.db.models import OuterRef, Subquery
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect
@@ -19,6 +22,16 @@ from ..github import get_repo_is_private
 from ..models import Org, Project, ProjectInvitation, ProjectMembership, Snapshot, User
 
 
+# how many repos to look up on GitHub at once, and how long, in seconds, to
+# remember whether a repo is private
+REPO_LOOKUP_WORKERS = 8
+REPO_PRIVACY_CACHE_TTL = 60 * 60
+
+
+def get_repo_privacy_cache_key(url):
+    return f"repo-is-private:{url}"
+
+
 @method_decorator(login_required, name="dispatch")
 class ProjectAcceptInvite(View):
     def get(self, request, *args, **kwargs):
@@ -131,7 +144,7 @@ class ProjectDetail(DetailView):
             "can_create_workspaces": can_create_workspaces,
             "can_manage_members": can_manage_members,
             "outputs": self.get_outputs(workspaces),
-            "repos": list(self.get_repos(repos)),
+            "repos": self.get_repos(repos),
             "workspaces": workspaces,
         }
 
@@ -162,19 +175,44 @@ class ProjectDetail(DetailView):
         return Snapshot.objects.filter(pk__in=snapshot_pks).order_by("-published_at")
 
     def get_repos(self, repo_urls):
-        for url in repo_urls:
-            f = furl(url)
+        """
+        Build the details of each repo, including whether it's private
 
-            try:
-                is_private = get_repo_is_private(*f.path.segments)
-            except requests.HTTPError:
-                is_private = None
+        Privacy is remembered per repo so repeat visits don't wait on GitHub,
+        and any repos we don't know about yet are looked up concurrently.
+        """
+        keys = {url: get_repo_privacy_cache_key(url) for url in repo_urls}
+        cached = cache.get_many(keys.values())
 
-            yield {
-                "name": f.path.segments[1],
+        def lookup(url):
+            try:
+                return get_repo_is_private(*furl(url).path.segments)
+            except requests.RequestException:
+                return None
+            finally:
+                # the GitHub client's cache can open a connection in this
+                # thread, close it rather than leaving it open
+                connection.close()
+
+        missing = [url for url in repo_urls if keys[url] not in cached]
+        if missing:
+            workers = min(len(missing), REPO_LOOKUP_WORKERS)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = dict(zip(missing, executor.map(lookup, missing)))
+
+            # only remember answers, not failures, so they're retried next time
+            found = {keys[url]: v for url, v in results.items() if v is not None}
+            cache.set_many(found, REPO_PRIVACY_CACHE_TTL)
+            cached |= found
+
+        return [
+            {
+                "name": furl(url).path.segments[1],
                 "url": url,
-                "is_private": is_private,
+                "is_private": cached.get(keys[url]),
             }
+            for url in repo_urls
+        ]
 
 
 class ProjectInvitationCreate(CreateView):
@@ -1,16 +1,20 @@
 from django.contrib.humanize.templatetags.humanize import naturaltime
-from django.db import transaction
-from django.http import FileResponse, Http404
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect
 from django.template.response import TemplateResponse
 from django.urls import reverse
-from django.utils import timezone
 from django.utils.safestring import mark_safe
 from django.views.generic import View
 
 from ..authorization import has_permission
 from ..models import Project, Release, ReleaseFile, Snapshot, Workspace
-from ..releases import build_outputs_zip, build_spa_base_url, workspace_files
+from ..releases import (
+    build_outputs_zip,
+    build_spa_base_url,
+    delete_release_file,
+    workspace_files,
+    zip_response,
+)
 
 
 class ProjectReleaseList(View):
@@ -130,11 +134,8 @@ class ReleaseDownload(View):
         ):
             raise Http404
 
-        zf = build_outputs_zip(release.files.all())
-        return FileResponse(
-            zf,
-            as_attachment=True,
-            filename=f"release-{release.pk}.zip",
+        return zip_response(
+            build_outputs_zip(release.files.all()), f"release-{release.pk}.zip"
         )
 
 
@@ -149,7 +150,7 @@ class ReleaseFileDelete(View):
             pk=self.kwargs["release_file_id"],
         )
 
-        if not rfile.absolute_path().exists():
+        if rfile.is_deleted:
             raise Http404
 
         if not has_permission(
@@ -159,13 +160,7 @@ class ReleaseFileDelete(View):
         ):
             raise Http404
 
-        with transaction.atomic():
-            # delete file on disk
-            rfile.absolute_path().unlink()
-
-            rfile.deleted_by = request.user
-            rfile.deleted_at = timezone.now()
-            rfile.save()
+        delete_release_file(rfile, request.user)
 
         return redirect(rfile.release.workspace.get_releases_url())
 
@@ -227,11 +222,8 @@ class SnapshotDownload(View):
         if snapshot.is_draft and not can_view_unpublished_files:
             raise Http404
 
-        zf = build_outputs_zip(snapshot.files.all())
-        return FileResponse(
-            zf,
-            as_attachment=True,
-            filename=f"release-{snapshot.pk}.zip",
+        return zip_response(
+            build_outputs_zip(snapshot.files.all()), f"release-{snapshot.pk}.zip"
         )
 
 
@@ -1,7 +1,7 @@
 import requests
 from django.contrib import messages
 from django.db.models import Q
-from django.http import FileResponse, Http404, HttpResponse
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.template.response import TemplateResponse
 from django.views.generic import CreateView, ListView, View
@@ -14,14 +14,16 @@ from ..forms import (
     WorkspaceCreateForm,
     WorkspaceNotificationsToggleForm,
 )
-from ..github import get_repo_is_private, get_repos_with_branches
+from ..github import get_repo_is_private
 from ..models import Backend, JobRequest, Project, Workspace
 from ..releases import (
     build_hatch_token_and_url,
     build_outputs_zip,
     build_spa_base_url,
     workspace_files,
+    zip_response,
 )
+from ..repos import get_repos_with_branches_from_mirror
 
 
 class WorkspaceArchiveToggle(View):
@@ -122,9 +124,15 @@ class WorkspaceCreate(CreateView):
 
         gh_org = self.request.user.orgs.first().github_orgs[0]
 
+        # let users pull in a branch they've just pushed without waiting for
+        # the next sync
+        refresh = "refresh" in request.GET
+
         try:
-            self.repos_with_branches = list(get_repos_with_branches(gh_org))
-        except requests.HTTPError:
+            self.repos_with_branches = get_repos_with_branches_from_mirror(
+                gh_org, refresh=refresh
+            )
+        except requests.RequestException:
             # gracefully handle not being able to access GitHub's API
             msg = (
                 "An error occurred while retrieving the list of repositories from GitHub, "
@@ -137,10 +145,6 @@ class WorkspaceCreate(CreateView):
                 context={"project": self.project},
             )
 
-        self.repos_with_branches = sorted(
-            self.repos_with_branches, key=lambda r: r["name"].lower()
-        )
-
         return super().dispatch(request, *args, **kwargs)
 
     def form_valid(self, form):
@@ -215,7 +219,7 @@ class WorkspaceDetail(View):
             repo_is_private = get_repo_is_private(
                 workspace.repo_owner, workspace.repo_name
             )
-        except requests.HTTPError:
+        except requests.RequestException:
             repo_is_private = None
 
         context = {
@@ -339,11 +343,8 @@ class WorkspaceLatestOutputsDownload(View):
         # get the latest files as an iterable of ReleaseFile instances
         latest_files = workspace_files(workspace).values()
 
-        zf = build_outputs_zip(latest_files)
-        return FileResponse(
-            zf,
-            as_attachment=True,
-            filename=f"workspace-{workspace.name}.zip",
+        return zip_response(
+            build_outputs_zip(latest_files), f"workspace-{workspace.name}.zip"
         )
 
 
@@ -1,5 +1,7 @@
 from datetime import datetime
 
+import requests
+from django.contrib import messages
 from django.db.models import Min
 from django.template.response import TemplateResponse
 from django.utils.decorators import method_decorator
@@ -9,16 +11,26 @@ from pytz import utc
 
 from jobserver.authorization import CoreDeveloper
 from jobserver.authorization.decorators import require_role
-from jobserver.github import get_repos_with_dates
-from jobserver.models import Workspace
+from jobserver.models import Repo, Workspace
+from jobserver.repos import sync_stale_repos
 
 
 @method_decorator(require_role(CoreDeveloper), name="dispatch")
 class RepoList(View):
     def get(self, request, *args, **kwargs):
-        all_repos = list(get_repos_with_dates())
-
-        private_repos = [repo for repo in all_repos if repo["is_private"]]
+        try:
+            sync_stale_repos()
+        except requests.RequestException:
+            # show what we have in the mirror if we can't reach GitHub's API
+            messages.error(
+                request,
+                "An error occurred while syncing repositories from GitHub, "
+                "this list may be out of date.",
+            )
+
+        private_repos = Repo.objects.filter(is_private=True).values(
+            "name", "url", "is_private", "created_at"
+        )
 
         # get workspaces with the first run job started_at annotated on
         workspaces = Workspace.objects.select_related("project").annotate(
@@ -51,7 +63,7 @@ class RepoList(View):
 
         def merge_data(repo):
             """
-            Merge our workspace and first run data with the data from GitHub
+            Merge our workspace and first run data with our mirror of GitHub
 
             Repos aren't unique to a workspace.  At the time of writing ~2/3 of
             repo URLs were duplicates, but we only care about the first time
@@ -67,7 +79,7 @@ class RepoList(View):
                 # extract the workspace object from our wrapper dictionary
                 workspace = workspace["workspace"]
 
-            # merge GitHub and our Workspace
+            # merge the Repo and our Workspace
             return repo | {"workspace": workspace}
 
         repos = list(merge_data(r) for r in private_repos)
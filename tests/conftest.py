@@ -1,6 +1,7 @@
 import pytest
 import structlog
 from django.conf import settings
+from django.core.cache import caches
 from structlog.testing import LogCapture
 
 from applications.form_specs import form_specs
@@ -55,6 +56,12 @@ def fixture_configure_structlog(log_output):
     structlog.configure(processors=[log_output])
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    for cache in caches.all():
+        cache.clear()
+
+
 @pytest.fixture(autouse=True)
 def set_release_storage(monkeypatch, tmp_path):
     monkeypatch.setattr(settings, "RELEASE_STORAGE", tmp_path / "releases")
@@ -13,13 +13,16 @@ from jobserver import releases
 from jobserver.models import (
     Backend,
     BackendMembership,
+    Branch,
     Job,
     JobRequest,
     Org,
     OrgMembership,
+    OutboxMessage,
     Project,
     ProjectInvitation,
     ProjectMembership,
+    Repo,
     Snapshot,
     Stats,
     User,
@@ -45,6 +48,15 @@ class BackendMembershipFactory(factory.django.DjangoModelFactory):
     created_by = factory.SubFactory("tests.factories.UserFactory")
 
 
+class BranchFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Branch
+
+    repo = factory.SubFactory("tests.factories.RepoFactory")
+
+    name = factory.Sequence(lambda n: f"branch-{n}")
+
+
 class JobFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Job
@@ -55,6 +67,16 @@ class JobFactory(factory.django.DjangoModelFactory):
 
     updated_at = factory.fuzzy.FuzzyDateTime(datetime(2020, 1, 1, tzinfo=timezone.utc))
 
+    @factory.post_generation
+    def update_job_request(obj, create, extracted, **kwargs):
+        # mirror JobAPIUpdate keeping the JobRequest's denormalised fields in
+        # step with its Jobs
+        if not create:
+            return
+
+        if obj.job_request.update_from_jobs():
+            obj.job_request.save()
+
 
 class JobRequestFactory(factory.django.DjangoModelFactory):
     class Meta:
@@ -83,6 +105,16 @@ class OrgMembershipFactory(factory.django.DjangoModelFactory):
     user = factory.SubFactory("tests.factories.UserFactory")
 
 
+class OutboxMessageFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = OutboxMessage
+
+    job = factory.SubFactory("tests.factories.JobFactory")
+
+    kind = OutboxMessage.Kinds.FINISHED_NOTIFICATION
+    key = factory.Sequence(lambda n: f"key-{n}")
+
+
 class ProjectFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Project
@@ -209,6 +241,17 @@ def ReleaseFileFactory(
     )
 
 
+class RepoFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Repo
+
+    org = "opensafely"
+    name = factory.Sequence(lambda n: f"repo-{n}")
+    url = factory.LazyAttribute(lambda o: f"https://github.com/{o.org}/{o.name}")
+    is_private = True
+    created_at = factory.Faker("date_time", tzinfo=utc)
+
+
 class StatsFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Stats
@@ -1,17 +1,20 @@
 import pytest
+from django.core.cache import cache
 from django.utils import timezone
 from rest_framework.exceptions import NotAuthenticated
 
 from jobserver.api.jobs import (
+    STATS_WRITE_INTERVAL,
     JobAPIUpdate,
     JobRequestAPIList,
     UserAPIDetail,
     WorkspaceStatusesAPI,
+    changed_since,
     get_backend_from_token,
     update_stats,
 )
 from jobserver.authorization import CoreDeveloper, OrgCoordinator, ProjectDeveloper
-from jobserver.models import Job, JobRequest, Stats
+from jobserver.models import Backend, Job, JobRequest, OutboxMessage, Stats, Workspace
 from tests.factories import (
     BackendFactory,
     JobFactory,
@@ -45,11 +48,83 @@ def test_token_backend_success(monkeypatch):
     assert get_backend_from_token(backend.auth_token) == backend
 
 
+def test_token_backend_is_cached(monkeypatch, django_assert_num_queries):
+    backend = BackendFactory(slug="tpp")
+
+    monkeypatch.setenv("BACKENDS", backend.slug)
+
+    assert get_backend_from_token(backend.auth_token) == backend
+
+    with django_assert_num_queries(0):
+        assert get_backend_from_token(backend.auth_token) == backend
+
+
+def test_token_backend_with_rotated_token():
+    backend = BackendFactory()
+    old_token = backend.auth_token
+
+    assert get_backend_from_token(old_token) == backend
+
+    backend.rotate_token()
+
+    with pytest.raises(NotAuthenticated):
+        get_backend_from_token(old_token)
+
+    assert get_backend_from_token(backend.auth_token) == backend
+
+
+def test_token_backend_with_token_rotated_elsewhere():
+    backend = BackendFactory()
+    old_token = backend.auth_token
+
+    assert get_backend_from_token(old_token) == backend
+
+    # rotate the token on a separately loaded instance, as the Staff Area would
+    Backend.objects.get(pk=backend.pk).rotate_token()
+
+    with pytest.raises(NotAuthenticated):
+        get_backend_from_token(old_token)
+
+
 def test_token_backend_unknown_backend():
     with pytest.raises(NotAuthenticated):
         get_backend_from_token("test")
 
 
+def test_changedsince_with_newer_update():
+    now = timezone.now()
+
+    assert changed_since({"updated_at": now.isoformat()}, minutes_ago(now, 1))
+
+
+def test_changedsince_with_update_at_cursor():
+    now = timezone.now()
+
+    assert changed_since({"updated_at": now.isoformat()}, now)
+
+
+def test_changedsince_with_older_update():
+    now = timezone.now()
+
+    assert not changed_since({"updated_at": minutes_ago(now, 1).isoformat()}, now)
+
+
+@pytest.mark.parametrize(
+    "job_data",
+    [
+        {},
+        {"updated_at": None},
+        {"updated_at": "not a date"},
+        {"updated_at": "2021-13-45T00:00:00Z"},
+        {"updated_at": "2021-11-01T00:00:00"},
+    ],
+    ids=["missing", "null", "unparseable", "invalid", "naive"],
+)
+def test_changedsince_with_unusable_update(job_data):
+    # anything we can't compare is left for the serializer to deal with
+    assert changed_since(job_data, timezone.now())
+
+
 def test_update_stats_existing_url():
     backend = BackendFactory()
     StatsFactory(backend=backend, url="test")
@@ -61,6 +136,23 @@ def test_update_stats_existing_url():
     assert backend.stats.first().url == "test"
 
 
+def test_update_stats_skips_recent_writes(freezer):
+    backend = BackendFactory()
+
+    update_stats(backend, url="test")
+    first_seen = backend.stats.get().api_last_seen
+
+    # within the write interval nothing changes
+    freezer.tick(STATS_WRITE_INTERVAL - 1)
+    update_stats(backend, url="test")
+    assert backend.stats.get().api_last_seen == first_seen
+
+    # once the interval has passed we write again
+    freezer.tick(1)
+    update_stats(backend, url="test")
+    assert backend.stats.get().api_last_seen == timezone.now()
+
+
 def test_update_stats_new_url():
     backend = BackendFactory()
     StatsFactory(backend=backend, url="test")
@@ -334,17 +426,102 @@ def test_jobapiupdate_mixture(api_rf, freezer):
     assert job3.completed_at is None
 
 
-def test_jobapiupdate_notifications_on_with_move_to_completed(api_rf, mocker):
+def test_jobapiupdate_clears_action_status_cache(api_rf):
+    job_request = JobRequestFactory()
+    workspace = job_request.workspace
+    JobFactory(
+        job_request=job_request, identifier="job1", action="test", status="pending"
+    )
+
+    assert workspace.get_action_status_lut(cached=True) == {"test": "pending"}
+
+    now = timezone.now()
+    data = [
+        {
+            "identifier": "job1",
+            "job_request_id": job_request.identifier,
+            "action": "test",
+            "status": "running",
+            "status_code": "",
+            "status_message": "",
+            "created_at": minutes_ago(now, 2),
+            "started_at": minutes_ago(now, 1),
+            "updated_at": now,
+            "completed_at": None,
+        }
+    ]
+    request = api_rf.post(
+        "/",
+        HTTP_AUTHORIZATION=job_request.backend.auth_token,
+        data=data,
+        format="json",
+    )
+    assert JobAPIUpdate.as_view()(request).status_code == 200
+
+    assert workspace.get_action_status_lut(cached=True) == {"test": "running"}
+
+
+def test_jobapiupdate_constant_number_of_queries(api_rf, django_assert_num_queries):
+    backend = BackendFactory()
+    job_request = JobRequestFactory()
+
+    now = timezone.now()
+
+    def build_payload(count):
+        return [
+            {
+                "identifier": f"job{i}",
+                "job_request_id": job_request.identifier,
+                "action": "test",
+                "status": "running",
+                "status_code": "",
+                "status_message": "",
+                "created_at": minutes_ago(now, 2),
+                "started_at": minutes_ago(now, 1),
+                "updated_at": now,
+                "completed_at": None,
+            }
+            for i in range(count)
+        ]
+
+    # create 20 Jobs
+    request = api_rf.post(
+        "/",
+        HTTP_AUTHORIZATION=backend.auth_token,
+        data=build_payload(20),
+        format="json",
+    )
+    assert JobAPIUpdate.as_view()(request).status_code == 200
+
+    # update the 20 existing Jobs and create 20 more.  The number of queries
+    # executed should not depend on how many Jobs are in the payload: auth
+    # (which includes the sync cursor), job requests, jobs, savepoint, bulk
+    # create, bulk update, job requests update, queue version bump, and
+    # release savepoint.  Stats were written by the first request, and the
+    # sync cursor hasn't moved so doesn't need writing.
+    data = build_payload(40)
+    for job in data:
+        job["status"] = "succeeded"
+        job["completed_at"] = now
+
+    request = api_rf.post(
+        "/", HTTP_AUTHORIZATION=backend.auth_token, data=data, format="json"
+    )
+    with django_assert_num_queries(9):
+        response = JobAPIUpdate.as_view()(request)
+
+    assert response.status_code == 200, response.data
+    assert Job.objects.count() == 40
+    assert Job.objects.filter(status="succeeded").count() == 40
+
+
+def test_jobapiupdate_notifications_on_with_move_to_completed(api_rf):
     workspace = WorkspaceFactory()
     job_request = JobRequestFactory(workspace=workspace, will_notify=True)
     job = JobFactory(job_request=job_request, status="running")
 
     now = timezone.now()
 
-    mocked_send = mocker.patch(
-        "jobserver.api.jobs.send_finished_notification", autospec=True
-    )
-
     data = [
         {
             "identifier": job.identifier,
@@ -368,21 +545,21 @@ def test_jobapiupdate_notifications_on_with_move_to_completed(api_rf, mocker):
 
     response = JobAPIUpdate.as_view()(request)
 
-    mocked_send.assert_called_once()
     assert response.status_code == 200
 
+    message = OutboxMessage.objects.get()
+    assert message.job == job
+    assert message.kind == OutboxMessage.Kinds.FINISHED_NOTIFICATION
+    assert message.sent_at is None
+
 
-def test_jobapiupdate_notifications_on_without_move_to_completed(api_rf, mocker):
+def test_jobapiupdate_notifications_on_without_move_to_completed(api_rf):
     workspace = WorkspaceFactory()
     job_request = JobRequestFactory(workspace=workspace, will_notify=True)
     job = JobFactory(job_request=job_request, status="succeeded")
 
     now = timezone.now()
 
-    mocked_send = mocker.patch(
-        "jobserver.api.jobs.send_finished_notification", autospec=True
-    )
-
     data = [
         {
             "identifier": job.identifier,
@@ -406,8 +583,8 @@ def test_jobapiupdate_notifications_on_without_move_to_completed(api_rf, mocker)
 
     response = JobAPIUpdate.as_view()(request)
 
-    mocked_send.assert_not_called()
     assert response.status_code == 200
+    assert not OutboxMessage.objects.exists()
 
 
 def test_jobapiupdate_post_only(api_rf):
@@ -430,14 +607,12 @@ def test_jobapiupdate_post_only(api_rf):
     assert JobAPIUpdate.as_view()(request).status_code == 405
 
 
-def test_jobapiupdate_post_with_internal_error(api_rf, mocker):
+def test_jobapiupdate_post_with_internal_error(api_rf):
     backend = BackendFactory()
     job_request = JobRequestFactory()
 
     now = timezone.now()
 
-    mocked_sentry_sdk = mocker.patch("jobserver.api.jobs.sentry_sdk", autospec=True)
-
     data = [
         {
             "identifier": "job",
@@ -465,7 +640,219 @@ def test_jobapiupdate_post_with_internal_error(api_rf, mocker):
 
     assert response.status_code == 200, response.data
 
-    mocked_sentry_sdk.capture_message.assert_called_once()
+    # job-runner sending the same error again shouldn't queue another report
+    request_3 = api_rf.post(
+        "/", HTTP_AUTHORIZATION=backend.auth_token, data=data, format="json"
+    )
+    response = JobAPIUpdate.as_view()(request_3)
+
+    assert response.status_code == 200, response.data
+
+    message = OutboxMessage.objects.get()
+    assert message.job.identifier == "job"
+    assert message.kind == OutboxMessage.Kinds.INTERNAL_ERROR
+
+
+def test_jobapiupdate_sets_sync_cursor(api_rf):
+    backend = BackendFactory()
+    job_request = JobRequestFactory()
+
+    now = timezone.now()
+
+    data = [
+        {
+            "identifier": f"job{i}",
+            "job_request_id": job_request.identifier,
+            "action": "test-action",
+            "status": "running",
+            "status_code": "",
+            "status_message": "",
+            "created_at": minutes_ago(now, 5),
+            "started_at": minutes_ago(now, 5),
+            "updated_at": updated_at,
+            "completed_at": None,
+        }
+        for i, updated_at in enumerate([minutes_ago(now, 2), now, None])
+    ]
+
+    request = api_rf.post(
+        "/", HTTP_AUTHORIZATION=backend.auth_token, data=data, format="json"
+    )
+    response = JobAPIUpdate.as_view()(request)
+
+    assert response.status_code == 200, response.data
+    assert response.data["sync_cursor"] == now
+
+    backend.refresh_from_db()
+    assert backend.jobs_sync_cursor == now
+
+
+def test_jobapiupdate_with_sync_cursor(api_rf):
+    now = timezone.now()
+
+    backend = BackendFactory(jobs_sync_cursor=minutes_ago(now, 1))
+    job_request = JobRequestFactory()
+
+    # not in the payload, but shouldn't be deleted since a delta payload only
+    # contains changed Jobs
+    JobFactory(job_request=job_request, identifier="job1", status="running")
+
+    # updated before the cursor so this should be skipped
+    JobFactory(job_request=job_request, identifier="job2", status="running")
+
+    def job(identifier, status, updated_at):
+        return {
+            "identifier": identifier,
+            "job_request_id": job_request.identifier,
+            "action": "test-action",
+            "status": status,
+            "status_code": "",
+            "status_message": "",
+            "created_at": minutes_ago(now, 5),
+            "started_at": minutes_ago(now, 5),
+            "updated_at": updated_at,
+            "completed_at": None,
+        }
+
+    data = [
+        job("job2", "failed", minutes_ago(now, 2)),
+        job("job3", "running", now),
+    ]
+
+    request = api_rf.post(
+        "/",
+        HTTP_AUTHORIZATION=backend.auth_token,
+        HTTP_SYNC_CURSOR=backend.jobs_sync_cursor.isoformat(),
+        data=data,
+        format="json",
+    )
+    response = JobAPIUpdate.as_view()(request)
+
+    assert response.status_code == 200, response.data
+    assert response.data["sync_cursor"] == now
+
+    assert set(Job.objects.values_list("identifier", "status")) == {
+        ("job1", "running"),
+        ("job2", "running"),
+        ("job3", "running"),
+    }
+
+    backend.refresh_from_db()
+    assert backend.jobs_sync_cursor == now
+
+
+def test_jobapiupdate_with_updates_sharing_the_cursor(api_rf):
+    now = timezone.now()
+
+    backend = BackendFactory(jobs_sync_cursor=minutes_ago(now, 1))
+    job_request = JobRequestFactory()
+
+    def sync(identifier, status):
+        data = [
+            {
+                "identifier": identifier,
+                "job_request_id": job_request.identifier,
+                "action": "test-action",
+                "status": status,
+                "status_code": "",
+                "status_message": "",
+                "created_at": minutes_ago(now, 5),
+                "started_at": minutes_ago(now, 5),
+                "updated_at": now,
+                "completed_at": None,
+            }
+        ]
+        backend.refresh_from_db()
+        request = api_rf.post(
+            "/",
+            HTTP_AUTHORIZATION=backend.auth_token,
+            HTTP_SYNC_CURSOR=backend.jobs_sync_cursor.isoformat(),
+            data=data,
+            format="json",
+        )
+        response = JobAPIUpdate.as_view()(request)
+        assert response.status_code == 200, response.data
+        return response
+
+    assert sync("job1", "running").data["sync_cursor"] == now
+
+    # job2 was updated in the same instant as job1, but after the first sync
+    # read job-runner's database, so it's only sent with the next sync
+    assert sync("job2", "running").data["sync_cursor"] == now
+
+    assert set(Job.objects.values_list("identifier", flat=True)) == {"job1", "job2"}
+
+
+def test_jobapiupdate_with_cached_backend(api_rf):
+    now = timezone.now()
+    backend = BackendFactory(jobs_sync_cursor=minutes_ago(now, 2))
+
+    # cache the Backend, with its cursor at the time
+    get_backend_from_token(backend.auth_token)
+
+    # a sync served by another process moves the cursor on
+    Backend.objects.filter(pk=backend.pk).update(jobs_sync_cursor=minutes_ago(now, 1))
+
+    request = api_rf.post(
+        "/",
+        HTTP_AUTHORIZATION=backend.auth_token,
+        HTTP_SYNC_CURSOR=minutes_ago(now, 1).isoformat(),
+        data=[],
+        format="json",
+    )
+
+    response = JobAPIUpdate.as_view()(request)
+
+    assert response.status_code == 200, response.data
+    assert response.data["sync_cursor"] == minutes_ago(now, 1)
+
+
+def test_jobapiupdate_with_unknown_sync_cursor(api_rf):
+    now = timezone.now()
+
+    backend = BackendFactory(jobs_sync_cursor=now)
+
+    request = api_rf.post(
+        "/",
+        HTTP_AUTHORIZATION=backend.auth_token,
+        HTTP_SYNC_CURSOR=minutes_ago(now, 1).isoformat(),
+        data=[],
+        format="json",
+    )
+    response = JobAPIUpdate.as_view()(request)
+
+    assert response.status_code == 409, response.data
+    assert response.data["sync_cursor"] == now
+
+
+def test_jobapiupdate_with_invalid_sync_cursor(api_rf):
+    backend = BackendFactory(jobs_sync_cursor=timezone.now())
+
+    request = api_rf.post(
+        "/",
+        HTTP_AUTHORIZATION=backend.auth_token,
+        HTTP_SYNC_CURSOR="2021-13-45T00:00:00Z",
+        data=[{"updated_at": "not a date"}],
+        format="json",
+    )
+    response = JobAPIUpdate.as_view()(request)
+
+    assert response.status_code == 409, response.data
+
+
+def test_jobapiupdate_with_sync_cursor_and_invalid_payload(api_rf):
+    backend = BackendFactory(jobs_sync_cursor=timezone.now())
+
+    request = api_rf.post(
+        "/",
+        HTTP_AUTHORIZATION=backend.auth_token,
+        HTTP_SYNC_CURSOR=backend.jobs_sync_cursor.isoformat(),
+        data={"action": "test-action"},
+        format="json",
+    )
+    response = JobAPIUpdate.as_view()(request)
+
+    assert response.status_code == 400, response.data
 
 
 def test_jobapiupdate_unknown_job_request(api_rf):
@@ -498,6 +885,179 @@ def test_jobapiupdate_unknown_job_request(api_rf):
     assert "Unknown JobRequest IDs" in response.data[0]
 
 
+def test_jobapiupdate_unknown_job_request_with_known_job_request(api_rf):
+    backend = BackendFactory()
+    job_request = JobRequestFactory()
+
+    now = timezone.now()
+
+    data = [
+        {
+            "identifier": f"job-{job_request_id}",
+            "job_request_id": job_request_id,
+            "action": "test-action",
+            "status": "running",
+            "status_code": "",
+            "status_message": "",
+            "created_at": minutes_ago(now, 2),
+            "started_at": minutes_ago(now, 1),
+            "updated_at": now,
+            "completed_at": None,
+        }
+        for job_request_id in [job_request.identifier, "test"]
+    ]
+
+    request = api_rf.post(
+        "/", HTTP_AUTHORIZATION=backend.auth_token, data=data, format="json"
+    )
+    response = JobAPIUpdate.as_view()(request)
+
+    assert response.status_code == 400, response.data
+    assert response.data[0] == "Unknown JobRequest IDs: test"
+    assert not Job.objects.exists()
+
+
+def test_jobapiupdate_bumps_job_requests_version(api_rf):
+    job_request = JobRequestFactory()
+    backend = job_request.backend
+    backend.refresh_from_db()
+    version = backend.job_requests_version
+
+    now = timezone.now()
+
+    data = [
+        {
+            "identifier": "job1",
+            "job_request_id": job_request.identifier,
+            "action": "test-action",
+            "status": "succeeded",
+            "status_code": "",
+            "status_message": "",
+            "created_at": minutes_ago(now, 2),
+            "started_at": minutes_ago(now, 1),
+            "updated_at": now,
+            "completed_at": now,
+        }
+    ]
+
+    request = api_rf.post(
+        "/", HTTP_AUTHORIZATION=backend.auth_token, data=data, format="json"
+    )
+    response = JobAPIUpdate.as_view()(request)
+    assert response.status_code == 200, response.data
+
+    backend.refresh_from_db()
+    assert backend.job_requests_version == version + 1
+
+    # an update which doesn't change the JobRequest's state doesn't change the
+    # queue
+    data[0]["status_message"] = "done"
+    request = api_rf.post(
+        "/", HTTP_AUTHORIZATION=backend.auth_token, data=data, format="json"
+    )
+    response = JobAPIUpdate.as_view()(request)
+    assert response.status_code == 200, response.data
+
+    backend.refresh_from_db()
+    assert backend.job_requests_version == version + 1
+
+
+def test_jobapiupdate_maintains_job_request_is_active(api_rf):
+    job_request = JobRequestFactory()
+    backend = job_request.backend
+
+    now = timezone.now()
+
+    def build_job(identifier, completed_at):
+        return {
+            "identifier": identifier,
+            "job_request_id": job_request.identifier,
+            "action": "test-action",
+            "status": "succeeded" if completed_at else "running",
+            "status_code": "",
+            "status_message": "",
+            "created_at": minutes_ago(now, 2),
+            "started_at": minutes_ago(now, 1),
+            "updated_at": now,
+            "completed_at": completed_at,
+        }
+
+    def post(data):
+        request = api_rf.post(
+            "/", HTTP_AUTHORIZATION=backend.auth_token, data=data, format="json"
+        )
+        response = JobAPIUpdate.as_view()(request)
+        assert response.status_code == 200, response.data
+
+        job_request.refresh_from_db()
+
+    # one Job still running
+    post([build_job("job1", now), build_job("job2", None)])
+    assert job_request.is_active
+
+    # all Jobs completed
+    post([build_job("job1", now), build_job("job2", now)])
+    assert not job_request.is_active
+
+    # a new Job has been added to the JobRequest
+    post([build_job("job1", now), build_job("job2", now), build_job("job3", None)])
+    assert job_request.is_active
+
+    # the incomplete Job was removed
+    post([build_job("job1", now), build_job("job2", now)])
+    assert not job_request.is_active
+
+
+def test_jobapiupdate_maintains_job_request_status(api_rf):
+    job_request = JobRequestFactory()
+    backend = job_request.backend
+
+    now = timezone.now()
+
+    def build_job(identifier, status, completed_at):
+        return {
+            "identifier": identifier,
+            "job_request_id": job_request.identifier,
+            "action": "test-action",
+            "status": status,
+            "status_code": "",
+            "status_message": "",
+            "created_at": minutes_ago(now, 3),
+            "started_at": minutes_ago(now, 2),
+            "updated_at": now,
+            "completed_at": completed_at,
+        }
+
+    def post(data):
+        request = api_rf.post(
+            "/", HTTP_AUTHORIZATION=backend.auth_token, data=data, format="json"
+        )
+        response = JobAPIUpdate.as_view()(request)
+        assert response.status_code == 200, response.data
+
+        job_request.refresh_from_db()
+
+    post(
+        [
+            build_job("job1", "succeeded", minutes_ago(now, 1)),
+            build_job("job2", "running", None),
+        ]
+    )
+    assert job_request.completed_at is None
+    assert job_request.num_completed == 1
+    assert job_request.status == "running"
+
+    post(
+        [
+            build_job("job1", "succeeded", minutes_ago(now, 1)),
+            build_job("job2", "failed", now),
+        ]
+    )
+    assert job_request.completed_at == now
+    assert job_request.num_completed == 1
+    assert job_request.status == "failed"
+
+
 def test_jobrequestapilist_filter_by_backend(api_rf):
     backend = BackendFactory()
     JobRequestFactory(backend=backend)
@@ -543,6 +1103,151 @@ def test_jobrequestapilist_filter_by_databricks(api_rf):
     assert response.data["results"][0]["identifier"] == job_request.identifier
 
 
+def test_jobrequestapilist_with_matching_etag(api_rf, django_assert_num_queries):
+    backend = BackendFactory()
+    JobRequestFactory(backend=backend)
+
+    request = api_rf.get("/", HTTP_AUTHORIZATION=backend.auth_token)
+    response = JobRequestAPIList.as_view()(request)
+
+    assert response.status_code == 200
+    etag = response["ETag"]
+
+    request = api_rf.get(
+        "/", HTTP_AUTHORIZATION=backend.auth_token, HTTP_IF_NONE_MATCH=etag
+    )
+    # only the Backend's version is looked up, auth is cached and stats were
+    # written by the first request
+    with django_assert_num_queries(1):
+        response = JobRequestAPIList.as_view()(request)
+
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+
+def test_jobrequestapilist_with_stale_etag(api_rf):
+    backend = BackendFactory()
+    JobRequestFactory(backend=backend)
+
+    request = api_rf.get("/", HTTP_AUTHORIZATION=backend.auth_token)
+    etag = JobRequestAPIList.as_view()(request)["ETag"]
+
+    # a new JobRequest changes the Backend's queue
+    JobRequestFactory(backend=backend)
+
+    request = api_rf.get(
+        "/", HTTP_AUTHORIZATION=backend.auth_token, HTTP_IF_NONE_MATCH=etag
+    )
+    response = JobRequestAPIList.as_view()(request)
+
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert response.data["count"] == 2
+
+
+def test_jobrequestapilist_without_backend_has_no_etag(api_rf):
+    JobRequestFactory()
+
+    request = api_rf.get("/")
+    response = JobRequestAPIList.as_view()(request)
+
+    assert response.status_code == 200
+    assert "ETag" not in response
+
+
+def test_jobrequestapilist_with_unknown_backend_has_no_etag(api_rf):
+    request = api_rf.get("/?backend=unknown")
+    response = JobRequestAPIList.as_view()(request)
+
+    assert response.status_code == 200
+    assert "ETag" not in response
+
+
+def test_jobrequestapilist_with_since(api_rf, freezer):
+    backend = BackendFactory()
+    JobRequestFactory(backend=backend)
+
+    freezer.tick(60)
+    since = timezone.now()
+    freezer.tick(60)
+
+    job_request = JobRequestFactory(backend=backend)
+
+    request = api_rf.get("/", {"since": since.isoformat()})
+    response = JobRequestAPIList.as_view()(request)
+
+    assert response.status_code == 200
+    assert response.data["count"] == 1
+    assert response.data["results"][0]["identifier"] == job_request.identifier
+
+
+def test_jobrequestapilist_with_since_sharing_a_timestamp(api_rf, freezer):
+    backend = BackendFactory()
+    JobRequestFactory(backend=backend)
+
+    freezer.tick(60)
+
+    # created in the same instant as job-runner's last look, but after it
+    since = timezone.now()
+    job_request = JobRequestFactory(backend=backend)
+
+    request = api_rf.get("/", {"since": since.isoformat()})
+    response = JobRequestAPIList.as_view()(request)
+
+    assert response.status_code == 200
+    assert response.data["count"] == 1
+    assert response.data["results"][0]["identifier"] == job_request.identifier
+
+
+def test_jobrequestapilist_with_since_after_status_change(api_rf, freezer):
+    job_request = JobRequestFactory()
+    JobFactory(job_request=job_request, identifier="job1", status="pending")
+
+    freezer.tick(60)
+    since = timezone.now()
+    freezer.tick(60)
+
+    # job-runner reports a status change via JobAPIUpdate
+    now = timezone.now()
+    data = [
+        {
+            "identifier": "job1",
+            "job_request_id": job_request.identifier,
+            "action": "test",
+            "status": "running",
+            "status_code": "",
+            "status_message": "",
+            "created_at": minutes_ago(now, 2),
+            "started_at": minutes_ago(now, 1),
+            "updated_at": now,
+            "completed_at": None,
+        }
+    ]
+    request = api_rf.post(
+        "/",
+        HTTP_AUTHORIZATION=job_request.backend.auth_token,
+        data=data,
+        format="json",
+    )
+    assert JobAPIUpdate.as_view()(request).status_code == 200
+
+    request = api_rf.get("/", {"since": since.isoformat()})
+    response = JobRequestAPIList.as_view()(request)
+
+    assert response.status_code == 200
+    assert response.data["count"] == 1
+    assert response.data["results"][0]["identifier"] == job_request.identifier
+
+
+@pytest.mark.parametrize("since", ["yesterday", "2021-13-45T00:00:00"])
+def test_jobrequestapilist_with_invalid_since(api_rf, since):
+    request = api_rf.get("/", {"since": since})
+    response = JobRequestAPIList.as_view()(request)
+
+    assert response.status_code == 400
+    assert "since" in response.data
+
+
 def test_jobrequestapilist_get_only(api_rf):
     request = api_rf.post("/", data={}, format="json")
     response = JobRequestAPIList.as_view()(request)
@@ -566,7 +1271,7 @@ def test_jobrequestapilist_success(api_rf):
     workspace = WorkspaceFactory()
 
     # all completed
-    job_request1 = JobRequestFactory(workspace=workspace)
+    job_request1 = JobRequestFactory(workspace=workspace, is_active=False)
     JobFactory.create_batch(2, job_request=job_request1, completed_at=timezone.now())
 
     # some completed
@@ -669,6 +1374,76 @@ def test_workspacestatusesapi_success(api_rf):
     assert response.data["run_all"] == "failed"
 
 
+def test_workspacestatusesapi_updated_by_jobapiupdate(api_rf):
+    workspace = WorkspaceFactory()
+    job_request = JobRequestFactory(workspace=workspace)
+    JobFactory(
+        job_request=job_request,
+        identifier="job1",
+        action="run_all",
+        status="running",
+    )
+
+    request = api_rf.get("/")
+    response = WorkspaceStatusesAPI.as_view()(request, name=workspace.name)
+    assert response.data["run_all"] == "running"
+
+    now = timezone.now()
+    data = [
+        {
+            "identifier": "job1",
+            "job_request_id": job_request.identifier,
+            "action": "run_all",
+            "status": "succeeded",
+            "status_code": "",
+            "status_message": "",
+            "created_at": minutes_ago(now, 2),
+            "started_at": minutes_ago(now, 1),
+            "updated_at": now,
+            "completed_at": now,
+        }
+    ]
+    request = api_rf.post(
+        "/",
+        HTTP_AUTHORIZATION=job_request.backend.auth_token,
+        data=data,
+        format="json",
+    )
+    assert JobAPIUpdate.as_view()(request).status_code == 200
+
+    request = api_rf.get("/")
+    response = WorkspaceStatusesAPI.as_view()(request, name=workspace.name)
+    assert response.data["run_all"] == "succeeded"
+
+
+def test_workspacestatusesapi_with_backend(api_rf):
+    workspace = WorkspaceFactory()
+    job_request = JobRequestFactory(workspace=workspace)
+    JobFactory(job_request=job_request, action="run_all", status="failed")
+
+    request = api_rf.get(f"/?backend={job_request.backend.slug}")
+    response = WorkspaceStatusesAPI.as_view()(request, name=workspace.name)
+
+    assert response.status_code == 200
+    assert response.data == {"run_all": "failed"}
+
+
+def test_workspacestatusesapi_with_unknown_backend(api_rf):
+    workspace = WorkspaceFactory()
+    job_request = JobRequestFactory(workspace=workspace)
+    JobFactory(job_request=job_request, action="run_all", status="failed")
+
+    request = api_rf.get("/?backend=unknown")
+    response = WorkspaceStatusesAPI.as_view()(request, name=workspace.name)
+
+    assert response.status_code == 200
+    assert response.data == {}
+
+    # unknown backends don't take up space in the cache
+    key = Workspace.get_action_status_cache_key(workspace.pk, "unknown")
+    assert cache.get(key) is None
+
+
 def test_workspacestatusesapi_unknown_workspace(api_rf):
     request = api_rf.get("/")
     response = WorkspaceStatusesAPI.as_view()(request, name="test")
@@ -1,14 +1,24 @@
+import csv
+import hashlib
 import json
 
 import pytest
+from django.core.files.uploadedfile import UploadedFile
+from django.db import DatabaseError
 from django.utils import timezone
 from rest_framework.exceptions import NotAuthenticated
 from slack_sdk.errors import SlackApiError
 
+from jobserver import previews, releases
 from jobserver.api.releases import (
+    RELEASE_FILE_CACHE_CONTROL,
     ReleaseAPI,
     ReleaseFileAPI,
+    ReleaseFilePreviewAPI,
     ReleaseNotificationAPICreate,
+    ReleaseUploadAPI,
+    ReleaseUploadCompleteAPI,
+    ReleaseUploadCreateAPI,
     ReleaseWorkspaceAPI,
     SnapshotAPI,
     SnapshotCreateAPI,
@@ -22,7 +32,7 @@ from jobserver.authorization import (
     ProjectCollaborator,
     ProjectDeveloper,
 )
-from jobserver.models import Release
+from jobserver.models import Release, ReleaseFile
 from jobserver.utils import set_from_qs
 from tests.factories import (
     BackendFactory,
@@ -30,6 +40,7 @@ from tests.factories import (
     ProjectFactory,
     ProjectMembershipFactory,
     ReleaseFactory,
+    ReleaseFileFactory,
     ReleaseUploadsFactory,
     SnapshotFactory,
     UserFactory,
@@ -79,6 +90,7 @@ def test_releaseapi_get_with_permission(api_rf):
                 "name": "file.txt",
                 "id": rfile.pk,
                 "url": f"/api/v2/releases/file/{rfile.id}",
+                "preview_url": f"/api/v2/releases/file/{rfile.id}/preview",
                 "user": rfile.created_by.username,
                 "date": rfile.created_at.isoformat(),
                 "size": 8,
@@ -90,6 +102,36 @@ def test_releaseapi_get_with_permission(api_rf):
     }
 
 
+def test_releaseapi_get_with_cached_index(api_rf, django_capture_on_commit_callbacks):
+    uploads = ReleaseUploadsFactory({"file1.txt": b"test", "file2.txt": b"other"})
+    release = ReleaseFactory(uploads, uploaded=False)
+    ReleaseFileFactory(uploads[0], release=release, backend=release.backend)
+
+    ProjectMembershipFactory(
+        user=release.created_by,
+        project=release.workspace.project,
+        roles=[ProjectCollaborator],
+    )
+
+    def get_names():
+        request = api_rf.get("/")
+        request.user = release.created_by
+        response = ReleaseAPI.as_view()(request, release_id=release.id)
+        return sorted(f["name"] for f in response.data["files"])
+
+    assert get_names() == ["file1.txt"]
+
+    # changes made behind our back aren't seen while the index is cached
+    release.files.update(name="renamed.txt")
+    assert get_names() == ["file1.txt"]
+
+    # uploading a file drops the cached index once its transaction commits
+    with django_capture_on_commit_callbacks(execute=True):
+        ReleaseFileFactory(uploads[1], release=release, backend=release.backend)
+
+    assert get_names() == ["file2.txt", "renamed.txt"]
+
+
 def test_releaseapi_get_without_permission(api_rf):
     release = ReleaseFactory(ReleaseUploadsFactory(["file.txt"]))
 
@@ -218,6 +260,27 @@ def test_releaseapi_post_no_files(api_rf):
     assert "No data" in response.data["detail"]
 
 
+def test_releaseapi_post_no_filename(api_rf):
+    user = UserFactory(roles=[OutputChecker])
+    uploads = ReleaseUploadsFactory(["file.txt"])
+    release = ReleaseFactory(uploads, uploaded=False)
+
+    BackendMembershipFactory(backend=release.backend, user=user)
+
+    request = api_rf.post(
+        "/",
+        content_type="application/octet-stream",
+        data=uploads[0].contents,
+        HTTP_AUTHORIZATION=release.backend.auth_token,
+        HTTP_OS_USER=user.username,
+    )
+
+    response = ReleaseAPI.as_view()(request, release_id=release.id)
+
+    assert response.status_code == 400
+    assert response.data["detail"].startswith("Missing filename")
+
+
 def test_releaseapi_post_no_user(api_rf):
     uploads = ReleaseUploadsFactory(["file.txt"])
     release = ReleaseFactory(uploads, uploaded=False)
@@ -256,6 +319,113 @@ def test_releaseapi_post_success(api_rf):
     assert response.headers["File-Id"] == rfile.id
 
 
+@pytest.mark.parametrize("content_length", ["", "ten", "-1"])
+def test_releaseapi_post_with_invalid_content_length(api_rf, content_length):
+    user = UserFactory(roles=[OutputChecker])
+    uploads = ReleaseUploadsFactory(["file.txt"])
+    release = ReleaseFactory(uploads, uploaded=False)
+
+    BackendMembershipFactory(backend=release.backend, user=user)
+
+    request = api_rf.post(
+        "/",
+        content_type="application/octet-stream",
+        data=uploads[0].contents,
+        HTTP_CONTENT_DISPOSITION=f"attachment; filename={uploads[0].filename}",
+        HTTP_AUTHORIZATION=release.backend.auth_token,
+        HTTP_OS_USER=user.username,
+    )
+    request.META["CONTENT_LENGTH"] = content_length
+
+    response = ReleaseAPI.as_view()(request, release_id=release.id)
+
+    assert response.status_code == 400
+    assert response.data["detail"] == f"Invalid Content-Length: {content_length!r}"
+    assert not release.files.exists()
+
+
+def test_releaseapi_post_streams_body(api_rf, mocker):
+    user = UserFactory(roles=[OutputChecker])
+    uploads = ReleaseUploadsFactory({"dir/file.txt": b"test"})
+    release = ReleaseFactory(uploads, uploaded=False)
+
+    BackendMembershipFactory(backend=release.backend, user=user)
+
+    spy = mocker.spy(releases, "write_upload_to_tmp")
+
+    request = api_rf.post(
+        "/",
+        content_type="application/octet-stream",
+        data=uploads[0].contents,
+        HTTP_CONTENT_DISPOSITION="attachment; filename=dir/file.txt",
+        HTTP_AUTHORIZATION=release.backend.auth_token,
+        HTTP_OS_USER=user.username,
+    )
+
+    response = ReleaseAPI.as_view()(request, release_id=release.id)
+
+    assert response.status_code == 201, response.data
+    assert release.files.get().name == "dir/file.txt"
+
+    # the body was read straight from the request, not from a copy an upload
+    # handler had spooled to disk
+    upload = spy.call_args.args[0]
+    assert not isinstance(upload, UploadedFile)
+
+
+def test_releaseapi_post_too_large(api_rf, settings):
+    settings.RELEASE_MAX_FILE_SIZE = 4
+
+    user = UserFactory(roles=[OutputChecker])
+    uploads = ReleaseUploadsFactory(["file.txt"])
+    release = ReleaseFactory(uploads, uploaded=False)
+
+    BackendMembershipFactory(backend=release.backend, user=user)
+
+    request = api_rf.post(
+        "/",
+        content_type="application/octet-stream",
+        data=uploads[0].contents,
+        HTTP_CONTENT_DISPOSITION=f"attachment; filename={uploads[0].filename}",
+        HTTP_AUTHORIZATION=release.backend.auth_token,
+        HTTP_OS_USER=user.username,
+    )
+
+    response = ReleaseAPI.as_view()(request, release_id=release.id)
+
+    assert response.status_code == 413
+    assert response.data["detail"] == "File is larger than the maximum of 4 bytes"
+    assert not release.files.exists()
+
+
+def test_releaseapi_post_too_large_while_streaming(api_rf, mocker):
+    user = UserFactory(roles=[OutputChecker])
+    uploads = ReleaseUploadsFactory(["file.txt"])
+    release = ReleaseFactory(uploads, uploaded=False)
+
+    BackendMembershipFactory(backend=release.backend, user=user)
+
+    # the upload was bigger than its Content-Length claimed
+    mocker.patch(
+        "jobserver.api.releases.releases.handle_file_upload",
+        autospec=True,
+        side_effect=releases.ReleaseFileTooLarge,
+    )
+
+    request = api_rf.post(
+        "/",
+        content_type="application/octet-stream",
+        data=uploads[0].contents,
+        HTTP_CONTENT_DISPOSITION=f"attachment; filename={uploads[0].filename}",
+        HTTP_AUTHORIZATION=release.backend.auth_token,
+        HTTP_OS_USER=user.username,
+    )
+
+    response = ReleaseAPI.as_view()(request, release_id=release.id)
+
+    assert response.status_code == 413
+
+
 def test_releaseapi_post_unknown_release(api_rf):
     request = api_rf.post("/")
 
@@ -365,6 +535,263 @@ def test_releasenotificationapicreate_with_failed_slack_update(
     }
 
 
+def setup_upload(contents=b"test", start=True):
+    user = UserFactory(roles=[OutputChecker])
+    uploads = ReleaseUploadsFactory({"file.txt": contents})
+    release = ReleaseFactory(uploads, uploaded=False)
+
+    BackendMembershipFactory(backend=release.backend, user=user)
+
+    if not start:
+        return release, user
+
+    upload = releases.start_file_upload(
+        release, release.backend, user, "file.txt", len(contents)
+    )
+    return upload, user
+
+
+def put_chunk(api_rf, upload, user, chunk, start, **headers):
+    headers = {
+        "HTTP_CONTENT_RANGE": f"bytes {start}-{start + len(chunk) - 1}/{upload.size}",
+        "HTTP_CHUNK_SHA256": hashlib.sha256(chunk).hexdigest(),
+        **headers,
+    }
+    request = api_rf.put(
+        "/",
+        content_type="application/octet-stream",
+        data=chunk,
+        HTTP_AUTHORIZATION=upload.release.backend.auth_token,
+        HTTP_OS_USER=user.username,
+        **headers,
+    )
+
+    return ReleaseUploadAPI.as_view()(request, upload_id=upload.id)
+
+
+def test_releaseuploadapi_get_success(api_rf):
+    upload, user = setup_upload()
+    put_chunk(api_rf, upload, user, b"te", 0)
+
+    request = api_rf.get(
+        "/",
+        HTTP_AUTHORIZATION=upload.release.backend.auth_token,
+        HTTP_OS_USER=user.username,
+    )
+    response = ReleaseUploadAPI.as_view()(request, upload_id=upload.id)
+
+    assert response.status_code == 200
+    assert response.data == {"offset": 2, "size": 4}
+
+
+def test_releaseuploadapi_put_in_parts(api_rf):
+    upload, user = setup_upload(b"some test contents")
+
+    response = put_chunk(api_rf, upload, user, b"contents", 10)
+    assert response.status_code == 200, response.data
+    assert response.data == {"offset": 0, "size": 18}
+
+    response = put_chunk(api_rf, upload, user, b"some test ", 0)
+    assert response.status_code == 200, response.data
+    assert response.data == {"offset": 18, "size": 18}
+
+
+def test_releaseuploadapi_put_with_bad_content_length(api_rf):
+    upload, user = setup_upload()
+
+    response = put_chunk(
+        api_rf, upload, user, b"te", 0, HTTP_CONTENT_RANGE="bytes 0-3/4"
+    )
+
+    assert response.status_code == 400
+    assert response.data["detail"] == "Content-Length does not match the Content-Range"
+
+
+def test_releaseuploadapi_put_with_invalid_content_length(api_rf):
+    upload, user = setup_upload()
+
+    response = put_chunk(api_rf, upload, user, b"te", 0, CONTENT_LENGTH="")
+
+    assert response.status_code == 400
+    assert response.data["detail"] == "Invalid Content-Length: ''"
+
+
+def test_releaseuploadapi_put_with_bad_content_range(api_rf):
+    upload, user = setup_upload()
+
+    response = put_chunk(api_rf, upload, user, b"te", 0, HTTP_CONTENT_RANGE="0-1")
+
+    assert response.status_code == 400
+    assert response.data["detail"].startswith("Content-Range header must be")
+
+
+def test_releaseuploadapi_put_with_bad_hash(api_rf):
+    upload, user = setup_upload()
+
+    response = put_chunk(api_rf, upload, user, b"te", 0, HTTP_CHUNK_SHA256="wrong")
+
+    assert response.status_code == 400
+    assert response.data["detail"] == "Chunk does not match its SHA-256 hash"
+
+
+def test_releaseuploadapi_put_with_bad_total(api_rf):
+    upload, user = setup_upload()
+
+    response = put_chunk(
+        api_rf, upload, user, b"te", 0, HTTP_CONTENT_RANGE="bytes 0-1/5"
+    )
+
+    assert response.status_code == 400
+    assert response.data["detail"] == f"Upload {upload.id} is 4 bytes not 5"
+
+
+def test_releaseuploadapi_put_without_hash(api_rf):
+    upload, user = setup_upload()
+
+    response = put_chunk(api_rf, upload, user, b"te", 0, HTTP_CHUNK_SHA256="")
+
+    assert response.status_code == 400
+    assert response.data["detail"] == "Missing Chunk-SHA256 header"
+
+
+def test_releaseuploadcompleteapi_incomplete(api_rf):
+    upload, user = setup_upload()
+    put_chunk(api_rf, upload, user, b"te", 0)
+
+    request = api_rf.post(
+        "/",
+        HTTP_AUTHORIZATION=upload.release.backend.auth_token,
+        HTTP_OS_USER=user.username,
+    )
+    response = ReleaseUploadCompleteAPI.as_view()(request, upload_id=upload.id)
+
+    assert response.status_code == 400
+    assert response.data["detail"] == "Upload is incomplete, received 2 of 4 bytes"
+
+
+def test_releaseuploadcompleteapi_retry_after_failure(api_rf, monkeypatch):
+    upload, user = setup_upload()
+    put_chunk(api_rf, upload, user, b"test", 0)
+
+    def error(*args, **kwargs):
+        raise DatabaseError("test")
+
+    def complete():
+        request = api_rf.post(
+            "/",
+            HTTP_AUTHORIZATION=upload.release.backend.auth_token,
+            HTTP_OS_USER=user.username,
+        )
+        return ReleaseUploadCompleteAPI.as_view()(request, upload_id=upload.id)
+
+    with monkeypatch.context() as m:
+        m.setattr(ReleaseFile.objects, "create", error)
+
+        with pytest.raises(DatabaseError):
+            complete()
+
+    response = complete()
+
+    assert response.status_code == 400
+    assert response.data["detail"] == (
+        f"Upload {upload.id} failed, please start a new upload: test"
+    )
+
+
+def test_releaseuploadcompleteapi_success(api_rf):
+    upload, user = setup_upload()
+    put_chunk(api_rf, upload, user, b"st", 2)
+    put_chunk(api_rf, upload, user, b"te", 0)
+
+    request = api_rf.post(
+        "/",
+        HTTP_AUTHORIZATION=upload.release.backend.auth_token,
+        HTTP_OS_USER=user.username,
+    )
+    response = ReleaseUploadCompleteAPI.as_view()(request, upload_id=upload.id)
+
+    assert response.status_code == 201, response.data
+
+    rfile = upload.release.files.get()
+    assert response.headers["File-Id"] == rfile.id
+    assert response.headers["Location"].endswith(f"/releases/file/{rfile.id}")
+    assert rfile.absolute_path().read_bytes() == b"test"
+
+
+def test_releaseuploadcreateapi_already_uploaded(api_rf):
+    release, user = setup_upload(start=False)
+    ReleaseFileFactory(
+        ReleaseUploadsFactory({"file.txt": b"test"})[0],
+        backend=release.backend,
+    )
+
+    request = api_rf.post(
+        "/",
+        data={"name": "file.txt", "size": 4},
+        format="json",
+        HTTP_AUTHORIZATION=release.backend.auth_token,
+        HTTP_OS_USER=user.username,
+    )
+    response = ReleaseUploadCreateAPI.as_view()(request, release_id=release.id)
+
+    assert response.status_code == 400
+    assert "has already been uploaded" in response.data["detail"]
+
+
+def test_releaseuploadcreateapi_bad_filename(api_rf):
+    release, user = setup_upload(start=False)
+
+    request = api_rf.post(
+        "/",
+        data={"name": "unknown.txt", "size": 4},
+        format="json",
+        HTTP_AUTHORIZATION=release.backend.auth_token,
+        HTTP_OS_USER=user.username,
+    )
+    response = ReleaseUploadCreateAPI.as_view()(request, release_id=release.id)
+
+    assert response.status_code == 400
+    assert "not requested" in response.data["detail"]
+
+
+def test_releaseuploadcreateapi_success(api_rf):
+    release, user = setup_upload(start=False)
+
+    request = api_rf.post(
+        "/",
+        data={"name": "file.txt", "size": 4},
+        format="json",
+        HTTP_AUTHORIZATION=release.backend.auth_token,
+        HTTP_OS_USER=user.username,
+    )
+    response = ReleaseUploadCreateAPI.as_view()(request, release_id=release.id)
+
+    assert response.status_code == 201, response.data
+    assert response.data == {"offset": 0, "size": 4}
+
+    upload = release.uploads.get()
+    assert response.headers["Upload-Id"] == upload.id
+    assert response.headers["Location"].endswith(f"/releases/upload/{upload.id}")
+
+
+def test_releaseuploadcreateapi_too_large(api_rf, settings):
+    settings.RELEASE_MAX_FILE_SIZE = 3
+
+    release, user = setup_upload(start=False)
+
+    request = api_rf.post(
+        "/",
+        data={"name": "file.txt", "size": 4},
+        format="json",
+        HTTP_AUTHORIZATION=release.backend.auth_token,
+        HTTP_OS_USER=user.username,
+    )
+    response = ReleaseUploadCreateAPI.as_view()(request, release_id=release.id)
+
+    assert response.status_code == 413
+    assert not release.uploads.exists()
+
+
 def test_releaseworkspaceapi_get_unknown_workspace(api_rf):
     request = api_rf.get("/")
 
@@ -418,6 +845,9 @@ def test_releaseworkspaceapi_get_with_permission(api_rf):
                 "name": "backend2/file1.txt",
                 "id": release2.files.first().pk,
                 "url": f"/api/v2/releases/file/{release2.files.first().id}",
+                "preview_url": (
+                    f"/api/v2/releases/file/{release2.files.first().id}/preview"
+                ),
                 "user": user.username,
                 "date": release2.files.first().created_at.isoformat(),
                 "size": 8,
@@ -429,6 +859,9 @@ def test_releaseworkspaceapi_get_with_permission(api_rf):
                 "name": "backend1/file1.txt",
                 "id": release1.files.first().pk,
                 "url": f"/api/v2/releases/file/{release1.files.first().id}",
+                "preview_url": (
+                    f"/api/v2/releases/file/{release1.files.first().id}/preview"
+                ),
                 "user": user.username,
                 "date": release1.files.first().created_at.isoformat(),
                 "size": 8,
@@ -646,10 +1079,10 @@ def test_releasefileapi_with_nginx_redirect(api_rf):
     response = ReleaseFileAPI.as_view()(request, file_id=rfile.id)
 
     assert response.status_code == 200
-    assert (
-        response.headers["X-Accel-Redirect"]
-        == f"/storage/{release.workspace.name}/releases/{release.id}/file.txt"
-    )
+    assert response.headers["X-Accel-Redirect"] == f"/storage/{rfile.path}"
+    assert response.headers["Content-Type"] == "text/plain"
+    assert response.headers["ETag"] == f'"{rfile.filehash}"'
+    assert response.headers["Cache-Control"] == RELEASE_FILE_CACHE_CONTROL
 
 
 def test_releasefileapi_with_permission(api_rf):
@@ -673,6 +1106,217 @@ def test_releasefileapi_with_permission(api_rf):
     assert response.status_code == 200
     assert b"".join(response.streaming_content) == b"test"
     assert response.headers["Content-Type"] == "text/plain"
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["ETag"] == f'"{rfile.filehash}"'
+    assert response.headers["Cache-Control"] == RELEASE_FILE_CACHE_CONTROL
+
+
+def readable_release_file(contents):
+    rfile = ReleaseFileFactory(ReleaseUploadsFactory({"file.txt": contents})[0])
+    ProjectMembershipFactory(
+        user=rfile.created_by,
+        project=rfile.workspace.project,
+        roles=[ProjectCollaborator],
+    )
+    return rfile
+
+
+def get_release_file(api_rf, rfile, **headers):
+    request = api_rf.get("/", **headers)
+    request.user = rfile.created_by
+
+    return ReleaseFileAPI.as_view()(request, file_id=rfile.id)
+
+
+@pytest.mark.parametrize(
+    "header,content,content_range",
+    [
+        ("bytes=2-5", b"2345", "bytes 2-5/10"),
+        ("bytes=7-", b"789", "bytes 7-9/10"),
+        ("bytes=8-100", b"89", "bytes 8-9/10"),
+        ("bytes=-3", b"789", "bytes 7-9/10"),
+        ("bytes=-100", b"0123456789", "bytes 0-9/10"),
+    ],
+)
+def test_releasefileapi_with_range(api_rf, header, content, content_range):
+    rfile = readable_release_file(b"0123456789")
+
+    response = get_release_file(api_rf, rfile, HTTP_RANGE=header)
+
+    assert response.status_code == 206
+    assert b"".join(response.streaming_content) == content
+    assert response.headers["Content-Length"] == str(len(content))
+    assert response.headers["Content-Range"] == content_range
+    assert response.headers["Content-Type"] == "text/plain"
+    assert response.headers["ETag"] == f'"{rfile.filehash}"'
+
+
+@pytest.mark.parametrize("header", ["bytes=10-", "bytes=5-2", "bytes=-0"])
+def test_releasefileapi_with_unsatisfiable_range(api_rf, header):
+    rfile = readable_release_file(b"0123456789")
+
+    response = get_release_file(api_rf, rfile, HTTP_RANGE=header)
+
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == "bytes */10"
+
+
+@pytest.mark.parametrize("header", ["bytes=0-", "bytes=-1", "bytes=0-0"])
+def test_releasefileapi_with_range_of_empty_file(api_rf, header):
+    rfile = readable_release_file(b"")
+
+    response = get_release_file(api_rf, rfile, HTTP_RANGE=header)
+
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == "bytes */0"
+
+
+def test_releasefileapi_with_file_removed_while_serving(api_rf, monkeypatch):
+    rfile = readable_release_file(b"test")
+
+    # the file is removed after we've checked it exists but before we serve it
+    monkeypatch.setattr(ReleaseFile, "is_deleted", False)
+    rfile.absolute_path().unlink()
+
+    response = get_release_file(api_rf, rfile)
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("header", ["bytes=-", "bytes=0-1,4-5", "lines=1-2"])
+def test_releasefileapi_with_unsupported_range(api_rf, header):
+    rfile = readable_release_file(b"0123456789")
+
+    response = get_release_file(api_rf, rfile, HTTP_RANGE=header)
+
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == b"0123456789"
+
+
+def test_releasefileapi_with_range_and_if_range(api_rf):
+    rfile = readable_release_file(b"0123456789")
+
+    response = get_release_file(
+        api_rf, rfile, HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE=f'"{rfile.filehash}"'
+    )
+    assert response.status_code == 206
+
+    # the client's copy is out of date so it gets the whole file
+    response = get_release_file(
+        api_rf, rfile, HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"old"'
+    )
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == b"0123456789"
+
+
+@pytest.mark.parametrize("redirect", [{}, {"HTTP_RELEASES_REDIRECT": "/storage"}])
+def test_releasefileapi_with_if_none_match(api_rf, redirect):
+    rfile = readable_release_file(b"test")
+    etag = f'"{rfile.filehash}"'
+
+    response = get_release_file(api_rf, rfile, HTTP_IF_NONE_MATCH=etag, **redirect)
+
+    assert response.status_code == 304
+    assert "X-Accel-Redirect" not in response.headers
+    assert response.headers["ETag"] == etag
+    assert response.headers["Cache-Control"] == RELEASE_FILE_CACHE_CONTROL
+
+
+def test_releasefileapi_with_stale_if_none_match(api_rf):
+    rfile = readable_release_file(b"test")
+
+    response = get_release_file(api_rf, rfile, HTTP_IF_NONE_MATCH='"old"')
+
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == b"test"
+
+
+def test_releasefilepreviewapi_success(api_rf):
+    rfile = readable_release_file(b"some notes")
+    rfile.name = "notes.txt"
+    rfile.save()
+
+    request = api_rf.get("/")
+    request.user = rfile.created_by
+
+    response = ReleaseFilePreviewAPI.as_view()(request, file_id=rfile.id)
+
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == b"some notes"
+    assert response.headers["Content-Type"] == "text/plain"
+    assert response.headers["ETag"] == f'"{rfile.filehash}-preview"'
+
+
+def test_releasefilepreviewapi_with_unparseable_csv(api_rf):
+    # a field larger than the csv module's limit
+    contents = b"a," + b"b" * (csv.field_size_limit() + 1) + b"\n"
+    rfile = readable_release_file(contents)
+    rfile.name = "table.csv"
+    rfile.save()
+
+    request = api_rf.get("/")
+    request.user = rfile.created_by
+
+    response = ReleaseFilePreviewAPI.as_view()(request, file_id=rfile.id)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "text/plain"
+    assert (
+        b"".join(response.streaming_content) == contents[: previews.PREVIEW_MAX_BYTES]
+    )
+
+
+def test_releasefilepreviewapi_with_deleted_file(api_rf):
+    rfile = readable_release_file(b"some notes")
+    rfile.absolute_path().unlink()
+
+    request = api_rf.get("/")
+    request.user = rfile.created_by
+
+    response = ReleaseFilePreviewAPI.as_view()(request, file_id=rfile.id)
+
+    assert response.status_code == 404
+
+
+def test_releasefilepreviewapi_with_nginx_redirect(api_rf):
+    rfile = readable_release_file(b"a,b\n1,2\n")
+    rfile.name = "table.csv"
+    rfile.save()
+
+    request = api_rf.get("/", HTTP_RELEASES_REDIRECT="/storage")
+    request.user = rfile.created_by
+
+    response = ReleaseFilePreviewAPI.as_view()(request, file_id=rfile.id)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "text/csv"
+    assert response.headers["X-Accel-Redirect"] == (
+        f"/storage/previews/{rfile.filehash[:2]}/{rfile.filehash}.csv"
+    )
+
+
+def test_releasefilepreviewapi_with_unsupported_file(api_rf):
+    rfile = readable_release_file(b"png")
+    rfile.name = "plot.png"
+    rfile.save()
+
+    request = api_rf.get("/")
+    request.user = rfile.created_by
+
+    response = ReleaseFilePreviewAPI.as_view()(request, file_id=rfile.id)
+
+    assert response.status_code == 404
+
+
+def test_releasefilepreviewapi_without_permission(api_rf):
+    rfile = ReleaseFileFactory(ReleaseUploadsFactory({"file.txt": b"test"})[0])
+
+    request = api_rf.get("/")
+    request.user = UserFactory()
+
+    response = ReleaseFilePreviewAPI.as_view()(request, file_id=rfile.id)
+
+    assert response.status_code == 403
 
 
 def test_releasefileapi_without_permission(api_rf):
@@ -34,3 +34,18 @@ def test_parse_roles_success():
     roles = parse_roles(paths)
 
     assert roles == [OutputChecker, ProjectCollaborator]
+
+
+def test_parse_roles_with_invalid_path():
+    paths = [
+        "jobserver.authorization.roles.OutputChecker",
+        "test.dummy.SomeRole",
+    ]
+
+    with pytest.raises(ValueError, match="Some Role paths did not start with"):
+        parse_roles(paths)
+
+
+def test_parse_roles_with_unknown_role():
+    with pytest.raises(ImportError):
+        parse_roles(["jobserver.authorization.roles.UnknownRole"])
@@ -0,0 +1,43 @@
+from jobserver.authorization import (
+    CoreDeveloper,
+    OutputChecker,
+    OutputPublisher,
+    ProjectCollaborator,
+    permissions,
+)
+from jobserver.authorization.registry import (
+    PERMISSION_BITS,
+    ROLE_MASKS,
+    ROLES,
+    get_permission_mask,
+)
+
+
+def test_permission_bits_are_unique():
+    assert len(set(PERMISSION_BITS.values())) == len(PERMISSION_BITS)
+    assert PERMISSION_BITS[permissions.job_run]
+
+
+def test_roles_maps_paths_to_classes():
+    assert ROLES["jobserver.authorization.roles.OutputChecker"] is OutputChecker
+    assert ROLES["jobserver.authorization.roles.CoreDeveloper"] is CoreDeveloper
+
+
+def test_role_masks_match_permissions():
+    for role, mask in ROLE_MASKS.items():
+        granted = {name for name, bit in PERMISSION_BITS.items() if mask & bit}
+        assert granted == set(role.permissions), role
+
+
+def test_get_permission_mask():
+    mask = get_permission_mask([OutputPublisher, ProjectCollaborator])
+
+    assert mask == ROLE_MASKS[OutputPublisher] | ROLE_MASKS[ProjectCollaborator]
+    assert get_permission_mask([]) == 0
+
+
+def test_get_permission_mask_with_unregistered_role():
+    class DummyRole:
+        permissions = [permissions.snapshot_publish, "unknown"]
+
+    assert get_permission_mask([DummyRole]) == ROLE_MASKS[OutputPublisher]
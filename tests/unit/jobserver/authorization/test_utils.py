@@ -85,6 +85,38 @@ def test_has_role_with_context_success():
     assert has_role(user, ProjectCollaborator, project=project)
 
 
+def test_has_permission_memoises_memberships(django_assert_num_queries):
+    project1 = ProjectFactory()
+    project2 = ProjectFactory()
+    user = UserFactory()
+
+    ProjectMembershipFactory(project=project1, user=user, roles=[ProjectDeveloper])
+
+    # one query per Project, however many times we check
+    with django_assert_num_queries(2):
+        assert has_permission(user, "job_run", project=project1)
+        assert has_permission(user, "job_run", project=project1)
+        assert has_role(user, ProjectDeveloper, project=project1)
+        assert not has_permission(user, "job_run", project=project2)
+        assert not has_role(user, ProjectDeveloper, project=project2)
+
+
+def test_has_permission_sees_global_role_changes():
+    user = UserFactory()
+    assert not has_permission(user, "snapshot_publish")
+
+    user.roles = [OutputPublisher]
+
+    assert has_permission(user, "snapshot_publish")
+    assert has_role(user, OutputPublisher)
+
+
+def test_has_role_with_unsaved_context():
+    user = UserFactory()
+
+    assert not has_role(user, ProjectDeveloper, project=ProjectFactory.build())
+
+
 def test_roles_for_success():
     output = roles_for(ProjectMembership)
 
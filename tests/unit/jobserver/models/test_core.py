@@ -14,7 +14,13 @@ from jobserver.authorization.roles import (
     ProjectCollaborator,
     ProjectDeveloper,
 )
-from jobserver.models import JobRequest, ProjectInvitation, ProjectMembership, User
+from jobserver.models import (
+    JobRequest,
+    ProjectInvitation,
+    ProjectMembership,
+    User,
+    Workspace,
+)
 
 from ....factories import (
     BackendFactory,
@@ -125,6 +131,19 @@ def test_job_str():
     assert str(job) == f"Run ({job.pk})"
 
 
+def test_jobrequestmanager_active():
+    active = JobRequestFactory()
+    JobRequestFactory(is_active=False)
+
+    job_requests = JobRequest.objects.active()
+
+    assert list(job_requests) == [active]
+
+    # the default QuerySet's Job prefetching and annotations are kept
+    assert "started_at" in job_requests.query.annotations
+    assert job_requests._prefetch_related_lookups == ("jobs",)
+
+
 def test_jobrequest_completed_at_no_jobs():
     assert not JobRequestFactory().completed_at
 
@@ -430,23 +449,81 @@ def test_jobrequest_status_unknown():
     assert jr.status == "unknown"
 
 
-def test_jobrequest_status_uses_prefetch_cache(django_assert_num_queries):
+def test_jobrequest_save_bumps_backend_job_requests_version():
+    job_request = JobRequestFactory()
+    backend = job_request.backend
+    backend.refresh_from_db()
+    version = backend.job_requests_version
+
+    job_request.save()
+
+    backend.refresh_from_db()
+    assert backend.job_requests_version == version + 1
+
+
+def test_jobrequest_save_without_backend():
+    job_request = JobRequestFactory(backend=None)
+
+    job_request.save()
+
+    assert job_request.backend is None
+
+
+def test_jobrequest_status_without_jobs():
+    assert JobRequestFactory().status == "unknown"
+
+
+def test_jobrequest_status_is_stored(django_assert_num_queries):
     for i in range(5):
         jr = JobRequestFactory()
-        JobFactory.create_batch(5, job_request=jr)
+        JobFactory.create_batch(5, job_request=jr, status="running")
+
+    with django_assert_num_queries(1):
+        statuses = [jr.status for jr in JobRequest.objects.prefetch_related(None).all()]
 
-    with django_assert_num_queries(2):
-        # 1. select JobRequests
-        # 2. select Jobs for those JobRequests
-        [jr.status for jr in JobRequest.objects.all()]
+    assert statuses == ["running"] * 5
 
 
-def test_jobrequest_status_without_prefetching_jobs(django_assert_num_queries):
+def test_jobrequest_update_from_jobs_with_jobs(freezer):
     job_request = JobRequestFactory()
-    JobFactory.create_batch(5, job_request=job_request)
 
-    with pytest.raises(Exception, match="JobRequest queries must prefetch jobs."):
-        job_request.status
+    freezer.tick()
+    now = timezone.now()
+    jobs = [
+        JobFactory.build(status="succeeded", completed_at=minutes_ago(now, 2)),
+        JobFactory.build(status="succeeded", completed_at=minutes_ago(now, 1)),
+    ]
+
+    assert job_request.update_from_jobs(jobs)
+
+    assert job_request.completed_at == minutes_ago(now, 1)
+    assert not job_request.is_active
+    assert job_request.num_completed == 2
+    assert job_request.status == "succeeded"
+    assert job_request.updated_at == now
+
+    # nothing has changed the second time around
+    freezer.tick()
+    assert not job_request.update_from_jobs(jobs)
+    assert job_request.updated_at == now
+
+
+def test_jobrequest_update_from_jobs_without_jobs(django_assert_num_queries):
+    job_request = JobRequestFactory()
+    job = JobFactory(job_request=job_request, status="running")
+
+    job.status = "succeeded"
+    job.completed_at = timezone.now()
+    job.save()
+
+    # without any Jobs passed in they're looked up
+    with django_assert_num_queries(1):
+        assert job_request.update_from_jobs()
+
+    assert job_request.completed_at == job.completed_at
+    assert not job_request.is_active
+    assert job_request.num_completed == 1
+    assert job_request.status == "succeeded"
 
 
 def test_org_default_for_github_orgs():
@@ -1020,6 +1097,37 @@ def test_workspace_get_action_status_lut_no_jobs():
     assert WorkspaceFactory().get_action_status_lut() == {}
 
 
+def test_workspace_get_action_status_lut_cached(django_assert_num_queries):
+    workspace = WorkspaceFactory()
+    job_request = JobRequestFactory(workspace=workspace)
+    job = JobFactory(job_request=job_request, action="action1", status="pending")
+
+    assert workspace.get_action_status_lut(cached=True) == {"action1": "pending"}
+
+    job.status = "running"
+    job.save()
+
+    with django_assert_num_queries(0):
+        output = workspace.get_action_status_lut(cached=True)
+    assert output == {"action1": "pending"}
+
+    Workspace.clear_action_status_cache([workspace.pk], [job_request.backend.slug])
+
+    assert workspace.get_action_status_lut(cached=True) == {"action1": "running"}
+
+
+def test_workspace_get_action_status_lut_is_one_query(django_assert_num_queries):
+    workspace = WorkspaceFactory()
+    job_request = JobRequestFactory(workspace=workspace)
+    for i in range(10):
+        JobFactory(job_request=job_request, action=f"action{i}", status="pending")
+
+    with django_assert_num_queries(1):
+        output = workspace.get_action_status_lut()
+
+    assert len(output) == 10
+
+
 def test_workspace_get_action_status_lut_with_backend():
     workspace1 = WorkspaceFactory()
     job_request = JobRequestFactory(backend=BackendFactory(), workspace=workspace1)
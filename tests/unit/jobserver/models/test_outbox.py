@@ -0,0 +1,8 @@
+from ....factories import JobFactory, OutboxMessageFactory
+
+
+def test_outboxmessage_str():
+    job = JobFactory()
+    message = OutboxMessageFactory(job=job, kind="internal_error", key="Boom")
+
+    assert str(message) == f"internal_error | {job.pk} | Boom"
@@ -2,6 +2,8 @@ from django.conf import settings
 from django.urls import reverse
 from django.utils import timezone
 
+from jobserver import releases
+from jobserver.models import ReleaseFileUpload
 from tests.factories import (
     ReleaseFactory,
     ReleaseUploadsFactory,
@@ -57,10 +59,7 @@ def test_release_file_absolute_path():
     release = ReleaseFactory(ReleaseUploadsFactory(files))
     rfile = release.files.get(name="file.txt")
 
-    expected = (
-        settings.RELEASE_STORAGE
-        / f"{release.workspace.name}/releases/{release.id}/file.txt"
-    )
+    expected = settings.RELEASE_STORAGE / "blobs" / rfile.filehash[:2] / rfile.filehash
     path = rfile.absolute_path()
     assert path == expected
     assert path.read_text() == "test_absolute_path"
@@ -168,3 +167,26 @@ def test_snapshot_is_draft():
 
 def test_snapshot_is_published():
     assert SnapshotFactory(published_at=timezone.now()).is_published
+
+
+def test_releasefileupload_get_api_url():
+    uploads = ReleaseUploadsFactory({"file1.txt": b"test"})
+    release = ReleaseFactory(uploads, uploaded=False)
+    upload = releases.start_file_upload(
+        release, release.backend, release.created_by, "file1.txt", 4
+    )
+
+    assert upload.get_api_url() == reverse(
+        "api:release-upload", kwargs={"upload_id": upload.id}
+    )
+
+
+def test_releasefileupload_offset():
+    upload = ReleaseFileUpload(size=10)
+    assert upload.offset == 0
+
+    upload.received = [[2, 4]]
+    assert upload.offset == 0
+
+    upload.received = [[0, 4], [6, 8]]
+    assert upload.offset == 4
@@ -0,0 +1,13 @@
+from ....factories import BranchFactory, RepoFactory
+
+
+def test_branch_str():
+    branch = BranchFactory(repo=RepoFactory(name="test-repo"), name="main")
+
+    assert str(branch) == "test-repo | main"
+
+
+def test_repo_str():
+    repo = RepoFactory(url="https://github.com/opensafely/test-repo")
+
+    assert str(repo) == "https://github.com/opensafely/test-repo"
@@ -1,10 +1,14 @@
 import pytest
 from django.utils import timezone
 
+from jobserver import backends as backends_module
 from jobserver.backends import (
     backends,
     backends_to_choices,
+    cache_backend,
+    clear_cached_backend,
     ensure_backends,
+    get_cached_backend,
     get_configured_backends,
     show_warning,
 )
@@ -24,6 +28,34 @@ def test_backends_to_choices():
     assert choices[1] == ("test2", "Display Two")
 
 
+def test_cache_backend_success():
+    backend = BackendFactory()
+
+    cache_backend("token", backend)
+
+    assert get_cached_backend("token") == backend
+    assert get_cached_backend("other-token") is None
+
+
+def test_cache_backend_with_expired_entry(monkeypatch):
+    backend = BackendFactory()
+
+    monkeypatch.setattr(backends_module, "TOKEN_CACHE_TTL", -1)
+    cache_backend("token", backend)
+
+    assert get_cached_backend("token") is None
+
+
+def test_clear_cached_backend():
+    cache_backend("token", BackendFactory())
+    cache_backend("other-token", BackendFactory())
+
+    clear_cached_backend("token")
+
+    assert get_cached_backend("token") is None
+    assert get_cached_backend("other-token") is not None
+
+
 def test_ensure_backends_existing_backends():
     BackendFactory(pk=3, name="TEST", slug="testing")
 
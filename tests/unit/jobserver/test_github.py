@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+
 import pytest
 import requests
 import responses
@@ -12,7 +14,6 @@ from jobserver.github import (
     get_repo,
     get_repo_is_private,
     get_repos_with_branches,
-    get_repos_with_dates,
     is_member_of_org,
 )
 
@@ -36,6 +37,34 @@ def test_get_branch():
     assert output == {"test": "test"}
 
 
+@responses.activate
+def test_get_branch_after_push():
+    expected_url = "https://api.github.com/repos/opensafely/some_repo/branches/main"
+    responses.add(
+        responses.GET,
+        expected_url,
+        json={"commit": {"sha": "abc123"}},
+        headers={"ETag": '"abc123"'},
+        status=200,
+    )
+    responses.add(
+        responses.GET,
+        expected_url,
+        json={"commit": {"sha": "def456"}},
+        headers={"ETag": '"def456"'},
+        status=200,
+    )
+
+    assert get_branch_sha("opensafely", "some_repo", "main") == "abc123"
+
+    # a push straight after the first lookup is seen, rather than the cached
+    # response being reused
+    assert get_branch_sha("opensafely", "some_repo", "main") == "def456"
+
+    assert len(responses.calls) == 2
+    assert responses.calls[1].request.headers["If-None-Match"] == '"abc123"'
+
+
 @responses.activate
 def test_get_branch_with_missing_branch():
     expected_url = "https://api.github.com/repos/opensafely/some_repo/branches/main"
@@ -190,6 +219,8 @@ def test_get_repos_with_branches():
                                 {
                                     "name": "test-repo",
                                     "url": "http://example.com/test/test/",
+                                    "isPrivate": True,
+                                    "createdAt": "2021-10-07T13:37:00Z",
                                     "refs": {
                                         "nodes": [
                                             {"name": "branch1"},
@@ -225,54 +256,11 @@ def test_get_repos_with_branches():
 
     assert len(output) == 2
     assert output[0]["name"] == "test-repo"
+    assert output[0]["is_private"]
+    assert output[0]["created_at"] == datetime(2021, 10, 7, 13, 37, tzinfo=timezone.utc)
     assert output[0]["branches"][0] == "branch1"
 
 
-@responses.activate
-def test_get_repos_with_dates():
-    def data(hasNextPage):
-        return {
-            "data": {
-                "organization": {
-                    "team": {
-                        "repositories": {
-                            "nodes": [
-                                {
-                                    "name": "test-repo",
-                                    "url": "http://example.com/test/test/",
-                                    "isPrivate": True,
-                                    "createdAt": "2021-10-07T13:37:00Z",
-                                }
-                            ],
-                            "pageInfo": {
-                                "endCursor": "test-cursor",
-                                "hasNextPage": hasNextPage,
-                            },
-                        }
-                    }
-                }
-            }
-        }
-
-    expected_url = "https://api.github.com/graphql"
-    responses.add(
-        responses.POST, url=expected_url, json=data(hasNextPage=True), status=200
-    )
-    responses.add(
-        responses.POST, url=expected_url, json=data(hasNextPage=False), status=200
-    )
-
-    output = list(get_repos_with_dates())
-
-    assert len(responses.calls) == 2
-
-    # check the headers are correct
-    assert "bearer" in responses.calls[0].request.headers["Authorization"]
-
-    assert len(output) == 2
-    assert output[0]["name"] == "test-repo"
-
-
 @responses.activate
 def test_githuborganizationoauth2_user_data_204(monkeypatch, dummy_backend):
     monkeypatch.setattr(github, "AUTHORIZATION_ORGS", ["opensafely"])
@@ -315,6 +303,17 @@ def test_githuborganizationoauth2_user_data_404(monkeypatch, dummy_backend):
         dummy_backend.user_data("access-token")
 
 
+@responses.activate
+def test_githuborganizationoauth2_user_data_timeout(monkeypatch, dummy_backend):
+    monkeypatch.setattr(github, "AUTHORIZATION_ORGS", ["opensafely"])
+
+    expected_url = "https://api.github.com/orgs/opensafely/members/test-username"
+    responses.add(responses.GET, url=expected_url, body=requests.Timeout())
+
+    with pytest.raises(AuthFailed, match="unable to reach GitHub"):
+        dummy_backend.user_data("access-token")
+
+
 @responses.activate
 def test_is_member_of_org_failure(monkeypatch):
     monkeypatch.setenv("GITHUB_TESTING_TOKEN", "test")
@@ -345,6 +344,15 @@ def test_is_member_of_org_success(monkeypatch):
     assert not call.response.text
 
 
+@responses.activate
+def test_is_member_of_org_with_unexpected_response(monkeypatch):
+    monkeypatch.setenv("GITHUB_TESTING_TOKEN", "test")
+    membership_url = "https://api.github.com/orgs/testing/members/dummy-user"
+    responses.add(responses.GET, membership_url, status=200)
+
+    assert is_member_of_org("testing", "dummy-user") is None
+
+
 @responses.activate
 def test_is_member_of_org_without_github(monkeypatch):
     monkeypatch.setenv("GITHUB_TESTING_TOKEN", "test")
@@ -389,3 +397,181 @@ def test_iter_query_results_200_error():
 
     with pytest.raises(RuntimeError):
         list(_iter_query_results(query))
+
+
+@responses.activate
+def test_githubclient_get_uses_cache():
+    url = "https://api.github.com/repos/opensafely/some_repo"
+    responses.add(responses.GET, url, json={"test": "test"}, status=200)
+
+    client = github.GitHubClient("token")
+    first = client.get(url, accept="application/vnd.github.v3+json")
+    second = client.get(url, accept="application/vnd.github.v3+json")
+
+    assert len(responses.calls) == 1
+    assert first.json() == second.json() == {"test": "test"}
+
+    # the cache is keyed by Accept header too
+    client.get(url, accept="application/vnd.github.3.raw")
+    assert len(responses.calls) == 2
+
+    assert client.counts == {"hits": 1, "misses": 2, "revalidated": 0}
+
+
+@responses.activate
+def test_githubclient_get_revalidates_stale_responses():
+    url = "https://api.github.com/repos/opensafely/some_repo"
+    responses.add(
+        responses.GET,
+        url,
+        json={"test": "test"},
+        headers={"ETag": '"abc123"'},
+        status=200,
+    )
+    responses.add(responses.GET, url, status=304)
+
+    client = github.GitHubClient("token", cache_ttl=0)
+    client.get(url, accept="application/vnd.github.v3+json")
+    r = client.get(url, accept="application/vnd.github.v3+json")
+
+    assert len(responses.calls) == 2
+    assert "If-None-Match" not in responses.calls[0].request.headers
+    assert responses.calls[1].request.headers["If-None-Match"] == '"abc123"'
+    assert r.json() == {"test": "test"}
+
+    assert client.counts == {"hits": 0, "misses": 1, "revalidated": 1}
+
+
+@responses.activate
+def test_githubclient_get_with_revalidate():
+    url = "https://api.github.com/repos/opensafely/some_repo"
+    responses.add(
+        responses.GET,
+        url,
+        json={"test": "test"},
+        headers={"ETag": '"abc123"'},
+        status=200,
+    )
+    responses.add(responses.GET, url, status=304)
+
+    client = github.GitHubClient("token")
+    client.get(url, accept="application/vnd.github.v3+json")
+    r = client.get(url, accept="application/vnd.github.v3+json", revalidate=True)
+
+    # the cached response was still fresh but we checked it anyway
+    assert len(responses.calls) == 2
+    assert responses.calls[1].request.headers["If-None-Match"] == '"abc123"'
+    assert r.json() == {"test": "test"}
+
+    assert client.counts == {"hits": 0, "misses": 1, "revalidated": 1}
+
+
+@responses.activate
+def test_githubclient_get_sets_timeout(mocker):
+    url = "https://api.github.com/repos/opensafely/some_repo"
+    responses.add(responses.GET, url, json={}, status=200)
+
+    client = github.GitHubClient("token")
+    spy = mocker.spy(client.session, "get")
+    client.get(url, accept="application/vnd.github.v3+json")
+
+    assert spy.call_args.kwargs["timeout"] == github.TIMEOUT
+
+
+@responses.activate
+def test_githubclient_get_without_cache():
+    url = "https://api.github.com/orgs/testing/members/dummy-user"
+    responses.add(responses.GET, url, status=204)
+
+    client = github.GitHubClient("token")
+    client.get(url, accept="application/vnd.github.v3+json", use_cache=False)
+    client.get(url, accept="application/vnd.github.v3+json", use_cache=False)
+
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_githubclient_get_metrics(log_output):
+    url = "https://api.github.com/repos/opensafely/some_repo"
+    responses.add(
+        responses.GET,
+        url,
+        json={},
+        headers={
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": "100",
+            "X-RateLimit-Reset": "1600000000",
+        },
+        status=200,
+    )
+
+    client = github.GitHubClient("token")
+    assert client.get_metrics()["hit_rate"] is None
+
+    client.get(url, accept="application/vnd.github.v3+json")
+    client.get(url, accept="application/vnd.github.v3+json")
+
+    assert client.get_metrics() == {
+        "hits": 1,
+        "misses": 1,
+        "revalidated": 0,
+        "hit_rate": 0.5,
+        "rate_limit": {"limit": 5000, "remaining": 100, "reset": 1600000000},
+    }
+    assert log_output.entries[-1]["event"] == "GitHub rate limit running low"
+
+
+@responses.activate
+def test_githubclient_get_logs_metrics(log_output, monkeypatch):
+    monkeypatch.setattr(github, "METRICS_LOG_INTERVAL", 2)
+
+    url = "https://api.github.com/repos/opensafely/some_repo"
+    responses.add(responses.GET, url, json={}, status=200)
+
+    client = github.GitHubClient("token")
+    client.get(url, accept="application/vnd.github.v3+json")
+    assert not log_output.entries
+
+    client.get(url, accept="application/vnd.github.v3+json")
+    assert log_output.entries == [
+        {
+            "event": "GitHub client metrics",
+            "log_level": "info",
+            "hits": 1,
+            "misses": 1,
+            "revalidated": 0,
+            "hit_rate": 0.5,
+            "rate_limit": {},
+        }
+    ]
+
+
+@responses.activate
+def test_githubclient_get_records_rate_limit(log_output):
+    url = "https://api.github.com/repos/opensafely/some_repo"
+    responses.add(
+        responses.GET,
+        url,
+        json={},
+        headers={
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": "4999",
+            "X-RateLimit-Reset": "1600000000",
+        },
+        status=200,
+    )
+
+    client = github.GitHubClient("token")
+    client.get(url, accept="application/vnd.github.v3+json")
+
+    assert client.rate_limit["remaining"] == 4999
+    assert not log_output.entries
+
+
+def test_get_client(monkeypatch):
+    monkeypatch.setattr(github, "_client", None)
+
+    client = github.get_client()
+
+    assert isinstance(client, github.GitHubClient)
+    assert github.get_client() is client
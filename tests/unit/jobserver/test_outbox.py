@@ -0,0 +1,155 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from jobserver.models import OutboxMessage
+from jobserver.outbox import (
+    CLAIM_TIMEOUT,
+    MAX_ATTEMPTS,
+    RETRY_BACKOFF,
+    get_retry_delay,
+    process_outbox,
+    prune_outbox,
+    send_message,
+)
+
+from ...factories import (
+    JobFactory,
+    JobRequestFactory,
+    OutboxMessageFactory,
+    UserFactory,
+)
+
+
+def test_getretrydelay():
+    assert get_retry_delay(1) == RETRY_BACKOFF
+    assert get_retry_delay(3) == RETRY_BACKOFF * 4
+
+
+def test_processoutbox_claims_messages_before_sending(mocker, freezer):
+    OutboxMessageFactory()
+
+    def send(message):
+        # the message has been claimed so another worker won't send it again
+        assert message.next_attempt_at == timezone.now() + CLAIM_TIMEOUT
+        assert process_outbox() == 0
+
+    mocker.patch("jobserver.outbox.send_message", autospec=True, side_effect=send)
+
+    assert process_outbox() == 1
+    assert not OutboxMessage.objects.filter(sent_at=None).exists()
+
+
+def test_processoutbox_retries_failures(mocker, freezer):
+    message = OutboxMessageFactory()
+
+    mocker.patch(
+        "jobserver.outbox.send_finished_notification",
+        autospec=True,
+        side_effect=Exception("SMTP is down"),
+    )
+
+    assert process_outbox() == 1
+
+    message.refresh_from_db()
+    assert message.attempts == 1
+    assert message.last_error == "SMTP is down"
+    assert message.sent_at is None
+    assert message.next_attempt_at == timezone.now() + RETRY_BACKOFF
+
+    # it's left alone until it's due again
+    assert process_outbox() == 0
+
+    freezer.tick(RETRY_BACKOFF)
+    assert process_outbox() == 1
+
+    message.refresh_from_db()
+    assert message.attempts == 2
+    assert message.next_attempt_at == timezone.now() + RETRY_BACKOFF * 2
+
+
+def test_processoutbox_logs_exhausted_messages(mocker, log_output):
+    message = OutboxMessageFactory(attempts=MAX_ATTEMPTS - 1)
+
+    mocker.patch(
+        "jobserver.outbox.send_finished_notification",
+        autospec=True,
+        side_effect=Exception("SMTP is down"),
+    )
+
+    assert process_outbox() == 1
+
+    message.refresh_from_db()
+    assert message.attempts == MAX_ATTEMPTS
+
+    entry = log_output.entries[-1]
+    assert entry["event"] == "Gave up sending outbox message"
+    assert entry["log_level"] == "error"
+    assert entry["message"] == message.pk
+    assert entry["last_error"] == "SMTP is down"
+
+
+def test_processoutbox_skips_sent_and_exhausted_messages(mocker):
+    OutboxMessageFactory(sent_at="2021-11-01T00:00:00Z")
+    OutboxMessageFactory(attempts=MAX_ATTEMPTS)
+
+    mocked_send = mocker.patch("jobserver.outbox.send_message", autospec=True)
+
+    assert process_outbox() == 0
+
+    mocked_send.assert_not_called()
+
+
+def test_processoutbox_success(mailoutbox):
+    user = UserFactory(notifications_email="test@example.com")
+    job_request = JobRequestFactory(created_by=user)
+
+    OutboxMessageFactory.create_batch(
+        3, job=JobFactory(job_request=job_request, status="succeeded")
+    )
+
+    assert process_outbox(batch_size=2) == 2
+    assert process_outbox(batch_size=2) == 1
+    assert process_outbox(batch_size=2) == 0
+
+    assert len(mailoutbox) == 3
+    assert mailoutbox[0].to == ["test@example.com"]
+
+    assert not OutboxMessage.objects.filter(sent_at=None).exists()
+
+
+def test_pruneoutbox():
+    now = timezone.now()
+    OutboxMessageFactory(sent_at=now - timedelta(days=31))
+    recent = OutboxMessageFactory(sent_at=now - timedelta(days=1))
+    unsent = OutboxMessageFactory(created_at=now - timedelta(days=31))
+
+    # messages we gave up on are kept for a while so they can be looked into
+    OutboxMessageFactory(attempts=MAX_ATTEMPTS, created_at=now - timedelta(days=31))
+    recent_failure = OutboxMessageFactory(
+        attempts=MAX_ATTEMPTS, created_at=now - timedelta(days=1)
+    )
+
+    assert prune_outbox() == 2
+
+    assert set(OutboxMessage.objects.all()) == {recent, unsent, recent_failure}
+
+
+def test_sendmessage_internal_error(mocker):
+    message = OutboxMessageFactory(kind=OutboxMessage.Kinds.INTERNAL_ERROR)
+
+    mocked_sentry_sdk = mocker.patch("jobserver.outbox.sentry_sdk", autospec=True)
+
+    send_message(message)
+
+    mocked_sentry_sdk.capture_message.assert_called_once_with(
+        "Job encountered an internal error"
+    )
+
+
+def test_sendmessage_unknown_kind():
+    message = OutboxMessageFactory(kind="unknown")
+
+    with pytest.raises(ValueError, match="Unknown OutboxMessage kind"):
+        send_message(message)
@@ -0,0 +1,130 @@
+import csv
+import io
+
+import pytest
+
+from jobserver import previews
+from jobserver.models.outputs import absolute_file_path
+
+from ...factories import ReleaseFileFactory, ReleaseUploadsFactory
+
+
+def release_file(name, contents):
+    return ReleaseFileFactory(ReleaseUploadsFactory({name: contents})[0])
+
+
+@pytest.mark.parametrize(
+    "name,kind",
+    [
+        ("output/table.csv", "csv"),
+        ("output/TABLE.CSV", "csv"),
+        ("notes.txt", "text"),
+        ("output/run.log", "text"),
+        ("plot.png", None),
+        ("no-suffix", None),
+    ],
+)
+def test_get_preview_kind(name, kind):
+    assert previews.get_preview_kind(name) == kind
+
+
+def test_write_csv_preview_limits_rows(monkeypatch):
+    monkeypatch.setattr(previews, "PREVIEW_ROWS", 2)
+
+    dst = io.BytesIO()
+    previews.write_csv_preview(io.BytesIO(b'a,b\r\n1,"x\r\ny"\r\n3,4\r\n'), dst)
+
+    # quoted newlines are kept within their row
+    assert dst.getvalue() == b'a,b\r\n1,"x\r\ny"\r\n'
+
+
+def test_write_csv_preview_limits_size(monkeypatch):
+    monkeypatch.setattr(previews, "PREVIEW_MAX_BYTES", 10)
+
+    dst = io.BytesIO()
+    previews.write_csv_preview(io.BytesIO(b"aaaa,bbbb\r\n1,2\r\n3,4\r\n"), dst)
+
+    assert dst.getvalue() == b"aaaa,bbbb\r\n"
+
+
+def test_write_text_preview_drops_partial_characters(monkeypatch):
+    monkeypatch.setattr(previews, "PREVIEW_MAX_BYTES", 4)
+
+    dst = io.BytesIO()
+    previews.write_text_preview(io.BytesIO("abc€def".encode()), dst)
+
+    assert dst.getvalue() == b"abc"
+
+
+def test_get_preview_csv(monkeypatch):
+    monkeypatch.setattr(previews, "PREVIEW_ROWS", 2)
+    rfile = release_file("table.csv", b"a,b\n1,2\n3,4\n")
+
+    path = previews.get_preview(rfile)
+
+    assert path == previews.build_preview_path(rfile.filehash, "csv")
+    assert absolute_file_path(path).read_bytes() == b"a,b\r\n1,2\r\n"
+
+
+def test_get_preview_csv_falls_back_to_text(monkeypatch):
+    monkeypatch.setattr(previews, "PREVIEW_MAX_BYTES", 8)
+    # a field larger than the csv module's limit
+    contents = b"a," + b"b" * (csv.field_size_limit() + 1) + b"\n"
+    rfile = release_file("table.csv", contents)
+
+    path = previews.get_preview(rfile)
+
+    assert path == previews.build_preview_path(rfile.filehash, "text")
+    assert absolute_file_path(path).read_bytes() == b"a,bbbbbb"
+
+
+def test_get_preview_reuses_existing_preview():
+    rfile = release_file("notes.txt", b"some notes")
+
+    path = absolute_file_path(previews.get_preview(rfile))
+    path.write_text("already built")
+
+    assert absolute_file_path(previews.get_preview(rfile)).read_text() == (
+        "already built"
+    )
+
+
+def test_get_preview_unsupported_file():
+    rfile = release_file("plot.png", b"png")
+
+    assert previews.get_preview(rfile) is None
+    assert not absolute_file_path(previews.PREVIEW_DIR).exists()
+
+
+def test_get_preview_with_missing_file():
+    rfile = release_file("notes.txt", b"some notes")
+    previews.delete_previews(rfile.filehash)
+    rfile.absolute_path().unlink()
+
+    with pytest.raises(FileNotFoundError):
+        previews.get_preview(rfile)
+
+    # the temporary file has been cleaned up
+    directory = absolute_file_path(previews.PREVIEW_DIR) / rfile.filehash[:2]
+    assert not list(directory.iterdir())
+
+
+def test_build_preview_logs_failures(log_output):
+    rfile = release_file("notes.txt", b"some notes")
+    previews.delete_previews(rfile.filehash)
+    rfile.absolute_path().unlink()
+
+    previews.build_preview(rfile)
+
+    assert log_output.entries[-1]["event"] == "Failed to build preview"
+    assert log_output.entries[-1]["release_file"] == rfile.pk
+
+
+def test_delete_previews():
+    rfile = release_file("notes.txt", b"some notes")
+    path = absolute_file_path(previews.build_preview_path(rfile.filehash, "text"))
+    assert path.exists()
+
+    previews.delete_previews(rfile.filehash)
+
+    assert not path.exists()
@@ -1,20 +1,26 @@
+import hashlib
+import io
+import os
 import random
 import string
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
 import pytest
-from django.db import DatabaseError
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
 from django.utils import timezone
 
-from jobserver import releases
-from jobserver.models import ReleaseFile
+from jobserver import previews, releases
+from jobserver.models import ReleaseFile, ReleaseFileUpload
 from jobserver.models.outputs import absolute_file_path
 from tests.factories import (
     BackendFactory,
     ReleaseFactory,
     ReleaseFileFactory,
     ReleaseUploadsFactory,
+    SnapshotFactory,
     UserFactory,
     WorkspaceFactory,
 )
@@ -54,7 +60,7 @@ def test_build_hatch_token_and_url_with_custom_expires():
 def test_build_outputs_zip():
     release = ReleaseFactory(ReleaseUploadsFactory(["test1"]))
 
-    zf = releases.build_outputs_zip(release.files.all())
+    zf = io.BytesIO(b"".join(releases.build_outputs_zip(release.files.all())))
 
     with zipfile.ZipFile(zf, "r") as zip_obj:
         assert zip_obj.testzip() is None
@@ -71,6 +77,39 @@ def test_build_outputs_zip():
         assert zipped_contents == original_contents
 
 
+def test_build_outputs_zip_streams_in_chunks(monkeypatch):
+    monkeypatch.setattr(releases, "UPLOAD_CHUNK_SIZE", 10)
+
+    contents = "".join(random.choice(string.ascii_letters) for _ in range(100))
+    uploads = ReleaseUploadsFactory({"file.csv": contents.encode(), "plot.png": b"png"})
+    release = ReleaseFactory(uploads)
+
+    chunks = list(releases.build_outputs_zip(release.files.order_by("name")))
+
+    # each chunk of each file is handed on as it's written
+    assert len(chunks) > 10
+
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks)), "r") as zip_obj:
+        assert zip_obj.testzip() is None
+
+        csv, png = zip_obj.infolist()
+        assert csv.compress_type == zipfile.ZIP_DEFLATED
+        assert png.compress_type == zipfile.ZIP_STORED
+
+        assert zip_obj.read("file.csv") == contents.encode()
+        assert zip_obj.read("plot.png") == b"png"
+
+
+def test_build_outputs_zip_skips_deleted_files():
+    release = ReleaseFactory(ReleaseUploadsFactory(["test1", "test2"]))
+    releases.delete_release_file(release.files.get(name="test1"), UserFactory())
+
+    zf = io.BytesIO(b"".join(releases.build_outputs_zip(release.files.all())))
+
+    with zipfile.ZipFile(zf, "r") as zip_obj:
+        assert zip_obj.namelist() == ["test2"]
+
+
 def test_build_spa_base_url():
     base = releases.build_spa_base_url("/a/page/with/file.csv", "with/file.csv")
 
@@ -97,6 +136,31 @@ def test_create_release_reupload():
         )
 
 
+def test_create_release_reupload_many(django_assert_num_queries):
+    uploads = ReleaseUploadsFactory(
+        {"file1.txt": b"test1", "file2.txt": b"test2", "file3.txt": b"test3"}
+    )
+    release = ReleaseFactory(uploads)
+    hashes = {rfile.name: rfile.filehash for rfile in release.files.all()}
+
+    files = {
+        "file1.txt": hashes["file1.txt"],
+        # a new version of a file which has been uploaded before
+        "file2.txt": hashes["file3.txt"],
+        "file3.txt": hashes["file3.txt"],
+    }
+
+    # every file is checked in one query
+    with django_assert_num_queries(1):
+        with pytest.raises(releases.ReleaseFileAlreadyExists) as e:
+            releases.check_not_already_uploaded(files, release.backend)
+
+    assert str(e.value) == (
+        "These versions of 'file1.txt', 'file3.txt' have already been uploaded "
+        f"from backend '{release.backend.slug}'"
+    )
+
+
 def test_handle_release_upload_file_created():
     uploads = ReleaseUploadsFactory({"file1.txt": b"test"})
     release = ReleaseFactory(uploads, uploaded=False)
@@ -109,8 +173,30 @@ def test_handle_release_upload_file_created():
         uploads[0].filename,
     )
     assert rfile.name == "file1.txt"
-    assert rfile.path == f"{release.workspace.name}/releases/{release.id}/file1.txt"
+    assert rfile.path == f"blobs/{rfile.filehash[:2]}/{rfile.filehash}"
     assert rfile.filehash == uploads[0].filehash
+    assert rfile.backend == release.backend
+    assert rfile.size == 4
+    assert rfile.absolute_path().read_bytes() == b"test"
+
+
+def test_handle_release_upload_shares_existing_content():
+    existing = ReleaseFileFactory(ReleaseUploadsFactory({"file1.txt": b"test"})[0])
+
+    uploads = ReleaseUploadsFactory({"file2.txt": b"test"})
+    release = ReleaseFactory(uploads, uploaded=False)
+
+    rfile = releases.handle_file_upload(
+        release,
+        release.backend,
+        release.created_by,
+        uploads[0].stream,
+        uploads[0].filename,
+    )
+
+    # the same content is only stored once
+    assert rfile.path == existing.path
+    assert list(absolute_file_path("blobs").glob("*/*")) == [rfile.absolute_path()]
 
 
 def test_handle_release_upload_already_exists():
@@ -130,6 +216,93 @@ def test_handle_release_upload_already_exists():
             uploads[0].filename,
         )
 
+    # the original is untouched and the temporary copy has been removed
+    directory = absolute_file_path("blobs")
+    assert [p.name for p in directory.iterdir()] == [existing.filehash[:2]]
+    assert existing.absolute_path().read_bytes() == b"test"
+
+
+def test_delete_release_file_removes_unused_content(freezer):
+    rfile = ReleaseFileFactory(ReleaseUploadsFactory({"file1.txt": b"test"})[0])
+    user = UserFactory()
+
+    releases.delete_release_file(rfile, user)
+
+    rfile.refresh_from_db()
+    assert rfile.deleted_by == user
+    assert rfile.deleted_at == timezone.now()
+    assert not rfile.absolute_path().exists()
+    assert not list(absolute_file_path(previews.PREVIEW_DIR).glob("*/*"))
+
+
+def test_delete_release_file_clears_index_caches(django_capture_on_commit_callbacks):
+    rfile = ReleaseFileFactory(ReleaseUploadsFactory(["file1.txt"])[0])
+    snapshot = SnapshotFactory(workspace=rfile.workspace)
+    snapshot.files.add(rfile)
+
+    keys = [
+        releases.get_index_cache_key(obj)
+        for obj in [rfile.release, rfile.workspace, snapshot]
+    ]
+    cache.set_many({key: {"files": []} for key in keys})
+
+    with django_capture_on_commit_callbacks(execute=True):
+        releases.delete_release_file(rfile, UserFactory())
+
+    assert cache.get_many(keys) == {}
+
+
+def test_delete_release_file_keeps_shared_content():
+    first = ReleaseFileFactory(ReleaseUploadsFactory({"file1.txt": b"test"})[0])
+    second = ReleaseFileFactory(ReleaseUploadsFactory({"file2.txt": b"test"})[0])
+    assert first.path == second.path
+
+    releases.delete_release_file(first, UserFactory())
+
+    assert first.is_deleted
+    assert not second.is_deleted
+    assert second.absolute_path().read_bytes() == b"test"
+
+
+def test_delete_release_file_with_concurrent_upload(monkeypatch):
+    rfile = ReleaseFileFactory(ReleaseUploadsFactory({"file1.txt": b"test"})[0])
+
+    # an upload of the same content commits while we wait for the blob's lock
+    lock_blob = releases.lock_blob
+
+    def upload_while_waiting(filehash):
+        monkeypatch.setattr(releases, "lock_blob", lock_blob)
+        ReleaseFileFactory(ReleaseUploadsFactory({"file2.txt": b"test"})[0])
+        lock_blob(filehash)
+
+    monkeypatch.setattr(releases, "lock_blob", upload_while_waiting)
+
+    releases.delete_release_file(rfile, UserFactory())
+
+    assert rfile.is_deleted
+    assert rfile.absolute_path().read_bytes() == b"test"
+
+
+def test_lock_blob():
+    filehash = hashlib.sha256(b"test").hexdigest()
+
+    def try_lock(filehash):
+        key = int.from_bytes(bytes.fromhex(filehash[:16]), "big", signed=True)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", [key])
+                return cursor.fetchone()[0]
+        finally:
+            connection.close()
+
+    with transaction.atomic():
+        releases.lock_blob(filehash)
+
+        # another connection can't take the same lock but can take others
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            assert not executor.submit(try_lock, filehash).result()
+            assert executor.submit(try_lock, "ff" * 32).result()
+
 
 def test_handle_release_upload_db_error(monkeypatch):
     uploads = ReleaseUploadsFactory({"file1.txt": b"test"})
@@ -146,10 +319,398 @@ def test_handle_release_upload_db_error(monkeypatch):
         )
 
     # check the file has been deleted due to the error
-    rpath = f"{release.workspace.name}/releases/{release.id}/{uploads[0].filename}"
+    rpath = releases.build_blob_path(uploads[0].filehash)
     assert not absolute_file_path(rpath).exists()
 
 
+def test_handle_release_upload_db_error_with_shared_content(monkeypatch):
+    existing = ReleaseFileFactory(ReleaseUploadsFactory({"file1.txt": b"test"})[0])
+
+    uploads = ReleaseUploadsFactory({"file2.txt": b"test"})
+    release = ReleaseFactory(uploads, uploaded=False)
+
+    monkeypatch.setattr(ReleaseFile.objects, "create", raise_error)
+    with pytest.raises(DatabaseError):
+        releases.handle_file_upload(
+            release,
+            release.backend,
+            release.created_by,
+            uploads[0].stream,
+            uploads[0].filename,
+        )
+
+    # the content is still used by the existing ReleaseFile
+    assert existing.absolute_path().read_bytes() == b"test"
+
+
+def test_handle_release_upload_too_large(settings):
+    settings.RELEASE_MAX_FILE_SIZE = 3
+
+    uploads = ReleaseUploadsFactory({"file1.txt": b"test"})
+    release = ReleaseFactory(uploads, uploaded=False)
+
+    with pytest.raises(releases.ReleaseFileTooLarge):
+        releases.handle_file_upload(
+            release,
+            release.backend,
+            release.created_by,
+            uploads[0].stream,
+            uploads[0].filename,
+        )
+
+    # nothing, including the temporary file, was left on disk
+    assert not list(absolute_file_path("blobs").iterdir())
+    assert not release.files.exists()
+
+
+def test_remove_unreferenced_blobs():
+    rfile = ReleaseFileFactory(ReleaseUploadsFactory({"file1.txt": b"used"})[0])
+
+    # make everything on disk old enough to be removed
+    old = (timezone.now() - timedelta(hours=2)).timestamp()
+
+    unused = absolute_file_path(releases.build_blob_path("ab" * 32))
+    unused.parent.mkdir(parents=True)
+    unused.write_text("unused")
+
+    leftover = absolute_file_path("blobs/.upload-leftover")
+    leftover.write_text("partial")
+
+    for path in [rfile.absolute_path(), unused, leftover]:
+        os.utime(path, (old, old))
+
+    # an unreferenced blob which was only just written
+    recent = absolute_file_path(releases.build_blob_path("cd" * 32))
+    recent.parent.mkdir(parents=True)
+    recent.write_text("recent")
+
+    removed = releases.remove_unreferenced_blobs()
+
+    assert removed == ["blobs/.upload-leftover", f"blobs/ab/{'ab' * 32}"]
+    assert rfile.absolute_path().exists()
+    assert recent.exists()
+    assert not unused.exists()
+    assert not leftover.exists()
+
+
+def test_remove_unreferenced_blobs_with_deleted_release_file():
+    rfile = ReleaseFileFactory(ReleaseUploadsFactory({"file1.txt": b"test"})[0])
+
+    preview = previews.build_preview_path(rfile.filehash, "text")
+    assert absolute_file_path(preview).exists()
+
+    # deleting the ReleaseFile directly leaves its content, and preview, on disk
+    rfile.deleted_at = timezone.now()
+    rfile.save()
+
+    removed = releases.remove_unreferenced_blobs(grace_period=timedelta(0))
+
+    assert removed == [rfile.path, str(preview)]
+    assert not rfile.absolute_path().exists()
+    assert not absolute_file_path(preview).exists()
+
+
+def test_remove_unreferenced_blobs_without_blob_directory():
+    assert releases.remove_unreferenced_blobs() == []
+
+
+def test_remove_stale_uploads():
+    # make everything on disk old enough to be removed
+    old = (timezone.now() - timedelta(hours=2)).timestamp()
+
+    completed = start_upload(b"done")
+    write_chunk(completed, b"done", 0, 4)
+    releases.complete_file_upload(completed, completed.release.backend)
+
+    in_progress = start_upload(b"test")
+    failed = start_upload(b"fail")
+    failed.failed_at = timezone.now()
+    failed.save()
+
+    stale = start_upload(b"stale")
+    stale.created_at = timezone.now() - timedelta(days=8)
+    stale.save()
+
+    leftover = in_progress.absolute_path().parent / ".upload-leftover"
+    leftover.write_text("partial")
+
+    for upload in [in_progress, failed, stale]:
+        path = upload.absolute_path()
+        os.utime(path, (old, old))
+    os.utime(leftover, (old, old))
+
+    # a chunk which is still being written
+    recent = in_progress.absolute_path().parent / ".upload-recent"
+    recent.write_text("recent")
+
+    removed = releases.remove_stale_uploads()
+
+    assert removed == sorted(
+        [
+            "uploads/.upload-leftover",
+            failed.path,
+            stale.path,
+        ]
+    )
+    assert in_progress.absolute_path().exists()
+    assert recent.exists()
+
+    assert list(ReleaseFileUpload.objects.order_by("pk")) == sorted(
+        [completed, in_progress, failed], key=lambda u: u.pk
+    )
+
+
+def test_remove_stale_uploads_without_upload_directory():
+    assert releases.remove_stale_uploads() == []
+
+
+def test_write_upload_to_tmp_in_chunks(monkeypatch, tmp_path):
+    monkeypatch.setattr(releases, "UPLOAD_CHUNK_SIZE", 3)
+
+    contents = b"".join(random.choice(string.ascii_letters).encode() for _ in range(10))
+    upload = ReleaseUploadsFactory({"file1.txt": contents})[0]
+
+    path, filehash = releases.write_upload_to_tmp(upload.stream, tmp_path)
+
+    assert path.parent == tmp_path
+    assert path.read_bytes() == contents
+    assert filehash == upload.filehash
+
+
+def start_upload(contents, filename="file1.txt"):
+    uploads = ReleaseUploadsFactory({filename: contents})
+    release = ReleaseFactory(uploads, uploaded=False)
+
+    return releases.start_file_upload(
+        release, release.backend, release.created_by, filename, len(contents)
+    )
+
+
+def write_chunk(upload, contents, start, end):
+    chunk = contents[start:end]
+    return releases.write_upload_chunk(
+        upload, start, end, hashlib.sha256(chunk).hexdigest(), io.BytesIO(chunk)
+    )
+
+
+def test_complete_file_upload_already_completed():
+    upload = start_upload(b"test")
+    write_chunk(upload, b"test", 0, 4)
+    releases.complete_file_upload(upload, upload.release.backend)
+
+    with pytest.raises(releases.ReleaseUploadError, match="already been completed"):
+        releases.complete_file_upload(upload, upload.release.backend)
+
+
+def test_complete_file_upload_incomplete():
+    upload = start_upload(b"test")
+    write_chunk(upload, b"test", 0, 2)
+
+    with pytest.raises(releases.ReleaseUploadError, match="received 2 of 4 bytes"):
+        releases.complete_file_upload(upload, upload.release.backend)
+
+
+def test_complete_file_upload_success():
+    contents = b"some test contents"
+    upload = start_upload(contents)
+
+    # send the chunks out of order
+    write_chunk(upload, contents, 10, 18)
+    write_chunk(upload, contents, 0, 10)
+
+    rfile = releases.complete_file_upload(upload, upload.release.backend)
+
+    assert rfile.name == "file1.txt"
+    assert rfile.filehash == hashlib.sha256(contents).hexdigest()
+    assert rfile.absolute_path().read_bytes() == contents
+
+    # the upload's working file has been moved into place
+    assert not upload.absolute_path().exists()
+
+    upload.refresh_from_db()
+    assert upload.completed_at
+    assert upload.release_file == rfile
+
+
+def test_complete_file_upload_with_mismatched_hash():
+    upload = start_upload(b"test")
+    write_chunk(upload, b"test", 0, 2)
+    write_chunk(upload, b"nope", 2, 4)
+
+    with pytest.raises(releases.ReleaseUploadError, match="does not match the hash"):
+        releases.complete_file_upload(upload, upload.release.backend)
+
+    assert not upload.release.files.exists()
+
+    # the upload can't be retried with the same bad contents
+    upload.refresh_from_db()
+    assert upload.failed_at
+    assert "does not match the hash" in upload.error
+    assert not upload.absolute_path().exists()
+
+    with pytest.raises(releases.ReleaseUploadError, match="start a new upload"):
+        releases.complete_file_upload(upload, upload.release.backend)
+
+
+def test_complete_file_upload_being_completed():
+    upload = start_upload(b"test")
+    write_chunk(upload, b"test", 0, 4)
+
+    upload.completing_at = timezone.now()
+    upload.save(update_fields=["completing_at"])
+
+    with pytest.raises(releases.ReleaseUploadError, match="already being completed"):
+        releases.complete_file_upload(upload, upload.release.backend)
+
+    # a claim which has timed out can be taken over
+    upload.completing_at = timezone.now() - timedelta(hours=2)
+    upload.save(update_fields=["completing_at"])
+
+    rfile = releases.complete_file_upload(upload, upload.release.backend)
+
+    assert rfile.absolute_path().read_bytes() == b"test"
+
+
+def test_complete_file_upload_with_db_error(monkeypatch):
+    upload = start_upload(b"test")
+    write_chunk(upload, b"test", 0, 4)
+
+    monkeypatch.setattr(ReleaseFile.objects, "create", raise_error)
+
+    with pytest.raises(DatabaseError):
+        releases.complete_file_upload(upload, upload.release.backend)
+
+    upload.refresh_from_db()
+    assert upload.failed_at
+    assert upload.error == "test error"
+    assert upload.release_file is None
+    assert not upload.absolute_path().exists()
+
+    # retrying reports the failure rather than looking for the removed file
+    with pytest.raises(releases.ReleaseUploadError, match="start a new upload"):
+        releases.complete_file_upload(upload, upload.release.backend)
+
+
+def test_complete_file_upload_with_missing_file():
+    upload = start_upload(b"test")
+    write_chunk(upload, b"test", 0, 4)
+    upload.absolute_path().unlink()
+
+    with pytest.raises(releases.ReleaseUploadError, match="has expired"):
+        releases.complete_file_upload(upload, upload.release.backend)
+
+    upload.refresh_from_db()
+    assert upload.failed_at
+
+
+def test_start_file_upload_already_uploaded():
+    uploads = ReleaseUploadsFactory({"file1.txt": b"test"})
+    existing = ReleaseFileFactory(uploads[0])
+
+    with pytest.raises(releases.ReleaseFileAlreadyExists):
+        releases.start_file_upload(
+            existing.release,
+            existing.release.backend,
+            existing.created_by,
+            "file1.txt",
+            4,
+        )
+
+
+def test_start_file_upload_success():
+    upload = start_upload(b"test")
+
+    assert upload.offset == 0
+    assert upload.absolute_path().stat().st_size == 4
+
+
+def test_start_file_upload_too_large(settings):
+    settings.RELEASE_MAX_FILE_SIZE = 3
+
+    with pytest.raises(releases.ReleaseFileTooLarge):
+        start_upload(b"test")
+
+
+def test_write_upload_chunk_after_completion():
+    upload = start_upload(b"test")
+    write_chunk(upload, b"test", 0, 4)
+    releases.complete_file_upload(upload, upload.release.backend)
+    upload.refresh_from_db()
+
+    with pytest.raises(releases.ReleaseUploadError, match="already been completed"):
+        write_chunk(upload, b"test", 0, 4)
+
+
+def test_write_upload_chunk_after_failure():
+    upload = start_upload(b"test")
+    write_chunk(upload, b"nope", 0, 4)
+
+    with pytest.raises(releases.ReleaseUploadError):
+        releases.complete_file_upload(upload, upload.release.backend)
+    upload.refresh_from_db()
+
+    with pytest.raises(releases.ReleaseUploadError, match="start a new upload"):
+        write_chunk(upload, b"test", 0, 4)
+
+
+def test_write_upload_chunk_with_missing_file():
+    upload = start_upload(b"test")
+    upload.absolute_path().unlink()
+
+    with pytest.raises(releases.ReleaseUploadError, match="has expired"):
+        write_chunk(upload, b"test", 0, 4)
+
+    assert upload.received == []
+
+
+def test_write_upload_chunk_merges_ranges():
+    contents = b"0123456789"
+    upload = start_upload(contents)
+
+    upload = write_chunk(upload, contents, 6, 8)
+    assert upload.received == [[6, 8]]
+    assert upload.offset == 0
+
+    upload = write_chunk(upload, contents, 0, 3)
+    assert upload.received == [[0, 3], [6, 8]]
+    assert upload.offset == 3
+
+    # resending part of a chunk we already have is fine
+    upload = write_chunk(upload, contents, 2, 6)
+    assert upload.received == [[0, 8]]
+    assert upload.offset == 8
+
+    assert upload.absolute_path().read_bytes()[:8] == contents[:8]
+
+
+def test_write_upload_chunk_outside_of_file():
+    upload = start_upload(b"test")
+
+    with pytest.raises(releases.ReleaseUploadError, match="outside of the file"):
+        write_chunk(upload, b"testtest", 2, 6)
+
+
+def test_write_upload_chunk_with_mismatched_hash():
+    upload = start_upload(b"test")
+    write_chunk(upload, b"test", 0, 4)
+
+    with pytest.raises(releases.ReleaseUploadError, match="does not match"):
+        releases.write_upload_chunk(upload, 0, 4, "wrong", io.BytesIO(b"nope"))
+
+    # the bad chunk didn't overwrite the good one
+    assert upload.absolute_path().read_bytes() == b"test"
+    assert [p.name for p in upload.absolute_path().parent.iterdir()] == [upload.id]
+
+
+def test_write_upload_chunk_with_wrong_size():
+    upload = start_upload(b"test")
+
+    with pytest.raises(releases.ReleaseUploadError, match="Received 2 bytes"):
+        releases.write_upload_chunk(
+            upload, 0, 4, hashlib.sha256(b"te").hexdigest(), io.BytesIO(b"te")
+        )
+
+
 def test_workspace_files_no_releases():
     workspace = WorkspaceFactory()
 
@@ -182,30 +743,37 @@ def test_workspace_files_many_releases(freezer):
         content = "".join(random.choice(string.ascii_letters) for i in range(10))
         return ReleaseUploadsFactory({f: content.encode("utf8") for f in files})
 
+    # files are uploaded as their release is created, with each release
+    # coming after the last
+    freezer.tick()
     ReleaseFactory(
         uploads(["test1", "test2", "test3"]),
         workspace=workspace,
         backend=backend1,
         created_at=minutes_ago(now, 10),
     )
+    freezer.tick()
     ReleaseFactory(
         uploads(["test2", "test3"]),
         workspace=workspace,
         backend=backend1,
         created_at=minutes_ago(now, 8),
     )
+    freezer.tick()
     release3 = ReleaseFactory(
         uploads(["test2"]),
         workspace=workspace,
         backend=backend1,
         created_at=minutes_ago(now, 6),
     )
+    freezer.tick()
     release4 = ReleaseFactory(
         uploads(["test1", "test3"]),
         workspace=workspace,
         backend=backend1,
         created_at=minutes_ago(now, 4),
     )
+    freezer.tick()
     release5 = ReleaseFactory(
         uploads(["test1"]),
         workspace=workspace,
@@ -213,6 +781,7 @@ def test_workspace_files_many_releases(freezer):
         created_at=minutes_ago(now, 2),
     )
     # different backend, same file name, more recent
+    freezer.tick()
     release6 = ReleaseFactory(
         uploads(["test1"]),
         workspace=workspace,
@@ -228,3 +797,11 @@ def test_workspace_files_many_releases(freezer):
         "backend1/test2": release3.files.get(name="test2"),
         "backend2/test1": release6.files.get(name="test1"),
     }
+
+
+def test_zip_response():
+    response = releases.zip_response(iter([b"test"]), "test.zip")
+
+    assert response["Content-Type"] == "application/zip"
+    assert response["Content-Disposition"] == 'attachment; filename="test.zip"'
+    assert b"".join(response.streaming_content) == b"test"
@@ -0,0 +1,219 @@
+from datetime import datetime, timedelta, timezone
+
+from jobserver.models import Branch, Repo
+from jobserver.repos import (
+    get_github_orgs,
+    get_repos_with_branches_from_mirror,
+    is_stale,
+    sync_all_repos,
+    sync_repos,
+    sync_stale_repos,
+)
+
+from ...factories import BranchFactory, OrgFactory, RepoFactory
+
+
+CREATED_AT = datetime(2021, 10, 7, 13, 37, tzinfo=timezone.utc)
+
+
+def github_repo(name, branches, is_private=True):
+    return {
+        "name": name,
+        "url": f"https://github.com/opensafely/{name}",
+        "is_private": is_private,
+        "created_at": CREATED_AT,
+        "branches": branches,
+    }
+
+
+def test_get_github_orgs():
+    OrgFactory(github_orgs=["opensafely"])
+    OrgFactory(github_orgs=["opensafely", "opensafely-core"])
+
+    assert get_github_orgs() == ["opensafely", "opensafely-core"]
+
+
+def test_get_repos_with_branches_from_mirror(mocker):
+    mock = mocker.patch("jobserver.repos.get_repos_with_branches", autospec=True)
+
+    repo1 = RepoFactory(name="b-repo")
+    BranchFactory(repo=repo1, name="main")
+    BranchFactory(repo=repo1, name="develop")
+    repo2 = RepoFactory(name="A-repo")
+    RepoFactory(org="other", name="other-repo")
+
+    output = get_repos_with_branches_from_mirror("opensafely")
+
+    assert output == [
+        {"name": "A-repo", "url": repo2.url, "branches": []},
+        {"name": "b-repo", "url": repo1.url, "branches": ["develop", "main"]},
+    ]
+    mock.assert_not_called()
+
+
+def test_get_repos_with_branches_from_mirror_syncs_unknown_org(mocker):
+    mocker.patch(
+        "jobserver.repos.get_repos_with_branches",
+        autospec=True,
+        return_value=[github_repo("test-repo", ["main"])],
+    )
+
+    output = get_repos_with_branches_from_mirror("opensafely")
+
+    assert output == [
+        {
+            "name": "test-repo",
+            "url": "https://github.com/opensafely/test-repo",
+            "branches": ["main"],
+        }
+    ]
+
+
+def test_get_repos_with_branches_from_mirror_syncs_stale_org(mocker, freezer):
+    RepoFactory(name="test-repo", url="https://github.com/opensafely/test-repo")
+
+    mocker.patch(
+        "jobserver.repos.get_repos_with_branches",
+        autospec=True,
+        return_value=[github_repo("test-repo", ["main", "new"])],
+    )
+
+    freezer.tick(timedelta(hours=1))
+    output = get_repos_with_branches_from_mirror("opensafely")
+
+    assert output[0]["branches"] == ["main", "new"]
+
+
+def test_get_repos_with_branches_from_mirror_with_refresh(mocker):
+    repo = RepoFactory(name="test-repo", url="https://github.com/opensafely/test-repo")
+    BranchFactory(repo=repo, name="main")
+
+    mocker.patch(
+        "jobserver.repos.get_repos_with_branches",
+        autospec=True,
+        return_value=[github_repo("test-repo", ["main", "new"])],
+    )
+
+    output = get_repos_with_branches_from_mirror("opensafely")
+    assert output[0]["branches"] == ["main"]
+
+    output = get_repos_with_branches_from_mirror("opensafely", refresh=True)
+    assert output[0]["branches"] == ["main", "new"]
+
+
+def test_is_stale(freezer):
+    assert is_stale("opensafely")
+
+    RepoFactory()
+    assert not is_stale("opensafely")
+
+    freezer.tick(timedelta(hours=1))
+    assert is_stale("opensafely")
+
+
+def test_sync_stale_repos(mocker):
+    OrgFactory(github_orgs=["opensafely", "opensafely-core"])
+    RepoFactory(org="opensafely")
+
+    mock = mocker.patch("jobserver.repos.sync_repos", autospec=True)
+
+    sync_stale_repos()
+
+    mock.assert_called_once_with("opensafely-core")
+
+
+def test_sync_repos(mocker, freezer):
+    last_sync = datetime.now(timezone.utc)
+    # unchanged, with a new branch and a removed branch
+    unchanged = RepoFactory(
+        name="unchanged",
+        url="https://github.com/opensafely/unchanged",
+        is_private=True,
+        created_at=CREATED_AT,
+    )
+    BranchFactory(repo=unchanged, name="main")
+    BranchFactory(repo=unchanged, name="old")
+
+    # made public on GitHub
+    changed = RepoFactory(
+        name="changed",
+        url="https://github.com/opensafely/changed",
+        is_private=True,
+        created_at=CREATED_AT,
+    )
+
+    # removed from GitHub
+    RepoFactory(name="removed", url="https://github.com/opensafely/removed")
+
+    # another org's repos are left alone
+    other = RepoFactory(org="other", synced_at=last_sync)
+
+    mocker.patch(
+        "jobserver.repos.get_repos_with_branches",
+        autospec=True,
+        return_value=[
+            github_repo("unchanged", ["main", "new"]),
+            github_repo("changed", ["main"], is_private=False),
+            github_repo("created", ["main"]),
+        ],
+    )
+
+    freezer.tick()
+    counts = sync_repos("opensafely")
+
+    assert counts == {"created": 1, "updated": 1, "deleted": 1}
+
+    repos = Repo.objects.filter(org="opensafely").order_by("name")
+    assert [r.name for r in repos] == ["changed", "created", "unchanged"]
+    assert not Repo.objects.get(pk=changed.pk).is_private
+    assert all(r.synced_at > last_sync for r in repos)
+
+    branches = Branch.objects.filter(repo=unchanged).values_list("name", flat=True)
+    assert sorted(branches) == ["main", "new"]
+    assert list(
+        Branch.objects.filter(repo__name="created").values_list("name", flat=True)
+    ) == ["main"]
+
+    other.refresh_from_db()
+    assert other.synced_at == last_sync
+
+    # syncing again without changes writes nothing
+    assert sync_repos("opensafely") == {"created": 0, "updated": 0, "deleted": 0}
+
+
+def test_sync_repos_with_repo_created_concurrently(mocker):
+    mocker.patch(
+        "jobserver.repos.get_repos_with_branches",
+        autospec=True,
+        return_value=[github_repo("test-repo", ["main"])],
+    )
+
+    bulk_create = Repo.objects.bulk_create
+
+    def create_first(*args, **kwargs):
+        # another sync creates the repo after we've read the mirror
+        repo = RepoFactory(
+            name="test-repo", url="https://github.com/opensafely/test-repo"
+        )
+        BranchFactory(repo=repo, name="main")
+        return bulk_create(*args, **kwargs)
+
+    mocker.patch.object(Repo.objects, "bulk_create", side_effect=create_first)
+
+    sync_repos("opensafely")
+
+    repo = Repo.objects.get()
+    assert list(repo.branches.values_list("name", flat=True)) == ["main"]
+
+
+def test_sync_all_repos(mocker):
+    OrgFactory(github_orgs=["opensafely", "opensafely-core"])
+
+    mock = mocker.patch("jobserver.repos.sync_repos", autospec=True)
+
+    sync_all_repos()
+
+    assert [c.args for c in mock.call_args_list] == [
+        ("opensafely",),
+        ("opensafely-core",),
+    ]
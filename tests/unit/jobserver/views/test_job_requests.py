@@ -74,6 +74,33 @@ def test_jobrequestcancel_success(rf):
     assert "test3" in job_request.cancelled_actions
 
 
+def test_jobrequestcancel_keeps_concurrent_status_changes(rf, mocker):
+    job_request = JobRequestFactory(cancelled_actions=[], status="pending")
+    JobFactory(job_request=job_request, action="test")
+
+    def sync_status(*args, **kwargs):
+        # JobAPIUpdate writes a new status after the view loaded the JobRequest
+        JobRequest.objects.filter(pk=job_request.pk).update(status="running")
+        return True
+
+    mocker.patch(
+        "jobserver.views.job_requests.has_permission",
+        autospec=True,
+        side_effect=sync_status,
+    )
+
+    request = rf.post("/")
+    request.user = UserFactory()
+
+    response = JobRequestCancel.as_view()(request, pk=job_request.pk)
+
+    assert response.status_code == 302
+
+    job_request.refresh_from_db()
+    assert job_request.cancelled_actions == ["test"]
+    assert job_request.status == "running"
+
+
 def test_jobrequestcancel_with_job_request_creator(rf):
     user = UserFactory()
     job_request = JobRequestFactory(cancelled_actions=[], created_by=user)
@@ -3,6 +3,7 @@ from django.contrib.auth.models import AnonymousUser
 from django.http import Http404
 
 from jobserver.authorization import ProjectDeveloper
+from jobserver.models import JobRequest
 from jobserver.views.jobs import JobCancel, JobDetail, JobDetailRedirect
 
 from ....factories import (
@@ -74,6 +75,33 @@ def test_jobcancel_success(rf):
     assert job_request.cancelled_actions == ["test"]
 
 
+def test_jobcancel_keeps_concurrent_status_changes(rf, mocker):
+    job_request = JobRequestFactory(cancelled_actions=[], status="pending")
+    job = JobFactory(job_request=job_request, action="test")
+
+    def sync_status(*args, **kwargs):
+        # JobAPIUpdate writes a new status after the view loaded the JobRequest
+        JobRequest.objects.filter(pk=job_request.pk).update(status="running")
+        return True
+
+    mocker.patch(
+        "jobserver.views.jobs.has_permission",
+        autospec=True,
+        side_effect=sync_status,
+    )
+
+    request = rf.post("/")
+    request.user = UserFactory()
+
+    response = JobCancel.as_view()(request, identifier=job.identifier)
+
+    assert response.status_code == 302
+
+    job_request.refresh_from_db()
+    assert job_request.cancelled_actions == ["test"]
+    assert job_request.status == "running"
+
+
 def test_jobcancel_with_job_creator(rf):
     user = UserFactory()
     job_request = JobRequestFactory(cancelled_actions=[], created_by=user)
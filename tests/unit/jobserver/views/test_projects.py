@@ -396,6 +396,74 @@ def test_projectdetail_with_no_releases(rf, mocker):
     assert "Outputs" not in response.rendered_content
 
 
+def test_projectdetail_with_multiple_repos(rf, mocker):
+    project = ProjectFactory()
+    WorkspaceFactory(project=project, repo="https://github.com/opensafely/b-repo")
+    WorkspaceFactory(project=project, repo="https://github.com/opensafely/a-repo")
+    WorkspaceFactory(project=project, repo="https://github.com/opensafely/c-repo")
+
+    mock = mocker.patch(
+        "jobserver.views.projects.get_repo_is_private",
+        autospec=True,
+        side_effect=lambda org, repo: repo != "b-repo",
+    )
+
+    request = rf.get("/")
+    request.user = UserFactory()
+
+    response = ProjectDetail.as_view()(
+        request, org_slug=project.org.slug, project_slug=project.slug
+    )
+
+    assert response.status_code == 200
+    assert [(r["name"], r["is_private"]) for r in response.context_data["repos"]] == [
+        ("a-repo", True),
+        ("b-repo", False),
+        ("c-repo", True),
+    ]
+    assert mock.call_count == 3
+
+    # a repeat visit uses the cached answers
+    response = ProjectDetail.as_view()(
+        request, org_slug=project.org.slug, project_slug=project.slug
+    )
+
+    assert response.status_code == 200
+    assert [r["is_private"] for r in response.context_data["repos"]] == [
+        True,
+        False,
+        True,
+    ]
+    assert mock.call_count == 3
+
+
+@pytest.mark.parametrize(
+    "error", [requests.HTTPError, requests.Timeout, requests.ConnectionError]
+)
+def test_projectdetail_does_not_cache_github_failures(rf, mocker, error):
+    project = ProjectFactory()
+    WorkspaceFactory(project=project)
+
+    mock = mocker.patch(
+        "jobserver.views.projects.get_repo_is_private",
+        autospec=True,
+        side_effect=[error, True],
+    )
+
+    request = rf.get("/")
+    request.user = UserFactory()
+
+    for expected in [None, True]:
+        response = ProjectDetail.as_view()(
+            request, org_slug=project.org.slug, project_slug=project.slug
+        )
+
+        assert response.status_code == 200
+        assert response.context_data["repos"][0]["is_private"] is expected
+
+    assert mock.call_count == 2
+
+
 def test_projectdetail_unknown_org(rf):
     project = ProjectFactory()
 
@@ -1,3 +1,4 @@
+import io
 import zipfile
 
 import pytest
@@ -27,12 +28,14 @@ from jobserver.views.workspaces import (
 from ....factories import (
     BackendFactory,
     BackendMembershipFactory,
+    BranchFactory,
     JobFactory,
     JobRequestFactory,
     ProjectFactory,
     ProjectMembershipFactory,
     ReleaseFactory,
     ReleaseUploadsFactory,
+    RepoFactory,
     SnapshotFactory,
     UserFactory,
     WorkspaceFactory,
@@ -218,17 +221,44 @@ def test_workspacebackendfiles_without_permission(rf):
         )
 
 
-def test_workspacecreate_get_success(rf, mocker, user):
+def test_workspacecreate_get_success(rf, user):
     project = ProjectFactory()
     ProjectMembershipFactory(project=project, user=user, roles=[ProjectDeveloper])
 
+    BranchFactory(repo=RepoFactory(name="test", url="test"), name="main")
+
+    request = rf.get("/")
+    request.user = user
+
+    response = WorkspaceCreate.as_view()(
+        request, org_slug=project.org.slug, project_slug=project.slug
+    )
+
+    assert response.status_code == 200
+
+
+def test_workspacecreate_get_with_refresh(rf, mocker, user):
+    project = ProjectFactory()
+    ProjectMembershipFactory(project=project, user=user, roles=[ProjectDeveloper])
+
+    repo = RepoFactory(name="test", url="test")
+    BranchFactory(repo=repo, name="main")
+
     mocker.patch(
-        "jobserver.views.workspaces.get_repos_with_branches",
+        "jobserver.repos.get_repos_with_branches",
         autospec=True,
-        return_value=[{"name": "test", "url": "test", "branches": ["main"]}],
+        return_value=[
+            {
+                "name": "test",
+                "url": "test",
+                "is_private": repo.is_private,
+                "created_at": repo.created_at,
+                "branches": ["main", "new-branch"],
+            }
+        ],
     )
 
-    request = rf.get("/")
+    request = rf.get("/?refresh")
     request.user = user
 
     response = WorkspaceCreate.as_view()(
@@ -236,6 +266,10 @@ def test_workspacecreate_get_success(rf, mocker, user):
     )
 
     assert response.status_code == 200
+    assert response.context_data["repos_with_branches"][0]["branches"] == [
+        "main",
+        "new-branch",
+    ]
 
 
 def test_workspacecreate_get_without_permission(rf):
@@ -253,15 +287,11 @@ def test_workspacecreate_get_without_permission(rf):
 
 
 @responses.activate
-def test_workspacecreate_post_success(rf, mocker, user):
+def test_workspacecreate_post_success(rf, user):
     project = ProjectFactory()
     ProjectMembershipFactory(project=project, user=user, roles=[ProjectDeveloper])
 
-    mocker.patch(
-        "jobserver.views.workspaces.get_repos_with_branches",
-        autospec=True,
-        return_value=[{"name": "Test", "url": "test", "branches": ["test"]}],
-    )
+    BranchFactory(repo=RepoFactory(name="Test", url="test"), name="test")
 
     data = {
         "name": "Test",
@@ -282,14 +312,17 @@ def test_workspacecreate_post_success(rf, mocker, user):
     assert workspace.created_by == user
 
 
-def test_workspacecreate_without_github(rf, mocker, user):
+@pytest.mark.parametrize(
+    "error", [requests.HTTPError, requests.Timeout, requests.ConnectionError]
+)
+def test_workspacecreate_without_github(rf, mocker, user, error):
     project = ProjectFactory()
     ProjectMembershipFactory(project=project, user=user, roles=[ProjectDeveloper])
 
     mocker.patch(
-        "jobserver.views.workspaces.get_repos_with_branches",
+        "jobserver.repos.get_repos_with_branches",
         autospec=True,
-        side_effect=requests.HTTPError,
+        side_effect=error,
     )
 
     request = rf.get("/")
@@ -548,13 +581,16 @@ def test_workspacedetail_unknown_workspace(rf):
         )
 
 
-def test_workspacedetail_with_no_github(rf, mocker):
+@pytest.mark.parametrize(
+    "error", [requests.HTTPError, requests.Timeout, requests.ConnectionError]
+)
+def test_workspacedetail_with_no_github(rf, mocker, error):
     workspace = WorkspaceFactory()
 
     mocker.patch(
         "jobserver.views.workspaces.get_repo_is_private",
         autospec=True,
-        side_effect=requests.HTTPError,
+        side_effect=error,
     )
 
     request = rf.get("/")
@@ -751,7 +787,12 @@ def test_workspacelatestoutputsdownload_success(rf):
     assert response.status_code == 200
 
     # check the returned file has the 3 files in it
-    with zipfile.ZipFile(response.file_to_stream, "r") as zip_obj:
+    assert response["Content-Disposition"] == (
+        f'attachment; filename="workspace-{workspace.name}.zip"'
+    )
+
+    zf = io.BytesIO(b"".join(response.streaming_content))
+    with zipfile.ZipFile(zf, "r") as zip_obj:
         assert zip_obj.testzip() is None
 
         assert set(zip_obj.namelist()) == {"test1", "test2", "test3"}
@@ -1,12 +1,20 @@
+import requests
+from django.contrib.messages.storage.fallback import FallbackStorage
 from django.utils import timezone
 
 from staff.views.repos import RepoList
 
-from ....factories import JobFactory, JobRequestFactory, WorkspaceFactory
+from ....factories import (
+    JobFactory,
+    JobRequestFactory,
+    OrgFactory,
+    RepoFactory,
+    WorkspaceFactory,
+)
 from ....utils import minutes_ago
 
 
-def test_workspacelist_success(rf, core_developer, mocker):
+def test_workspacelist_success(rf, core_developer):
     now = timezone.now()
 
     workspace1 = WorkspaceFactory(repo="https://github.com/opensafely-core/job-server")
@@ -30,37 +38,84 @@ def test_workspacelist_success(rf, core_developer, mocker):
     request = rf.get("/")
     request.user = core_developer
 
+    RepoFactory(
+        name="job-runner",
+        url="https://github.com/opensafely-core/job-runner",
+        is_private=True,
+    )
+    RepoFactory(
+        name="job-server",
+        url="https://github.com/opensafely-core/job-server",
+        is_private=True,
+    )
+    RepoFactory(name="test", url="test", is_private=True)
+    RepoFactory(name="public", is_private=False)
+
+    response = RepoList.as_view()(request)
+
+    assert response.status_code == 200
+
+    # public repos aren't listed
+    assert len(response.context_data["repos"]) == 3
+
+    job_runner, job_server, _ = sorted(
+        response.context_data["repos"], key=lambda r: r["name"]
+    )
+    assert job_runner["workspace"].first_run == minutes_ago(now, 2)
+    assert job_server["workspace"].first_run == minutes_ago(now, 10)
+
+
+def test_repolist_syncs_empty_mirror(rf, mocker, core_developer):
+    OrgFactory(github_orgs=["opensafely"])
+
     mocker.patch(
-        "staff.views.repos.get_repos_with_dates",
+        "jobserver.repos.get_repos_with_branches",
         autospec=True,
         return_value=[
-            {
-                "name": "job-runner",
-                "url": "https://github.com/opensafely-core/job-runner",
-                "is_private": True,
-                "created_at": timezone.now(),
-            },
-            {
-                "name": "job-server",
-                "url": "https://github.com/opensafely-core/job-server",
-                "is_private": True,
-                "created_at": timezone.now(),
-            },
             {
                 "name": "test",
-                "url": "test",
+                "url": "https://github.com/opensafely/test",
                 "is_private": True,
                 "created_at": timezone.now(),
-            },
+                "branches": ["main"],
+            }
         ],
     )
 
+    request = rf.get("/")
+    request.user = core_developer
+
     response = RepoList.as_view()(request)
 
     assert response.status_code == 200
+    assert [r["name"] for r in response.context_data["repos"]] == ["test"]
 
-    job_runner, job_server, _ = sorted(
-        response.context_data["repos"], key=lambda r: r["name"]
+
+def test_repolist_without_github(rf, mocker, core_developer):
+    OrgFactory(github_orgs=["opensafely"])
+
+    mocker.patch(
+        "jobserver.repos.get_repos_with_branches",
+        autospec=True,
+        side_effect=requests.ConnectionError,
+    )
+
+    request = rf.get("/")
+    request.user = core_developer
+
+    # set up messages framework
+    request.session = "session"
+    messages = FallbackStorage(request)
+    request._messages = messages
+
+    response = RepoList.as_view()(request)
+
+    assert response.status_code == 200
+    assert response.context_data["repos"] == []
+
+    messages = list(messages)
+    assert len(messages) == 1
+    assert str(messages[0]) == (
+        "An error occurred while syncing repositories from GitHub, "
+        "this list may be out of date."
     )
-    assert job_runner["workspace"].first_run == minutes_ago(now, 2)
-    assert job_server["workspace"].first_run == minutes_ago(now, 10)